@@ -0,0 +1,214 @@
+import logging
+from typing import List
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
+
+from app.api.dependencies import (
+    collection_index_manager,
+    get_collection_registry,
+    get_index_manager,
+    get_response_cache,
+    require_admin,
+)
+from app.api.schemas import CollectionCreateRequest, CollectionResponse, IndexBuildRequest
+from app.config import settings
+from app.infrastructure.embeddings.model_registry import model_registry
+from app.infrastructure.vector_store.collections import (
+    CollectionAlreadyExists,
+    CollectionNotFound,
+)
+from app.infrastructure.vector_store.index_manager import (
+    IndexOperationInProgress,
+    VectorIndexManager,
+)
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"],
+    dependencies=[Depends(require_admin)],
+)
+logger = logging.getLogger(__name__)
+
+
+def _run_in_background(operation, *args, **kwargs):
+    try:
+        operation(*args, **kwargs)
+    except Exception:
+        # Already logged and recorded as last_operation by the manager
+        pass
+
+
+def _start_operation(
+    manager: VectorIndexManager,
+    kind: str,
+    operation,
+    params: dict,
+    http_request: Request,
+    background_tasks: BackgroundTasks,
+) -> dict:
+    try:
+        started = manager.begin(kind, **params)
+    except IndexOperationInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    logger.info(
+        "vector_index_%s_requested request_id=%s table=%s params=%s",
+        kind,
+        http_request.state.request_id,
+        manager.table,
+        params,
+    )
+
+    # CREATE INDEX CONCURRENTLY can take minutes; progress is visible via the status endpoints
+    background_tasks.add_task(_run_in_background, operation, **params)
+    return {"status": "accepted", "operation": started}
+
+
+def _collection_index_manager(name: str) -> VectorIndexManager:
+    if settings.VECTOR_BACKEND == "memory":
+        raise HTTPException(status_code=400, detail="Index management requires the pgvector backend.")
+    try:
+        return collection_index_manager(get_collection_registry().get(name))
+    except CollectionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+# -----------------------------
+# Default collection index
+# -----------------------------
+
+@router.get("/index")
+def index_status(manager: VectorIndexManager = Depends(get_index_manager)):
+    return manager.status()
+
+
+@router.post("/index/build", status_code=202)
+def build_index(
+    request: IndexBuildRequest,
+    http_request: Request,
+    background_tasks: BackgroundTasks,
+    manager: VectorIndexManager = Depends(get_index_manager),
+):
+    params = request.model_dump(exclude_none=True)
+    return _start_operation(manager, "build", manager.build, params, http_request, background_tasks)
+
+
+@router.post("/index/rebuild", status_code=202)
+def rebuild_index(
+    http_request: Request,
+    background_tasks: BackgroundTasks,
+    manager: VectorIndexManager = Depends(get_index_manager),
+):
+    return _start_operation(manager, "rebuild", manager.rebuild, {}, http_request, background_tasks)
+
+
+# -----------------------------
+# Collections
+# -----------------------------
+
+@router.get("/collections", response_model=List[CollectionResponse])
+def list_collections():
+    return [c.to_dict() for c in get_collection_registry().list()]
+
+
+@router.post("/collections", response_model=CollectionResponse, status_code=201)
+def create_collection(request: CollectionCreateRequest, http_request: Request):
+    embedding_model = request.embedding_model or settings.EMBEDDING_MODEL
+    # Only preloaded models: a lazy load would stall the first request in every worker
+    if embedding_model not in settings.embedding_models:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Model '{embedding_model}' is not served; add it to EMBEDDING_PRELOAD_MODELS.",
+        )
+
+    dimension = model_registry.get(embedding_model).dimension
+    if request.dimension is not None and request.dimension != dimension:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Model '{embedding_model}' produces {dimension}-dimensional embeddings.",
+        )
+
+    index_params = request.model_dump(
+        include={"lists", "m", "ef_construction"}, exclude_none=True
+    )
+
+    try:
+        collection = get_collection_registry().create(
+            request.name,
+            embedding_model=embedding_model,
+            dimension=dimension,
+            metric=request.metric,
+            index_type=request.index_type,
+            index_params=index_params,
+            quantization=request.quantization,
+        )
+    except CollectionAlreadyExists as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    logger.info(
+        "collection_create_completed request_id=%s name=%s",
+        http_request.state.request_id,
+        collection.name,
+    )
+    return collection.to_dict()
+
+
+@router.delete("/collections/{name}")
+def drop_collection(name: str, http_request: Request):
+    try:
+        get_collection_registry().drop(name)
+    except CollectionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    response_cache = get_response_cache()
+    if response_cache is not None:
+        response_cache.invalidate()
+
+    logger.info(
+        "collection_drop_completed request_id=%s name=%s",
+        http_request.state.request_id,
+        name,
+    )
+    return {"status": "dropped", "name": name}
+
+
+@router.get("/collections/{name}/index")
+def collection_index_status(name: str):
+    return _collection_index_manager(name).status()
+
+
+@router.post("/collections/{name}/index/build", status_code=202)
+def build_collection_index(
+    name: str,
+    request: IndexBuildRequest,
+    http_request: Request,
+    background_tasks: BackgroundTasks,
+):
+    manager = _collection_index_manager(name)
+    params = request.model_dump(exclude_none=True)
+    return _start_operation(manager, "build", manager.build, params, http_request, background_tasks)
+
+
+@router.post("/collections/{name}/index/rebuild", status_code=202)
+def rebuild_collection_index(
+    name: str,
+    http_request: Request,
+    background_tasks: BackgroundTasks,
+):
+    manager = _collection_index_manager(name)
+    return _start_operation(manager, "rebuild", manager.rebuild, {}, http_request, background_tasks)
+
+
+@router.post("/collections/{name}/vacuum", status_code=202)
+def vacuum_collection(
+    name: str,
+    http_request: Request,
+    background_tasks: BackgroundTasks,
+):
+    """VACUUM (ANALYZE) one collection's table, e.g. after a bulk load or a large delete."""
+    manager = _collection_index_manager(name)
+    return _start_operation(manager, "vacuum", manager.vacuum, {}, http_request, background_tasks)
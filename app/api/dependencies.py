@@ -1,11 +1,44 @@
-from fastapi import Depends
+import hmac
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import Depends, Header, HTTPException, Query
 from app.infrastructure.llm.factory import get_llm
 from app.infrastructure.llm.local_adapter import LocalAdapter
+from app.infrastructure.llm.resilience import CircuitBreaker, ResilientLLM
+from app.infrastructure.reranking.cross_encoder import CrossEncoderReranker
+from app.infrastructure.cache.response_cache import InMemoryResponseCache
+from app.infrastructure.chunking.text_chunker import TextChunker
+from app.infrastructure.embeddings.embedding_cache import CachedEmbeddingProvider, EmbeddingCache
 from app.infrastructure.embeddings.embedding_service import LocalEmbeddingService
+from app.infrastructure.embeddings.model_registry import model_registry
+from pgvector.psycopg import register_vector_async
+from pgvector.psycopg2 import register_vector
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import AsyncConnectionPool
+from app.infrastructure.vector_store.async_pgvector_repository import AsyncPgVectorRepository
+from app.infrastructure.vector_store.collections import (
+    DEFAULT_COLLECTION,
+    Collection,
+    CollectionNotFound,
+    CollectionRegistry,
+    MemoryCollectionRegistry,
+    PgCollectionRegistry,
+)
+from app.infrastructure.vector_store.connection_pool import PgConnectionPool
+from app.infrastructure.vector_store.index_manager import TABLE_NAME, VectorIndexManager
+from app.infrastructure.vector_store.memory_vector_store import InMemoryVectorStore
 from app.infrastructure.vector_store.pgvector_repository import PgVectorRepository
+from app.application.orchestrators.context_builder import ContextBuilder
 from app.application.orchestrators.rag_orchestrator import RAGOrchestrator
-from app.application.use_cases import IngestTextUseCase, QuerySimilarTextUseCase
+from app.application.use_cases import (
+    BulkIngestTextUseCase,
+    IngestTextUseCase,
+    QuerySimilarTextUseCase,
+)
 from app.application.agents.financial_decision_engine import FinancialDecisionEngine
+from app.application.batch_jobs import BatchJobRegistry
+from app.core.limits import CallLimiter
 from app.config import settings
 
 
@@ -13,45 +46,362 @@ from app.config import settings
 # Infrastructure
 # -----------------------------
 
+@lru_cache
+def get_embedding_cache() -> EmbeddingCache:
+    # Shared by all models; keys include the model name
+    return EmbeddingCache(
+        max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+        ttl_s=settings.EMBEDDING_CACHE_TTL_S,
+        disk_path=settings.EMBEDDING_CACHE_DISK_PATH,
+    )
+
+
+@lru_cache
+def embedding_service_for(model_name: str):
+    # One instance per model and worker; the model itself is held by the registry
+    service = LocalEmbeddingService(
+        model_name,
+        batching=settings.EMBEDDING_BATCHING_ENABLED,
+        max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+        max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS,
+        executor_workers=settings.EMBEDDING_EXECUTOR_WORKERS,
+    )
+
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return service
+
+    return CachedEmbeddingProvider(
+        service, get_embedding_cache(), model_name=model_name, backend=model_registry.backend
+    )
+
+
 def get_embedding_service():
-    return LocalEmbeddingService()
+    return embedding_service_for(settings.EMBEDDING_MODEL)
 
 
-def get_vector_repository():
-    return PgVectorRepository(
+@lru_cache
+def text_chunker_for(model_name: str):
+    if not settings.CHUNKING_ENABLED:
+        return None
+
+    model = model_registry.get(model_name)
+    # Chunks must fit the model window, minus the [CLS]/[SEP] special tokens
+    max_tokens = min(settings.CHUNK_MAX_TOKENS, model.max_seq_length - 2)
+
+    return TextChunker(
+        count_tokens=model.count_tokens,
+        max_tokens=max_tokens,
+        overlap_tokens=min(settings.CHUNK_OVERLAP_TOKENS, max_tokens - 1),
+    )
+
+
+@lru_cache
+def get_connection_pool() -> PgConnectionPool:
+    # Shared by every repository and the health check in this worker
+    return PgConnectionPool(
         host=settings.DB_HOST,
         port=settings.DB_PORT,
         db_name=settings.DB_NAME,
         user=settings.DB_USER,
         password=settings.DB_PASSWORD,
+        min_size=settings.DB_POOL_MIN_SIZE,
+        max_size=settings.DB_SYNC_POOL_MAX_SIZE,
+        acquire_timeout_s=settings.DB_POOL_ACQUIRE_TIMEOUT_S,
+        max_idle_s=settings.DB_POOL_MAX_IDLE_S,
+        max_lifetime_s=settings.DB_POOL_MAX_LIFETIME_S,
+        validate_after_idle_s=settings.DB_POOL_VALIDATE_AFTER_IDLE_S,
+        configure=register_vector,
+    )
+
+
+def memory_vector_store(metric: str, path: Optional[str]) -> InMemoryVectorStore:
+    # Implements both repository contracts
+    return InMemoryVectorStore(
+        metric=metric,
+        path=path,
+        ann=settings.MEMORY_STORE_ANN,
+        hnsw_m=settings.HNSW_M,
+        hnsw_ef_construction=settings.HNSW_EF_CONSTRUCTION,
+        default_ef_search=settings.HNSW_EF_SEARCH,
+    )
+
+
+@lru_cache
+def get_memory_vector_store() -> InMemoryVectorStore:
+    # The default collection's store; one per worker
+    return memory_vector_store(settings.VECTOR_DISTANCE_METRIC, settings.MEMORY_STORE_PATH)
+
+
+@lru_cache
+def get_collection_registry() -> CollectionRegistry:
+    default = Collection(
+        name=DEFAULT_COLLECTION,
+        table=TABLE_NAME,
+        embedding_model=settings.EMBEDDING_MODEL,
+        dimension=model_registry.get(settings.EMBEDDING_MODEL).dimension,
+        metric=settings.VECTOR_DISTANCE_METRIC,
+        index_type=settings.VECTOR_INDEX_TYPE,
+        quantization=settings.VECTOR_QUANTIZATION,
+    )
+
+    if settings.VECTOR_BACKEND == "memory":
+        return MemoryCollectionRegistry(
+            default,
+            get_memory_vector_store(),
+            memory_vector_store,
+            path=settings.MEMORY_STORE_PATH,
+        )
+
+    return PgCollectionRegistry(
+        get_connection_pool(), default, cache_ttl_s=settings.COLLECTION_CACHE_TTL_S
+    )
+
+
+async def get_collection(
+    collection: str = Query(
+        DEFAULT_COLLECTION,
+        description="Collection to read from or write to. Defaults to the default collection.",
+    ),
+) -> Collection:
+    try:
+        return await get_collection_registry().aget(collection)
+    except CollectionNotFound as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+
+
+def get_vector_repository(
+    pool=Depends(get_connection_pool),
+    collection: Collection = Depends(get_collection),
+):
+    if settings.VECTOR_BACKEND == "memory":
+        return get_collection_registry().store(collection.name)
+
+    return PgVectorRepository(
+        pool,
+        metric=collection.metric,
+        default_probes=settings.IVFFLAT_PROBES,
+        default_ef_search=settings.HNSW_EF_SEARCH,
+        iterative_scan=settings.VECTOR_ITERATIVE_SCAN,
+        table=collection.table,
+        quantization=collection.quantization,
+        dimension=collection.dimension,
+        rescore_factor=settings.VECTOR_RESCORE_FACTOR,
     )
 
 
+@lru_cache
+def get_async_connection_pool() -> AsyncConnectionPool:
+    # Serves the async request path; opened and closed in the app lifespan
+    return AsyncConnectionPool(
+        conninfo=make_conninfo(
+            host=settings.DB_HOST,
+            port=settings.DB_PORT,
+            dbname=settings.DB_NAME,
+            user=settings.DB_USER,
+            password=settings.DB_PASSWORD,
+        ),
+        min_size=settings.DB_POOL_MIN_SIZE,
+        max_size=settings.DB_POOL_MAX_SIZE,
+        timeout=settings.DB_POOL_ACQUIRE_TIMEOUT_S,
+        max_idle=settings.DB_POOL_MAX_IDLE_S,
+        max_lifetime=settings.DB_POOL_MAX_LIFETIME_S,
+        name="vectorengine-async",
+        # Binary vector adapters for NumPy arrays on every pooled connection
+        configure=register_vector_async,
+        open=False,
+    )
+
+
+def get_async_vector_repository(
+    pool=Depends(get_async_connection_pool),
+    collection: Collection = Depends(get_collection),
+):
+    if settings.VECTOR_BACKEND == "memory":
+        return get_collection_registry().store(collection.name)
+
+    return AsyncPgVectorRepository(
+        pool,
+        metric=collection.metric,
+        default_probes=settings.IVFFLAT_PROBES,
+        default_ef_search=settings.HNSW_EF_SEARCH,
+        iterative_scan=settings.VECTOR_ITERATIVE_SCAN,
+        table=collection.table,
+        quantization=collection.quantization,
+        dimension=collection.dimension,
+        rescore_factor=settings.VECTOR_RESCORE_FACTOR,
+    )
+
+
+def get_collection_embedding_service(collection: Collection = Depends(get_collection)):
+    return embedding_service_for(collection.embedding_model)
+
+
+def get_collection_chunker(collection: Collection = Depends(get_collection)):
+    return text_chunker_for(collection.embedding_model)
+
+
+def hybrid_search_params(
+    candidates: Optional[int] = None,
+    semantic_weight: Optional[float] = None,
+    lexical_weight: Optional[float] = None,
+) -> dict:
+    """Hybrid search parameters, with Settings defaults for anything not given."""
+    return {
+        "candidates": candidates or settings.HYBRID_CANDIDATES,
+        "semantic_weight": (
+            semantic_weight if semantic_weight is not None else settings.HYBRID_SEMANTIC_WEIGHT
+        ),
+        "lexical_weight": (
+            lexical_weight if lexical_weight is not None else settings.HYBRID_LEXICAL_WEIGHT
+        ),
+        "rrf_k": settings.HYBRID_RRF_K,
+    }
+
+
+@lru_cache
+def index_manager_for(
+    table: str,
+    metric: str,
+    index_type: str,
+    hnsw_m: int,
+    hnsw_ef_construction: int,
+    quantization: str = "none",
+    dimension: Optional[int] = None,
+) -> VectorIndexManager:
+    # One per table, so only one build/rebuild/vacuum runs per collection and worker
+    return VectorIndexManager(
+        get_connection_pool(),
+        metric=metric,
+        default_index_type=index_type,
+        hnsw_m=hnsw_m,
+        hnsw_ef_construction=hnsw_ef_construction,
+        maintenance_work_mem=settings.INDEX_MAINTENANCE_WORK_MEM,
+        table=table,
+        quantization=quantization,
+        dimension=dimension,
+    )
+
+
+def collection_index_manager(collection: Collection) -> VectorIndexManager:
+    return index_manager_for(
+        collection.table,
+        collection.metric,
+        collection.index_type,
+        collection.index_params.get("m") or settings.HNSW_M,
+        collection.index_params.get("ef_construction") or settings.HNSW_EF_CONSTRUCTION,
+        collection.quantization,
+        collection.dimension,
+    )
+
+
+def get_index_manager() -> VectorIndexManager:
+    return collection_index_manager(get_collection_registry().default)
+
+
+def require_admin(x_admin_key: Optional[str] = Header(default=None)):
+    # Fails closed: /admin can drop tables, so it stays locked until a key is configured
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=403, detail="Admin API is disabled: ADMIN_API_KEY is not set.")
+    if x_admin_key is None or not hmac.compare_digest(
+        x_admin_key.encode(), settings.ADMIN_API_KEY.encode()
+    ):
+        raise HTTPException(status_code=401, detail="Invalid admin key.")
+
+
+@lru_cache
+def get_response_cache():
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return None
+
+    return InMemoryResponseCache(
+        max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+        ttl_s=settings.RESPONSE_CACHE_TTL_S,
+        semantic_threshold=settings.RESPONSE_CACHE_SEMANTIC_THRESHOLD,
+    )
+
+
+@lru_cache
+def get_reranker():
+    if not settings.RERANK_ENABLED:
+        return None
+
+    # Loaded once per worker and warmed up in the app lifespan
+    return CrossEncoderReranker(
+        settings.RERANK_MODEL,
+        batch_size=settings.RERANK_BATCH_SIZE,
+        max_length=settings.RERANK_MAX_LENGTH,
+    )
+
+
+@lru_cache
 def get_llm_adapter():
-    return get_llm()
+    # Shared so the provider's HTTP connection pool and health are shared across requests
+    llm = get_llm()
+    if not settings.LLM_BREAKER_ENABLED:
+        return llm
+
+    return ResilientLLM(
+        llm,
+        CircuitBreaker(
+            llm.provider_name,
+            failure_threshold=settings.LLM_BREAKER_FAILURES,
+            latency_threshold_s=settings.LLM_BREAKER_LATENCY_S,
+            latency_percentile=settings.LLM_BREAKER_LATENCY_PERCENTILE,
+            window=settings.LLM_BREAKER_WINDOW,
+            min_calls=settings.LLM_BREAKER_MIN_CALLS,
+            reset_timeout_s=settings.LLM_BREAKER_RESET_S,
+        ),
+        max_concurrency=settings.LLM_MAX_CONCURRENCY,
+        queue_timeout_s=settings.LLM_QUEUE_TIMEOUT_S,
+        hedge_percentile=settings.LLM_HEDGE_PERCENTILE,
+        hedge_min_delay_s=settings.LLM_HEDGE_MIN_DELAY_S,
+    )
 
 
 # -----------------------------
 # Use Cases
+# (routes are async, so use cases get the async repository)
 # -----------------------------
 
 def get_ingest_use_case(
-    embedding_service=Depends(get_embedding_service),
-    vector_repository=Depends(get_vector_repository),
+    embedding_service=Depends(get_collection_embedding_service),
+    vector_repository=Depends(get_async_vector_repository),
+    response_cache=Depends(get_response_cache),
+    chunker=Depends(get_collection_chunker),
 ):
     return IngestTextUseCase(
         embedding_provider=embedding_service,
         vector_repository=vector_repository,
+        response_cache=response_cache,
+        chunker=chunker,
+        batch_size=settings.STREAM_INGEST_BATCH_SIZE,
+    )
+
+
+def get_bulk_ingest_use_case(
+    embedding_service=Depends(get_collection_embedding_service),
+    vector_repository=Depends(get_async_vector_repository),
+    response_cache=Depends(get_response_cache),
+    chunker=Depends(get_collection_chunker),
+):
+    return BulkIngestTextUseCase(
+        embedding_provider=embedding_service,
+        vector_repository=vector_repository,
+        embed_batch_size=settings.BULK_EMBED_BATCH_SIZE,
+        insert_batch_size=settings.BULK_INSERT_BATCH_SIZE,
+        response_cache=response_cache,
+        chunker=chunker,
     )
 
 
 def get_query_use_case(
-    embedding_service=Depends(get_embedding_service),
-    vector_repository=Depends(get_vector_repository),
+    embedding_service=Depends(get_collection_embedding_service),
+    vector_repository=Depends(get_async_vector_repository),
 ):
     return QuerySimilarTextUseCase(
         embedding_provider=embedding_service,
         vector_repository=vector_repository,
+        hybrid_batch_concurrency=settings.HYBRID_BATCH_CONCURRENCY,
     )
 
 
@@ -60,15 +410,32 @@ def get_query_use_case(
 # -----------------------------
 
 def get_orchestrator(
-    repository=Depends(get_vector_repository),
-    embedding_service=Depends(get_embedding_service),
+    repository=Depends(get_async_vector_repository),
+    embedding_service=Depends(get_collection_embedding_service),
     llm=Depends(get_llm_adapter),
+    response_cache=Depends(get_response_cache),
+    collection: Collection = Depends(get_collection),
+    reranker=Depends(get_reranker),
 ):
     return RAGOrchestrator(
         repository=repository,
         embedding_service=embedding_service,
         llm=llm,
         fallback_llm=LocalAdapter(),
+        response_cache=response_cache,
+        hybrid=hybrid_search_params() if settings.RAG_SEARCH_MODE == "hybrid" else None,
+        collection=collection.name,
+        reranker=reranker,
+        rerank_candidates=settings.RERANK_CANDIDATES,
+        rerank_budget_s=(
+            settings.RERANK_BUDGET_MS / 1000.0 if settings.RERANK_BUDGET_MS is not None else None
+        ),
+        context_builder=ContextBuilder(
+            llm.count_tokens,
+            max_tokens=settings.CONTEXT_MAX_TOKENS,
+            duplicate_threshold=settings.CONTEXT_DUPLICATE_THRESHOLD,
+        ),
+        hybrid_batch_concurrency=settings.HYBRID_BATCH_CONCURRENCY,
     )
 
 
@@ -76,3 +443,14 @@ def get_financial_engine(
     orchestrator=Depends(get_orchestrator),
 ):
     return FinancialDecisionEngine(orchestrator)
+
+
+@lru_cache
+def get_batch_limiter() -> CallLimiter:
+    # One per worker, so concurrent batches and jobs share the LLM budget
+    return CallLimiter(settings.FINANCIAL_BATCH_CONCURRENCY, settings.FINANCIAL_BATCH_RATE_PER_S)
+
+
+@lru_cache
+def get_batch_jobs() -> BatchJobRegistry:
+    return BatchJobRegistry(ttl_s=settings.FINANCIAL_JOB_TTL_S)
@@ -1,33 +1,85 @@
-from fastapi import APIRoter
-import os
-import psycopg2
+from fastapi import APIRouter, Depends
+
+from app.api.dependencies import (
+    get_async_connection_pool,
+    get_connection_pool,
+    get_collection_registry,
+    get_embedding_service,
+    get_reranker,
+    get_response_cache,
+)
+from app.config import settings
+from app.infrastructure.embeddings.model_registry import model_registry
 
 router = APIRouter()
 
-@router.get("/health", tags=["Health"])
-def health_check():
+@router.get("/health/db", tags=["Health"])
+async def health_check(
+    async_pool=Depends(get_async_connection_pool),
+    pool=Depends(get_connection_pool),
+):
+    # Borrow from the shared pool so probes exercise the same path as queries
+    pools = {
+        "async": async_pool.get_stats(),
+        "sync": pool.stats(),
+    }
+
     try:
-        conn = psycopg2.connect(
-            host=os.getenv("DB_HOST"),
-            port=os.getenv("DB_PORT"),
-            dbname=os.getenv("DB_NAME"),
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASSWORD"),
-        )
-        cur = conn.cursor()
-        cur.execute("SELECT 1;")
-        cur.fetchone()
-        cur.close()
-        conn.close()
+        async with async_pool.connection() as conn:
+            await conn.execute("SELECT 1;")
 
         return {
             "status": "ok",
-            "database": "connected"
+            "database": "connected",
+            "pools": pools,
         }
 
     except Exception as e:
         return {
             "status": "error",
             "database": "disconnected",
-            "detail": str(e)
+            "detail": str(e),
+            "pools": pools,
         }
+
+
+@router.get("/health/embeddings", tags=["Health"])
+async def embeddings_health(embedding_service=Depends(get_embedding_service)):
+    # Cold-start cost per model plus cache and batching effectiveness
+    cache = getattr(embedding_service, "cache", None)
+    service = getattr(embedding_service, "provider", embedding_service)
+    scheduler = getattr(service, "scheduler", None)
+
+    return {
+        "models": model_registry.stats(),
+        "cache": cache.stats() if cache is not None else None,
+        "batching": scheduler.stats() if scheduler is not None else None,
+    }
+
+
+@router.get("/health/reranker", tags=["Health"])
+async def reranker_health(reranker=Depends(get_reranker)):
+    if reranker is None:
+        return {"enabled": False}
+    return {"enabled": True, "budget_ms": settings.RERANK_BUDGET_MS, **reranker.stats()}
+
+
+@router.get("/health/response-cache", tags=["Health"])
+async def response_cache_health(response_cache=Depends(get_response_cache)):
+    if response_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **response_cache.stats()}
+
+
+@router.get("/health/vector-store", tags=["Health"])
+async def vector_store_health():
+    if settings.VECTOR_BACKEND != "memory":
+        return {"backend": settings.VECTOR_BACKEND}
+
+    # Default collection at the top level, named collections below
+    stores = get_collection_registry().stores()
+    default = stores.pop(get_collection_registry().default.name)
+    return {
+        **default.stats(),
+        "collections": {name: store.stats() for name, store in stores.items()},
+    }
@@ -0,0 +1,152 @@
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from app.api.dependencies import (
+    embedding_service_for,
+    get_async_connection_pool,
+    get_connection_pool,
+    get_embedding_cache,
+    get_llm_adapter,
+    get_response_cache,
+)
+from app.infrastructure.llm.resilience import CIRCUIT_STATES
+from app.config import settings
+
+router = APIRouter()
+
+
+class ComponentStatsCollector:
+    """
+    Pool, cache, batching and LLM provider metrics read from the components' own stats()
+    at scrape time, so the request path pays nothing for them.
+    """
+
+    def describe(self):
+        # Keeps register() from calling collect() before the app has started
+        return []
+
+    def collect(self):
+        if settings.VECTOR_BACKEND != "memory":
+            yield from self._pools()
+        yield from self._response_cache()
+        yield from self._embeddings()
+        yield from self._llm()
+
+    def _pools(self):
+        connections = GaugeMetricFamily(
+            "vectorengine_db_pool_connections",
+            "Open connections per pool, by state.",
+            labels=["pool", "state"],
+        )
+        max_size = GaugeMetricFamily(
+            "vectorengine_db_pool_max_size", "Pool size limit.", labels=["pool"]
+        )
+        waiting = GaugeMetricFamily(
+            "vectorengine_db_pool_waiting", "Requests waiting for a connection.", labels=["pool"]
+        )
+        timeouts = CounterMetricFamily(
+            "vectorengine_db_pool_timeouts",
+            "Connection requests that gave up waiting.",
+            labels=["pool"],
+        )
+
+        sync = get_connection_pool().stats()
+        connections.add_metric(["sync", "in_use"], sync["in_use"])
+        connections.add_metric(["sync", "idle"], sync["idle"])
+        max_size.add_metric(["sync"], sync["max_size"])
+        waiting.add_metric(["sync"], sync["waiting"])
+        timeouts.add_metric(["sync"], sync["timeouts"])
+
+        stats = get_async_connection_pool().get_stats()
+        size, available = stats.get("pool_size", 0), stats.get("pool_available", 0)
+        connections.add_metric(["async", "in_use"], size - available)
+        connections.add_metric(["async", "idle"], available)
+        max_size.add_metric(["async"], stats.get("pool_max", 0))
+        waiting.add_metric(["async"], stats.get("requests_waiting", 0))
+        timeouts.add_metric(["async"], stats.get("requests_errors", 0))
+
+        yield from (connections, max_size, waiting, timeouts)
+
+    def _response_cache(self):
+        cache = get_response_cache()
+        if cache is None:
+            return
+
+        stats = cache.stats()
+        requests = CounterMetricFamily(
+            "vectorengine_response_cache_requests",
+            "LLM response cache lookups, by result.",
+            labels=["result"],
+        )
+        requests.add_metric(["exact_hit"], stats["exact_hits"])
+        requests.add_metric(["semantic_hit"], stats["semantic_hits"])
+        requests.add_metric(["miss"], stats["misses"])
+        yield requests
+        yield GaugeMetricFamily(
+            "vectorengine_response_cache_entries", "Cached LLM responses.", value=stats["size"]
+        )
+
+    def _embeddings(self):
+        if settings.EMBEDDING_CACHE_ENABLED:
+            stats = get_embedding_cache().stats()
+            requests = CounterMetricFamily(
+                "vectorengine_embedding_cache_requests",
+                "Embedding cache lookups, by result.",
+                labels=["result"],
+            )
+            requests.add_metric(["hit"], stats["hits"])
+            requests.add_metric(["disk_hit"], stats["disk_hits"])
+            requests.add_metric(["miss"], stats["misses"])
+            yield requests
+            yield GaugeMetricFamily(
+                "vectorengine_embedding_cache_entries",
+                "Embeddings held in memory.",
+                value=stats["size"],
+            )
+
+        if not settings.EMBEDDING_BATCHING_ENABLED:
+            return
+
+        queued = GaugeMetricFamily(
+            "vectorengine_embedding_batch_queue",
+            "Texts waiting for the embedding batcher.",
+            labels=["model"],
+        )
+        for model_name in settings.embedding_models:
+            service = embedding_service_for(model_name)
+            scheduler = getattr(getattr(service, "provider", service), "scheduler", None)
+            if scheduler is not None:
+                queued.add_metric([model_name], scheduler.stats()["queued"])
+        yield queued
+
+    def _llm(self):
+        llm = get_llm_adapter()
+        if not hasattr(llm, "stats"):
+            return
+
+        stats = llm.stats()
+        provider = llm.provider_name
+        state = GaugeMetricFamily(
+            "vectorengine_llm_circuit_state",
+            "1 for the current circuit breaker state of the provider.",
+            labels=["provider", "state"],
+        )
+        for name in CIRCUIT_STATES:
+            state.add_metric([provider, name], 1 if stats["state"] == name else 0)
+        yield state
+
+        calls = GaugeMetricFamily(
+            "vectorengine_llm_calls", "Provider calls, by state.", labels=["provider", "state"]
+        )
+        calls.add_metric([provider, "in_flight"], stats["in_flight"])
+        calls.add_metric([provider, "queued"], stats["queued"])
+        yield calls
+
+
+REGISTRY.register(ComponentStatsCollector())
+
+
+@router.get("/metrics", tags=["Health"], include_in_schema=False)
+def metrics():
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
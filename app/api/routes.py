@@ -1,62 +1,216 @@
+import codecs
+import json
 import logging
 import time
-from fastapi import APIRouter, Depends, Request
+from contextlib import aclosing
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 
 from app.api.schemas import (
+    BulkDocumentRequest,
+    BulkDocumentResponse,
+    BulkDocumentResult,
+    FinancialBatchItem,
+    FinancialBatchRequest,
+    FinancialBatchResponse,
+    FinancialJobRequest,
+    FinancialJobResponse,
     FinancialRequest,
     FinancialResponse,
     DocumentRequest,
+    DocumentResponse,
+    QueryBatchRequest,
+    QueryBatchResponse,
+    QueryBatchResult,
     QueryRequest,
     QueryResponse,
     QueryResult,
 )
 
 from app.api.dependencies import (
+    get_batch_jobs,
+    get_batch_limiter,
+    get_bulk_ingest_use_case,
+    get_collection,
     get_financial_engine,
     get_ingest_use_case,
     get_query_use_case,
+    hybrid_search_params,
 )
 
 from app.application.agents.financial_decision_engine import FinancialDecisionEngine
+from app.application.batch_jobs import BatchJob, BatchJobRegistry
 from app.application.use_cases import (
+    BulkIngestTextUseCase,
     IngestTextUseCase,
     QuerySimilarTextUseCase,
 )
+from app.config import settings
+from app.core.limits import CallLimiter
+from app.infrastructure.vector_store.collections import Collection
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
-@router.post("/documents")
-def ingest_document(
+@router.post("/documents", response_model=DocumentResponse)
+async def ingest_document(
     request: DocumentRequest,
     http_request: Request,
+    collection: Collection = Depends(get_collection),
     use_case: IngestTextUseCase = Depends(get_ingest_use_case),
 ):
     request_id = http_request.state.request_id
-    logger.info("document_ingest_started request_id=%s", request_id)
+    logger.info("document_ingest_started request_id=%s collection=%s", request_id, collection.name)
+
+    result = await use_case.aexecute(request.content, request.metadata)
+
+    logger.info(
+        "document_ingest_completed request_id=%s document_id=%s chunks=%d",
+        request_id,
+        result["document_id"],
+        result["chunks"],
+    )
+    return DocumentResponse(status="indexed", **result)
+
+
+async def _body_text(http_request: Request) -> AsyncIterator[str]:
+    # Incremental decoding: a multi-byte character may straddle two body chunks
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    async for data in http_request.stream():
+        text = decoder.decode(data)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+@router.post(
+    "/documents/stream",
+    response_model=DocumentResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"text/plain": {"schema": {"type": "string"}}},
+        }
+    },
+)
+async def ingest_document_stream(
+    http_request: Request,
+    metadata: Optional[str] = Query(None, description="Document metadata as a JSON object."),
+    collection: Collection = Depends(get_collection),
+    use_case: IngestTextUseCase = Depends(get_ingest_use_case),
+):
+    """
+    Ingest a large UTF-8 text body as one chunked document. The body is read
+    incrementally and chunked, embedded and inserted in bounded batches.
+    """
+    if use_case.chunker is None:
+        raise HTTPException(status_code=400, detail="Streaming ingestion requires chunking to be enabled.")
+
+    try:
+        document_metadata = json.loads(metadata) if metadata else {}
+    except ValueError:
+        document_metadata = None
+    if not isinstance(document_metadata, dict):
+        raise HTTPException(status_code=400, detail="metadata must be a JSON object.")
+
+    request_id = http_request.state.request_id
+    logger.info(
+        "document_stream_ingest_started request_id=%s collection=%s", request_id, collection.name
+    )
+
+    result = await use_case.aexecute_stream(_body_text(http_request), document_metadata)
+    if not result["chunks"]:
+        raise HTTPException(status_code=400, detail="Empty document.")
+
+    logger.info(
+        "document_stream_ingest_completed request_id=%s document_id=%s chunks=%d",
+        request_id,
+        result["document_id"],
+        result["chunks"],
+    )
+    return DocumentResponse(status="indexed", **result)
+
+
+@router.post("/documents/bulk", response_model=BulkDocumentResponse)
+async def ingest_documents_bulk(
+    request: BulkDocumentRequest,
+    http_request: Request,
+    collection: Collection = Depends(get_collection),
+    use_case: BulkIngestTextUseCase = Depends(get_bulk_ingest_use_case),
+):
+    request_id = http_request.state.request_id
+    logger.info(
+        "bulk_ingest_started request_id=%s collection=%s documents=%d",
+        request_id,
+        collection.name,
+        len(request.documents),
+    )
+
+    result = await use_case.aexecute(
+        [d.content for d in request.documents],
+        [d.metadata for d in request.documents],
+    )
 
-    use_case.execute(request.content)
+    logger.info(
+        "bulk_ingest_completed request_id=%s indexed=%d failed=%d duration_s=%.3f docs_per_sec=%.1f",
+        request_id,
+        result["indexed"],
+        result["failed"],
+        result["duration_s"],
+        result["docs_per_sec"],
+    )
 
-    logger.info("document_ingest_completed request_id=%s", request_id)
-    return {"status": "indexed"}
+    return BulkDocumentResponse(
+        indexed=result["indexed"],
+        failed=result["failed"],
+        duration_s=result["duration_s"],
+        docs_per_sec=result["docs_per_sec"],
+        items=[BulkDocumentResult(**item) for item in result["items"]],
+    )
 
 
 @router.post("/query", response_model=QueryResponse)
-def query_similar(
+async def query_similar(
     request: QueryRequest,
     http_request: Request,
+    collection: Collection = Depends(get_collection),
     use_case: QuerySimilarTextUseCase = Depends(get_query_use_case),
 ):
     request_id = http_request.state.request_id
 
+    hybrid = (
+        hybrid_search_params(request.candidates, request.semantic_weight, request.lexical_weight)
+        if request.mode == "hybrid"
+        else None
+    )
+
     logger.info(
-        "query_received request_id=%s top_k=%d",
+        "query_received request_id=%s collection=%s top_k=%d mode=%s probes=%s ef_search=%s filtered=%s",
         request_id,
+        collection.name,
         request.top_k,
+        request.mode,
+        request.probes,
+        request.ef_search,
+        bool(request.filter),
     )
 
-    results = use_case.execute(request.query, request.top_k)
+    try:
+        results = await use_case.aexecute(
+            request.query,
+            request.top_k,
+            probes=request.probes,
+            ef_search=request.ef_search,
+            hybrid=hybrid,
+            metadata_filter=request.filter,
+        )
+    except NotImplementedError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
 
     logger.info(
         "query_completed request_id=%s results=%d",
@@ -64,20 +218,84 @@ def query_similar(
         len(results),
     )
 
-    return QueryResponse(
+    return QueryResponse(results=[_query_result(r) for r in results])
+
+
+@router.post("/query/batch", response_model=QueryBatchResponse)
+async def query_similar_batch(
+    request: QueryBatchRequest,
+    http_request: Request,
+    collection: Collection = Depends(get_collection),
+    use_case: QuerySimilarTextUseCase = Depends(get_query_use_case),
+):
+    """
+    /query for many queries at once. The queries are embedded in one batch
+    and, in vector mode, searched with a single SQL statement that still
+    uses the ANN index. Hybrid mode runs one hybrid search per query.
+    """
+    request_id = http_request.state.request_id
+
+    hybrid = (
+        hybrid_search_params(request.candidates, request.semantic_weight, request.lexical_weight)
+        if request.mode == "hybrid"
+        else None
+    )
+
+    logger.info(
+        "query_batch_received request_id=%s collection=%s queries=%d top_k=%d mode=%s "
+        "probes=%s ef_search=%s filtered=%s",
+        request_id,
+        collection.name,
+        len(request.queries),
+        request.top_k,
+        request.mode,
+        request.probes,
+        request.ef_search,
+        bool(request.filter),
+    )
+
+    try:
+        grouped = await use_case.aexecute_many(
+            request.queries,
+            request.top_k,
+            probes=request.probes,
+            ef_search=request.ef_search,
+            hybrid=hybrid,
+            metadata_filter=request.filter,
+        )
+    except NotImplementedError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    logger.info(
+        "query_batch_completed request_id=%s queries=%d results=%d",
+        request_id,
+        len(grouped),
+        sum(len(results) for results in grouped),
+    )
+
+    return QueryBatchResponse(
         results=[
-            QueryResult(
-                id=r["id"],
-                content=r["content"],
-                score=r["score"],
-            )
-            for r in results
+            QueryBatchResult(query=query, results=[_query_result(r) for r in results])
+            for query, results in zip(request.queries, grouped)
         ]
     )
 
 
+def _query_result(r: dict) -> QueryResult:
+    return QueryResult(
+        id=r["id"],
+        document_id=r.get("document_id"),
+        chunk_index=r.get("chunk_index", 0),
+        content=r["content"],
+        metadata=r.get("metadata") or {},
+        score=r["score"],
+        semantic_rank=r.get("semantic_rank"),
+        lexical_rank=r.get("lexical_rank"),
+    )
+
+
 @router.get("/health", tags=["Health"])
-def health(http_request: Request):
+async def health(http_request: Request):
     request_id = http_request.state.request_id
     logger.info("health_check request_id=%s", request_id)
 
@@ -88,7 +306,7 @@ def health(http_request: Request):
 
 
 @router.post("/financial/analyze", response_model=FinancialResponse)
-def analyze_financial(
+async def analyze_financial(
     request: FinancialRequest,
     http_request: Request,
     engine: FinancialDecisionEngine = Depends(get_financial_engine),
@@ -102,7 +320,7 @@ def analyze_financial(
     )
 
     try:
-        result = engine.analyze(request.document)
+        result = await engine.aanalyze(request.document)
         return result
 
     finally:
@@ -113,3 +331,172 @@ def analyze_financial(
             request_id,
             duration,
         )
+
+
+def _batch_items(job: BatchJob) -> list:
+    return [FinancialBatchItem(**item) for item in job.items if item is not None]
+
+
+@router.post("/financial/analyze/batch", response_model=FinancialBatchResponse)
+async def analyze_financial_batch(
+    request: FinancialBatchRequest,
+    http_request: Request,
+    engine: FinancialDecisionEngine = Depends(get_financial_engine),
+    limiter: CallLimiter = Depends(get_batch_limiter),
+):
+    """
+    /financial/analyze for many documents in one request. Documents are
+    embedded and retrieved in batches and their LLM calls run concurrently,
+    within the worker-wide FINANCIAL_BATCH_CONCURRENCY. A document that
+    fails gets an error item instead of failing the batch.
+    """
+    request_id = http_request.state.request_id
+    logger.info(
+        "financial_batch_started request_id=%s documents=%d",
+        request_id,
+        len(request.documents),
+    )
+
+    job = BatchJob(len(request.documents), job_id=request_id)
+    await job.run(engine.aanalyze_many(request.documents, limiter, settings.FINANCIAL_BATCH_SIZE))
+
+    logger.info(
+        "financial_batch_completed request_id=%s status=%s succeeded=%d failed=%d duration_s=%.3f",
+        request_id,
+        job.status,
+        job.succeeded,
+        job.failed,
+        job.duration_s,
+    )
+    if job.status != "completed":
+        raise HTTPException(status_code=500, detail="Financial batch analysis failed.")
+
+    return FinancialBatchResponse(
+        succeeded=job.succeeded,
+        failed=job.failed,
+        duration_s=round(job.duration_s, 3),
+        items=_batch_items(job),
+    )
+
+
+@router.post("/financial/analyze/jobs", response_model=FinancialJobResponse, status_code=202)
+async def submit_financial_job(
+    request: FinancialJobRequest,
+    http_request: Request,
+    engine: FinancialDecisionEngine = Depends(get_financial_engine),
+    limiter: CallLimiter = Depends(get_batch_limiter),
+    jobs: BatchJobRegistry = Depends(get_batch_jobs),
+):
+    """
+    /financial/analyze/batch as a background job, for more documents than
+    a request should wait for. Poll GET /financial/analyze/jobs/{job_id}.
+    Jobs run in, and are only visible to, the worker that accepted them.
+    """
+    job = jobs.submit(
+        len(request.documents),
+        engine.aanalyze_many(request.documents, limiter, settings.FINANCIAL_BATCH_SIZE),
+    )
+    logger.info(
+        "financial_job_submitted request_id=%s job_id=%s documents=%d",
+        http_request.state.request_id,
+        job.id,
+        job.total,
+    )
+    return _job_response(job)
+
+
+@router.get("/financial/analyze/jobs/{job_id}", response_model=FinancialJobResponse)
+async def get_financial_job(
+    job_id: str,
+    jobs: BatchJobRegistry = Depends(get_batch_jobs),
+):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return _job_response(job)
+
+
+def _job_response(job: BatchJob) -> FinancialJobResponse:
+    return FinancialJobResponse(
+        job_id=job.id,
+        status=job.status,
+        total=job.total,
+        succeeded=job.succeeded,
+        failed=job.failed,
+        duration_s=round(job.duration_s, 3),
+        error=job.error,
+        items=_batch_items(job) if job.finished else None,
+    )
+
+
+def _sse(event: str, data) -> str:
+    # json.dumps escapes newlines, so each event is one "data:" line
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _analysis_events(
+    engine: FinancialDecisionEngine, document: str, request_id: str
+) -> AsyncIterator[str]:
+    start = time.perf_counter()
+    first_token_s: Optional[float] = None
+    # Stays "aborted" when the client disconnects mid-stream
+    outcome = "aborted"
+
+    try:
+        async with aclosing(engine.astream_analyze(document)) as events:
+            async for event, data in events:
+                if event == "token" and first_token_s is None:
+                    first_token_s = time.perf_counter() - start
+                if event == "result":
+                    # Same shape as the /financial/analyze response
+                    data = FinancialResponse(**data).model_dump()
+                yield _sse(event, data)
+        outcome = "completed"
+
+    except ValueError as exc:
+        # Invalid model output, including pydantic validation errors
+        outcome = "invalid"
+        logger.warning("financial_stream_invalid request_id=%s error=%s", request_id, exc)
+        yield _sse("error", {"detail": str(exc)})
+
+    except Exception:
+        outcome = "failed"
+        logger.error("financial_stream_failed request_id=%s", request_id, exc_info=True)
+        yield _sse("error", {"detail": "Financial analysis failed."})
+
+    finally:
+        logger.info(
+            "financial_stream_finished request_id=%s outcome=%s first_token_s=%s duration_s=%.3f",
+            request_id,
+            outcome,
+            None if first_token_s is None else round(first_token_s, 3),
+            time.perf_counter() - start,
+        )
+
+
+@router.post(
+    "/financial/analyze/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {"schema": {"type": "string"}}}}},
+)
+async def analyze_financial_stream(
+    request: FinancialRequest,
+    http_request: Request,
+    engine: FinancialDecisionEngine = Depends(get_financial_engine),
+):
+    """
+    /financial/analyze as Server-Sent Events. "token" events carry the
+    completion as it is generated and "field" events each top-level field
+    once it is complete and type-checked. The stream ends with a "result"
+    event holding the analysis, or an "error" event as soon as the output
+    can no longer be valid.
+    """
+    request_id = http_request.state.request_id
+    logger.info("financial_stream_started request_id=%s", request_id)
+
+    return StreamingResponse(
+        _analysis_events(engine, request.document, request_id),
+        media_type="text/event-stream",
+        # Proxies must not buffer the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
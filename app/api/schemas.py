@@ -1,22 +1,114 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field, field_validator
+from typing import Any, Dict, List, Literal, Optional
 from uuid import UUID
 
+from app.config import settings
+from app.domain.filters import validate_filter
+
 class DocumentRequest(BaseModel):
     content: str
+    metadata: Dict[str, Any] = Field(
+        default_factory=dict,
+        description="Stored with every chunk of the document and usable in query filters.",
+    )
 
-class QueryRequest(BaseModel):
-    query: str
+class BulkDocumentRequest(BaseModel):
+    documents: List[DocumentRequest] = Field(
+        ..., min_length=1, max_length=settings.BULK_MAX_DOCUMENTS
+    )
+
+class DocumentResponse(BaseModel):
+    status: str
+    document_id: UUID
+    chunks: int
+
+class BulkDocumentResult(BaseModel):
+    index: int
+    id: Optional[UUID] = Field(None, description="Document id shared by the stored chunks.")
+    chunks: int = 0
+    error: Optional[str] = None
+
+class BulkDocumentResponse(BaseModel):
+    indexed: int
+    failed: int
+    duration_s: float
+    docs_per_sec: float
+    items: List[BulkDocumentResult]
+
+class SearchOptions(BaseModel):
     top_k: int = 5
+    probes: Optional[int] = Field(
+        None,
+        ge=1,
+        description="ivfflat lists scanned for this query. Higher improves recall at the cost of latency.",
+    )
+    ef_search: Optional[int] = Field(
+        None,
+        ge=1,
+        le=1000,
+        description="hnsw candidate list size for this query. Should be >= top_k.",
+    )
+    mode: Literal["vector", "hybrid"] = Field(
+        "vector",
+        description="hybrid fuses vector and full-text retrieval, for exact tickers, codes and IDs.",
+    )
+    candidates: Optional[int] = Field(
+        None,
+        ge=1,
+        le=1000,
+        description="hybrid: candidates per retrieval leg before fusion. Defaults to HYBRID_CANDIDATES.",
+    )
+    semantic_weight: Optional[float] = Field(None, ge=0, description="hybrid: weight of the vector ranking.")
+    lexical_weight: Optional[float] = Field(None, ge=0, description="hybrid: weight of the full-text ranking.")
+    filter: Optional[Dict[str, Any]] = Field(
+        None,
+        description=(
+            "Metadata filter applied before ranking. {\"client\": \"acme\"} matches equal values; "
+            "operator objects support eq, ne, in, gt, gte, lt and lte, e.g. "
+            "{\"period\": {\"gte\": \"2024-01\"}, \"doc_type\": {\"in\": [\"10-K\", \"10-Q\"]}}."
+        ),
+    )
+
+    @field_validator("filter")
+    @classmethod
+    def _validate_filter(cls, value):
+        return validate_filter(value) if value is not None else None
+
+class QueryRequest(SearchOptions):
+    query: str
+
+class QueryBatchRequest(SearchOptions):
+    queries: List[str] = Field(
+        ..., min_length=1, max_length=settings.QUERY_BATCH_MAX_QUERIES
+    )
 
 class QueryResult(BaseModel):
     id: UUID
+    document_id: Optional[UUID] = None
+    chunk_index: int = 0
     content: str
-    score: float
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+    score: float = Field(
+        ...,
+        description=(
+            "Similarity, higher is more similar. cosine: cosine similarity in [-1, 1]; "
+            "l2: 1 / (1 + euclidean distance) in (0, 1]; inner_product: dot product. "
+            "hybrid mode: the fused reciprocal rank fusion score."
+        ),
+    )
+    semantic_rank: Optional[int] = None
+    lexical_rank: Optional[int] = None
 
 class QueryResponse(BaseModel):
     results: List[QueryResult]
 
+class QueryBatchResult(BaseModel):
+    query: str
+    results: List[QueryResult]
+
+class QueryBatchResponse(BaseModel):
+    results: List[QueryBatchResult] = Field(..., description="One entry per query, in request order.")
+
 class FinancialRequest(BaseModel):
     document: str
 
@@ -25,3 +117,81 @@ class FinancialResponse(BaseModel):
     decision: str
     key_risks: List[str]
     summary: str
+
+class FinancialBatchRequest(BaseModel):
+    documents: List[str] = Field(
+        ..., min_length=1, max_length=settings.FINANCIAL_BATCH_MAX_DOCUMENTS
+    )
+
+class FinancialJobRequest(BaseModel):
+    documents: List[str] = Field(
+        ..., min_length=1, max_length=settings.FINANCIAL_JOB_MAX_DOCUMENTS
+    )
+
+class FinancialBatchItem(BaseModel):
+    index: int
+    result: Optional[FinancialResponse] = None
+    error: Optional[str] = None
+
+class FinancialBatchResponse(BaseModel):
+    succeeded: int
+    failed: int
+    duration_s: float
+    items: List[FinancialBatchItem]
+
+class FinancialJobResponse(BaseModel):
+    job_id: str
+    status: Literal["queued", "running", "completed", "failed", "cancelled"]
+    total: int
+    succeeded: int
+    failed: int
+    duration_s: float
+    error: Optional[str] = None
+    items: Optional[List[FinancialBatchItem]] = Field(
+        None, description="Set once the job has finished."
+    )
+
+class IndexBuildRequest(BaseModel):
+    index_type: Optional[Literal["ivfflat", "hnsw"]] = None
+    lists: Optional[int] = Field(
+        None, ge=1, description="ivfflat lists. Defaults to a value sized from the row count."
+    )
+    m: Optional[int] = Field(None, ge=2, le=100)
+    ef_construction: Optional[int] = Field(None, ge=4, le=1000)
+
+class CollectionCreateRequest(BaseModel):
+    name: str = Field(
+        ...,
+        pattern=r"^[a-z][a-z0-9_]{0,31}$",
+        description="Lowercase letters, digits and underscores; used in /documents and /query as ?collection=.",
+    )
+    embedding_model: Optional[str] = Field(
+        None,
+        description="One of EMBEDDING_MODEL or EMBEDDING_PRELOAD_MODELS. Defaults to EMBEDDING_MODEL.",
+    )
+    dimension: Optional[int] = Field(
+        None, ge=1, description="Must match the embedding model when given; derived from it otherwise."
+    )
+    metric: Literal["cosine", "l2", "inner_product"] = "cosine"
+    index_type: Literal["ivfflat", "hnsw"] = Field(
+        "hnsw",
+        description="hnsw suits collections filled incrementally; ivfflat needs a rebuild once loaded.",
+    )
+    lists: Optional[int] = Field(None, ge=1, description="ivfflat lists.")
+    m: Optional[int] = Field(None, ge=2, le=100)
+    ef_construction: Optional[int] = Field(None, ge=4, le=1000)
+    quantization: Literal["none", "halfvec", "binary"] = Field(
+        "none",
+        description="What the ANN index stores; candidates are rescored at full precision. pgvector >= 0.7.",
+    )
+
+class CollectionResponse(BaseModel):
+    name: str
+    table: str
+    embedding_model: str
+    dimension: Optional[int] = None
+    metric: str
+    index_type: str
+    index_params: Dict[str, Any] = Field(default_factory=dict)
+    quantization: str = "none"
+    created_at: Optional[str] = None
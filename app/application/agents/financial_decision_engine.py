@@ -1,15 +1,19 @@
 import json
+from contextlib import aclosing, closing
+from typing import Any, AsyncIterator, Iterator, Sequence, Tuple, Union
 
-class FinancialDecisionEngine:
-    def __init__(self, orchestrator):
-        self.orchestrator = orchestrator
+from app.core.json_stream import JsonObjectStream
 
-    def analyze(self, document: str) -> dict:
-        system_prompt = (
-            "You are a financial decision intelligence system operating "
-            "inside public infrastructure. Provide structured risk analysis."
-        )
-        user_template = """
+# Streaming events: ("token", {"text"}), ("field", {"name", "value"}) for each
+# top-level field once complete and checked, then one ("result", analysis)
+Event = Tuple[str, Any]
+
+class FinancialDecisionEngine:
+    SYSTEM_PROMPT = (
+        "You are a financial decision intelligence system operating "
+        "inside public infrastructure. Provide structured risk analysis."
+    )
+    USER_TEMPLATE = """
         Context:
         {context}
         Document:
@@ -22,20 +26,127 @@ class FinancialDecisionEngine:
             "summary": string
         }}
         """
-        response_format = (
-            {"type": "json_object"}
-            if getattr(self.orchestrator.llm, "supports_response_format", False)
-            else None
+
+    # Type checks applied to each field as soon as it has been streamed
+    FIELD_CHECKS = {
+        "risk_score": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+        "decision": lambda v: isinstance(v, str),
+        "key_risks": lambda v: isinstance(v, list) and all(isinstance(r, str) for r in v),
+        "summary": lambda v: isinstance(v, str),
+    }
+
+    def __init__(self, orchestrator):
+        self.orchestrator = orchestrator
+
+    def analyze(self, document: str) -> dict:
+        raw_response = self.orchestrator.execute(**self._request(document))
+
+        return self._parse(raw_response)
+
+    async def aanalyze(self, document: str) -> dict:
+        raw_response = await self.orchestrator.aexecute(**self._request(document))
+
+        return self._parse(raw_response)
+
+    def stream_analyze(self, document: str) -> Iterator[Event]:
+        """
+        analyze() as a stream of events. Raises ValueError as soon as the
+        output can no longer be a valid analysis.
+        """
+        parser = JsonObjectStream()
+        with closing(self.orchestrator.execute_stream(**self._request(document))) as tokens:
+            for token in tokens:
+                members = self._feed(parser, token)
+                yield "token", {"text": token}
+                for name, value in members:
+                    yield "field", {"name": name, "value": value}
+
+        yield "result", self._close(parser)
+
+    async def astream_analyze(self, document: str) -> AsyncIterator[Event]:
+        parser = JsonObjectStream()
+        async with aclosing(self.orchestrator.aexecute_stream(**self._request(document))) as tokens:
+            async for token in tokens:
+                members = self._feed(parser, token)
+                yield "token", {"text": token}
+                for name, value in members:
+                    yield "field", {"name": name, "value": value}
+
+        yield "result", self._close(parser)
+
+    async def aanalyze_many(
+        self, documents: Sequence[str], limiter=None, batch_size: int = 64
+    ) -> AsyncIterator[Tuple[int, Union[dict, Exception]]]:
+        """
+        aanalyze() for many documents, yielding (index, analysis) in
+        completion order, or (index, exception) for a document that failed.
+        Each analysis is checked like a streamed one. See
+        RAGOrchestrator.aexecute_many for batching and the limiter.
+        """
+        answers = self.orchestrator.aexecute_many(
+            documents, limiter=limiter, batch_size=batch_size, **self._options()
         )
+        async with aclosing(answers):
+            async for index, answer in answers:
+                if not isinstance(answer, Exception):
+                    try:
+                        answer = self._check(self._parse(answer))
+                    except ValueError as e:
+                        answer = e
+                yield index, answer
 
-        raw_response = self.orchestrator.execute(
-            query=document,
-            system_prompt=system_prompt,
-            user_instruction_template=user_template,
-            response_format=response_format,
+    def _request(self, document: str) -> dict:
+        return dict(query=document, **self._options())
+
+    def _options(self) -> dict:
+        return dict(
+            system_prompt=self.SYSTEM_PROMPT,
+            user_instruction_template=self.USER_TEMPLATE,
+            response_format=self._response_format(),
             temperature=0.1,
         )
 
+    def _feed(self, parser: JsonObjectStream, token: str):
+        try:
+            members = parser.feed(token)
+        except ValueError as e:
+            raise ValueError(f"LLM returned invalid JSON: {e}")
+
+        for name, value in members:
+            check = self.FIELD_CHECKS.get(name)
+            if check is not None and not check(value):
+                raise ValueError(f"LLM returned an invalid {name}: {value!r}")
+        return members
+
+    def _close(self, parser: JsonObjectStream) -> dict:
+        try:
+            analysis = parser.close()
+        except ValueError as e:
+            raise ValueError(f"LLM returned invalid JSON: {e}")
+
+        return self._check(analysis)
+
+    def _check(self, analysis) -> dict:
+        if not isinstance(analysis, dict):
+            raise ValueError("LLM response is not a JSON object")
+
+        missing = [name for name in self.FIELD_CHECKS if name not in analysis]
+        if missing:
+            raise ValueError(f"LLM response is missing {', '.join(missing)}")
+
+        for name, check in self.FIELD_CHECKS.items():
+            if not check(analysis[name]):
+                raise ValueError(f"LLM returned an invalid {name}: {analysis[name]!r}")
+        return analysis
+
+    def _response_format(self):
+        return (
+            {"type": "json_object"}
+            if getattr(self.orchestrator.llm, "supports_response_format", False)
+            else None
+        )
+
+    def _parse(self, raw_response: str) -> dict:
         try:
             return json.loads(raw_response)
         except json.JSONDecodeError as e:
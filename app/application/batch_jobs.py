@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import time
+import uuid
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class BatchJob:
+    """
+    Progress and per-item outcomes of one batch run. Items are recorded as
+    they finish, in any order; a failed item keeps its error and never
+    fails the job. Only an error outside the items (or cancellation) does.
+    """
+
+    def __init__(self, total: int, job_id: Optional[str] = None):
+        self.id = job_id or str(uuid.uuid4())
+        self.total = total
+        self.status = "queued"  # queued | running | completed | failed | cancelled
+        self.succeeded = 0
+        self.failed = 0
+        self.error: Optional[str] = None
+        self.items: List[Optional[dict]] = [None] * total
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._start: Optional[float] = None
+        self._end: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    @property
+    def duration_s(self) -> float:
+        if self._start is None:
+            return 0.0
+        return (self._end or time.perf_counter()) - self._start
+
+    def record(self, index: int, outcome: Any) -> None:
+        if isinstance(outcome, Exception):
+            self.failed += 1
+            error = str(outcome) or type(outcome).__name__
+            self.items[index] = {"index": index, "result": None, "error": error}
+        else:
+            self.succeeded += 1
+            self.items[index] = {"index": index, "result": outcome, "error": None}
+
+    async def run(self, outcomes: AsyncIterator[Tuple[int, Any]]) -> None:
+        """Consume (index, result or exception) pairs until the run ends."""
+        self.status = "running"
+        self._start = time.perf_counter()
+
+        try:
+            async with aclosing(outcomes):
+                async for index, outcome in outcomes:
+                    self.record(index, outcome)
+            self.status = "completed"
+
+        except asyncio.CancelledError:
+            self.status = "cancelled"
+            raise
+
+        except Exception as exc:
+            self.status = "failed"
+            self.error = str(exc)
+            logger.error("batch_job_failed job_id=%s", self.id, exc_info=True)
+
+        finally:
+            self._end = time.perf_counter()
+            self.finished_at = time.time()
+            logger.info(
+                "batch_job_finished job_id=%s status=%s total=%d succeeded=%d failed=%d duration_s=%.3f",
+                self.id,
+                self.status,
+                self.total,
+                self.succeeded,
+                self.failed,
+                self.duration_s,
+            )
+
+
+class BatchJobRegistry:
+    """
+    Background batch jobs of this worker process, pollable by id until
+    ttl_s after they finish. Jobs live in memory: they are lost on restart
+    and only visible to the worker that runs them.
+    """
+
+    def __init__(self, ttl_s: float = 3600.0):
+        self.ttl_s = ttl_s
+        self._jobs: Dict[str, BatchJob] = {}
+        # The event loop only keeps weak references to tasks
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def submit(self, total: int, outcomes: AsyncIterator[Tuple[int, Any]]) -> BatchJob:
+        self._prune()
+
+        job = BatchJob(total)
+        self._jobs[job.id] = job
+        task = asyncio.get_running_loop().create_task(job.run(outcomes))
+        self._tasks[job.id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.id, None))
+
+        logger.info("batch_job_submitted job_id=%s total=%d", job.id, total)
+        return job
+
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        self._prune()
+        return self._jobs.get(job_id)
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.ttl_s
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -0,0 +1,152 @@
+import re
+from typing import Callable, FrozenSet, List, Optional, Sequence
+
+TokenCounter = Callable[[Sequence[str]], List[int]]
+
+_WORD = re.compile(r"\w+")
+_SHINGLE_SIZE = 3
+
+
+class Context:
+    def __init__(
+        self,
+        text: str,
+        tokens: int,
+        chunks: int,
+        duplicates: int = 0,
+        over_budget: int = 0,
+        truncated: bool = False,
+    ):
+        self.text = text
+        self.tokens = tokens
+        self.chunks = chunks
+        self.duplicates = duplicates
+        self.over_budget = over_budget
+        self.truncated = truncated
+
+
+class ContextBuilder:
+    """
+    Packs retrieved chunks into the prompt context, in the order given
+    (best first), within max_tokens of the target model's tokenizer.
+
+    A chunk whose word shingles overlap an already packed chunk by at least
+    duplicate_threshold (Jaccard) adds nothing and is dropped. Chunks that
+    do not fit the remaining budget are skipped, so a smaller, lower-ranked
+    chunk may still be packed. When no chunk fits on its own, the best one
+    that keeps at least one word is truncated to fit instead of sending no
+    context at all.
+    """
+
+    def __init__(
+        self,
+        count_tokens: TokenCounter,
+        max_tokens: Optional[int] = None,
+        duplicate_threshold: Optional[float] = None,
+        separator: str = "\n\n",
+    ):
+        if max_tokens is not None and max_tokens < 1:
+            raise ValueError("max_tokens must be >= 1.")
+        if duplicate_threshold is not None and not 0.0 < duplicate_threshold <= 1.0:
+            raise ValueError("duplicate_threshold must be in (0, 1].")
+
+        self.count_tokens = count_tokens
+        self.max_tokens = max_tokens
+        self.duplicate_threshold = duplicate_threshold
+        self.separator = separator
+
+    def build(self, results) -> Context:
+        contents = [r["content"] for r in results if r.get("content")]
+        if not contents:
+            return Context("", 0, 0)
+
+        contents, duplicates = self._deduplicate(contents)
+        counts = self.count_tokens(contents)
+
+        if self.max_tokens is None:
+            text = self.separator.join(contents)
+            separators = self._separator_tokens() * (len(contents) - 1)
+            return Context(text, sum(counts) + separators, len(contents), duplicates)
+
+        packed: List[str] = []
+        used = 0
+        for content, tokens in zip(contents, counts):
+            cost = tokens + (self._separator_tokens() if packed else 0)
+            if used + cost > self.max_tokens:
+                continue
+            packed.append(content)
+            used += cost
+
+        if packed:
+            return Context(
+                self.separator.join(packed),
+                used,
+                len(packed),
+                duplicates,
+                over_budget=len(contents) - len(packed),
+            )
+
+        # A chunk whose first word alone exceeds the budget truncates to
+        # nothing; fall through to the next one rather than pack it empty
+        for content in contents:
+            text = self._truncate(content)
+            if text:
+                return Context(
+                    text,
+                    self.count_tokens([text])[0],
+                    1,
+                    duplicates,
+                    over_budget=len(contents) - 1,
+                    truncated=True,
+                )
+
+        return Context("", 0, 0, duplicates, over_budget=len(contents))
+
+    # -----------------------------
+    # Helpers
+    # -----------------------------
+
+    def _deduplicate(self, contents: List[str]):
+        if self.duplicate_threshold is None:
+            return contents, 0
+
+        kept: List[str] = []
+        kept_shingles: List[FrozenSet] = []
+        for content in contents:
+            shingles = _shingles(content)
+            if any(_jaccard(shingles, other) >= self.duplicate_threshold for other in kept_shingles):
+                continue
+            kept.append(content)
+            kept_shingles.append(shingles)
+
+        return kept, len(contents) - len(kept)
+
+    def _separator_tokens(self) -> int:
+        return self.count_tokens([self.separator])[0]
+
+    def _truncate(self, content: str) -> str:
+        """Longest word prefix within max_tokens (binary search on the word count)."""
+        words = content.split()
+        low, high = 0, len(words)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.count_tokens([" ".join(words[:middle])])[0] <= self.max_tokens:
+                low = middle
+            else:
+                high = middle - 1
+        return " ".join(words[:low])
+
+
+def _shingles(text: str) -> FrozenSet:
+    words = _WORD.findall(text.lower())
+    if len(words) < _SHINGLE_SIZE:
+        return frozenset([tuple(words)])
+    return frozenset(
+        tuple(words[i:i + _SHINGLE_SIZE]) for i in range(len(words) - _SHINGLE_SIZE + 1)
+    )
+
+
+def _jaccard(a: FrozenSet, b: FrozenSet) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
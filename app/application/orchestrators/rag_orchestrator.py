@@ -1,16 +1,82 @@
+import asyncio
+import hashlib
+import json
 import logging
 import time
-from typing import Optional
+from contextlib import nullcontext
+from functools import partial
+from typing import AsyncIterator, Iterator, List, Optional, Sequence, Tuple, Union
+
+from app.application.orchestrators.context_builder import Context, ContextBuilder
+from app.core.limits import gather_limited
+from app.core.metrics import (
+    CONTEXT_SECONDS,
+    EMBED_SECONDS,
+    LLM_FALLBACKS,
+    LLM_FIRST_TOKEN_SECONDS,
+    LLM_SECONDS,
+    RERANK_SECONDS,
+    RERANKS,
+    search_stage,
+)
+from app.domain.services import ProviderUnavailable
 
 logger = logging.getLogger(__name__)
 
 
 class RAGOrchestrator:
-    def __init__(self, repository, embedding_service, llm, fallback_llm=None):
+    """
+    execute() runs the pipeline with sync collaborators; aexecute() is the
+    async variant and expects an async repository (asimilarity_search) and
+    LLMs implementing agenerate. execute_stream() and aexecute_stream()
+    yield the answer as the LLM generates it. aexecute_many() answers many
+    queries with batched embedding and retrieval and concurrent LLM calls.
+
+    With hybrid parameters (candidates, semantic_weight, lexical_weight,
+    rrf_k), retrieval fuses vector and full-text search.
+
+    With a reranker, retrieval fetches rerank_candidates chunks and keeps
+    the top_k best by cross-encoder score. Reranking that fails or exceeds
+    rerank_budget_s falls back to retrieval order for that request.
+
+    The context_builder packs the retrieved chunks into the prompt within
+    a token budget, dropping near-duplicates.
+
+    With a response_cache, a semantic hit skips retrieval and generation,
+    an exact hit skips generation. Only primary-provider answers are
+    cached, never fallback output.
+    """
+
+    def __init__(
+        self,
+        repository,
+        embedding_service,
+        llm,
+        fallback_llm=None,
+        response_cache=None,
+        hybrid: Optional[dict] = None,
+        collection: Optional[str] = None,
+        reranker=None,
+        rerank_candidates: int = 20,
+        rerank_budget_s: Optional[float] = None,
+        context_builder: Optional[ContextBuilder] = None,
+        hybrid_batch_concurrency: int = 4,
+    ):
         self.repository = repository
         self.embedding_service = embedding_service
         self.llm = llm
         self.fallback_llm = fallback_llm
+        self.response_cache = response_cache
+        self.hybrid = hybrid
+        # Part of the cache namespace: answers never cross collections
+        self.collection = collection
+        self.reranker = reranker
+        self.rerank_candidates = rerank_candidates
+        self.rerank_budget_s = rerank_budget_s
+        # Without a builder every chunk is sent, only counted
+        self.context_builder = context_builder or ContextBuilder(llm.count_tokens)
+        # aexecute_many: hybrid searches in flight per batch
+        self.hybrid_batch_concurrency = hybrid_batch_concurrency
 
     def execute(
         self,
@@ -22,93 +88,862 @@ class RAGOrchestrator:
         response_format: Optional[dict] = None,
     ) -> str:
 
-        embedding = self.embedding_service.generate_embedding(query)
-        results = self.repository.similarity_search(embedding, top_k)
-
-        if not results:
-            context = "No relevant documents retrieved from knowledge base."
-        else:
-            context = "\n\n".join(
-                [r["content"] for r in results if r.get("content")]
-            )
-
-        user_prompt = user_instruction_template.format(
-            context=context,
-            query=query,
+        prepared = self._prepare(
+            query, system_prompt, user_instruction_template, top_k, temperature, response_format
         )
+        if prepared.cached is not None:
+            return prepared.cached
 
-        if response_format and not getattr(self.llm, "supports_response_format", False):
-            response_format = None
-
-        provider_name = type(self.llm).__name__
-
-        logger.info(
-            "llm_invocation provider=%s top_k=%d temperature=%.2f structured=%s",
-            provider_name,
-            top_k,
-            temperature,
-            bool(response_format),
-        )
+        provider_name = self._log_invocation(top_k, temperature, system_prompt, prepared)
 
         start = time.perf_counter()
 
         try:
             response = self.llm.generate(
                 system_prompt=system_prompt,
-                user_prompt=user_prompt,
+                user_prompt=prepared.user_prompt,
                 temperature=temperature,
-                response_format=response_format,
+                response_format=prepared.response_format,
             )
 
-            duration = time.perf_counter() - start
+            self._log_completed(provider_name, start, "primary")
+            self._store(prepared, response)
+            return response
+
+        except Exception as exc:
+            self._log_primary_failed(provider_name, start, exc)
+            error = exc
+
+        # Fallback strategy
+        fallback_provider = self._fallback_provider(provider_name, error)
+
+        start_fallback = time.perf_counter()
 
-            logger.info(
-                "llm_completed provider=%s duration_s=%.3f",
-                provider_name,
-                duration,
+        try:
+            response = self.fallback_llm.generate(
+                system_prompt=system_prompt,
+                user_prompt=prepared.user_prompt,
+                temperature=temperature,
+                response_format=prepared.response_format,
             )
 
+            self._log_completed(fallback_provider, start_fallback, "fallback")
             return response
 
         except Exception:
-            logger.warning(
-                "primary_llm_failed provider=%s",
-                provider_name,
+            LLM_SECONDS.labels(fallback_provider, "fallback", "error").observe(
+                time.perf_counter() - start_fallback
+            )
+            logger.error(
+                "fallback_llm_failed provider=%s",
+                fallback_provider,
                 exc_info=True,
             )
+            raise
+
+    async def aexecute(
+        self,
+        query: str,
+        system_prompt: str,
+        user_instruction_template: str,
+        top_k: int = 5,
+        temperature: float = 0.1,
+        response_format: Optional[dict] = None,
+    ) -> str:
+
+        prepared = await self._aprepare(
+            query, system_prompt, user_instruction_template, top_k, temperature, response_format
+        )
+        return await self._agenerate(prepared, system_prompt, top_k, temperature)
+
+    async def aexecute_many(
+        self,
+        queries: Sequence[str],
+        system_prompt: str,
+        user_instruction_template: str,
+        top_k: int = 5,
+        temperature: float = 0.1,
+        response_format: Optional[dict] = None,
+        limiter=None,
+        batch_size: int = 64,
+    ) -> AsyncIterator[Tuple[int, Union[str, Exception]]]:
+        """
+        aexecute() for many queries, yielding (index, answer) pairs in
+        completion order; a query that failed yields its exception instead.
+
+        Queries are embedded in batches of batch_size and each batch is
+        retrieved with one multi-query search. Its LLM calls start right
+        away, each primary call inside the limiter (an async context
+        manager such as app.core.limits.CallLimiter), while the next batch
+        is prepared. At most one batch waits for the LLM ahead of the calls
+        in flight.
+        """
+        pending = set()
+
+        try:
+            for offset in range(0, len(queries), batch_size):
+                while len(pending) >= batch_size:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        yield task.result()
+
+                batch = queries[offset:offset + batch_size]
+                try:
+                    prepared = await self._aprepare_many(
+                        batch, system_prompt, user_instruction_template, top_k, temperature,
+                        response_format,
+                    )
+                except Exception as exc:
+                    logger.warning("rag_batch_retrieval_failed queries=%d", len(batch), exc_info=True)
+                    for i in range(len(batch)):
+                        yield offset + i, exc
+                    continue
+
+                for i, item in enumerate(prepared):
+                    if isinstance(item, Exception):
+                        yield offset + i, item
+                        continue
+                    pending.add(asyncio.ensure_future(self._agenerate_indexed(
+                        offset + i, item, system_prompt, top_k, temperature, limiter
+                    )))
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+
+        finally:
+            # The consumer stopped early: drop the calls still queued or running,
+            # and wait for them to release their limiter slots and connections
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _agenerate(
+        self,
+        prepared: "_Prepared",
+        system_prompt: str,
+        top_k: int,
+        temperature: float,
+        limiter=None,
+    ) -> str:
+        if prepared.cached is not None:
+            return prepared.cached
+
+        provider_name = self._log_invocation(top_k, temperature, system_prompt, prepared)
+
+        # Only the primary provider is limited; the fallback is local
+        async with limiter or nullcontext():
+            start = time.perf_counter()
+
+            try:
+                response = await self.llm.agenerate(
+                    system_prompt=system_prompt,
+                    user_prompt=prepared.user_prompt,
+                    temperature=temperature,
+                    response_format=prepared.response_format,
+                )
+
+                self._log_completed(provider_name, start, "primary")
+                self._store(prepared, response)
+                return response
+
+            except Exception as exc:
+                self._log_primary_failed(provider_name, start, exc)
+                error = exc
 
         # Fallback strategy
-        if not self.fallback_llm:
-            logger.error("no_fallback_llm_configured")
+        fallback_provider = self._fallback_provider(provider_name, error)
+
+        start_fallback = time.perf_counter()
+
+        try:
+            response = await self.fallback_llm.agenerate(
+                system_prompt=system_prompt,
+                user_prompt=prepared.user_prompt,
+                temperature=temperature,
+                response_format=prepared.response_format,
+            )
+
+            self._log_completed(fallback_provider, start_fallback, "fallback")
+            return response
+
+        except Exception:
+            LLM_SECONDS.labels(fallback_provider, "fallback", "error").observe(
+                time.perf_counter() - start_fallback
+            )
+            logger.error(
+                "fallback_llm_failed provider=%s",
+                fallback_provider,
+                exc_info=True,
+            )
             raise
 
-        fallback_provider = type(self.fallback_llm).__name__
-        logger.info("fallback_to_provider provider=%s", fallback_provider)
+    async def _agenerate_indexed(self, index: int, prepared: "_Prepared", *args):
+        try:
+            return index, await self._agenerate(prepared, *args)
+        except Exception as exc:
+            return index, exc
+
+    # -----------------------------
+    # Streaming
+    # -----------------------------
+
+    def execute_stream(
+        self,
+        query: str,
+        system_prompt: str,
+        user_instruction_template: str,
+        top_k: int = 5,
+        temperature: float = 0.1,
+        response_format: Optional[dict] = None,
+    ) -> Iterator[str]:
+        """
+        execute(), yielding the answer in pieces as the provider streams it.
+        The fallback LLM takes over only when the primary fails before its
+        first token; once the caller has part of an answer, errors propagate.
+        A cached answer is yielded as one piece.
+        """
+        prepared = self._prepare(
+            query, system_prompt, user_instruction_template, top_k, temperature, response_format
+        )
+        if prepared.cached is not None:
+            yield prepared.cached
+            return
+
+        provider_name = self._log_invocation(top_k, temperature, system_prompt, prepared)
+
+        start = time.perf_counter()
+        parts: List[str] = []
+
+        try:
+            for token in self.llm.stream(
+                system_prompt=system_prompt,
+                user_prompt=prepared.user_prompt,
+                temperature=temperature,
+                response_format=prepared.response_format,
+            ):
+                if not token:
+                    continue
+                if not parts:
+                    self._log_first_token(provider_name, start, "primary")
+                parts.append(token)
+                yield token
+
+        except Exception as exc:
+            self._log_stream_failed(provider_name, start, len(parts), exc)
+            if parts:
+                raise
+            error = exc
+
+        else:
+            self._log_completed(provider_name, start, "primary")
+            self._store(prepared, "".join(parts))
+            return
+
+        fallback_provider = self._fallback_provider(provider_name, error)
 
         start_fallback = time.perf_counter()
+        emitted = False
 
         try:
-            response = self.fallback_llm.generate(
+            for token in self.fallback_llm.stream(
                 system_prompt=system_prompt,
-                user_prompt=user_prompt,
+                user_prompt=prepared.user_prompt,
                 temperature=temperature,
-                response_format=response_format,
-            )
+                response_format=prepared.response_format,
+            ):
+                if not token:
+                    continue
+                if not emitted:
+                    self._log_first_token(fallback_provider, start_fallback, "fallback")
+                    emitted = True
+                yield token
 
-            duration_fallback = time.perf_counter() - start_fallback
+            self._log_completed(fallback_provider, start_fallback, "fallback")
 
-            logger.info(
-                "llm_completed provider=%s duration_s=%.3f",
+        except Exception:
+            LLM_SECONDS.labels(fallback_provider, "fallback", "error").observe(
+                time.perf_counter() - start_fallback
+            )
+            logger.error(
+                "fallback_llm_failed provider=%s",
                 fallback_provider,
-                duration_fallback,
+                exc_info=True,
             )
+            raise
 
-            return response
+    async def aexecute_stream(
+        self,
+        query: str,
+        system_prompt: str,
+        user_instruction_template: str,
+        top_k: int = 5,
+        temperature: float = 0.1,
+        response_format: Optional[dict] = None,
+    ) -> AsyncIterator[str]:
+        """Async variant of execute_stream(), using astream on the LLMs."""
+        prepared = await self._aprepare(
+            query, system_prompt, user_instruction_template, top_k, temperature, response_format
+        )
+        if prepared.cached is not None:
+            yield prepared.cached
+            return
+
+        provider_name = self._log_invocation(top_k, temperature, system_prompt, prepared)
+
+        start = time.perf_counter()
+        parts: List[str] = []
+
+        try:
+            async for token in self.llm.astream(
+                system_prompt=system_prompt,
+                user_prompt=prepared.user_prompt,
+                temperature=temperature,
+                response_format=prepared.response_format,
+            ):
+                if not token:
+                    continue
+                if not parts:
+                    self._log_first_token(provider_name, start, "primary")
+                parts.append(token)
+                yield token
+
+        except Exception as exc:
+            self._log_stream_failed(provider_name, start, len(parts), exc)
+            if parts:
+                raise
+            error = exc
+
+        else:
+            self._log_completed(provider_name, start, "primary")
+            self._store(prepared, "".join(parts))
+            return
+
+        fallback_provider = self._fallback_provider(provider_name, error)
+
+        start_fallback = time.perf_counter()
+        emitted = False
+
+        try:
+            async for token in self.fallback_llm.astream(
+                system_prompt=system_prompt,
+                user_prompt=prepared.user_prompt,
+                temperature=temperature,
+                response_format=prepared.response_format,
+            ):
+                if not token:
+                    continue
+                if not emitted:
+                    self._log_first_token(fallback_provider, start_fallback, "fallback")
+                    emitted = True
+                yield token
+
+            self._log_completed(fallback_provider, start_fallback, "fallback")
 
         except Exception:
+            LLM_SECONDS.labels(fallback_provider, "fallback", "error").observe(
+                time.perf_counter() - start_fallback
+            )
             logger.error(
                 "fallback_llm_failed provider=%s",
                 fallback_provider,
                 exc_info=True,
             )
             raise
+
+    # -----------------------------
+    # Shared pipeline steps
+    # -----------------------------
+
+    def _prepare(
+        self,
+        query: str,
+        system_prompt: str,
+        user_instruction_template: str,
+        top_k: int,
+        temperature: float,
+        response_format: Optional[dict],
+    ) -> "_Prepared":
+        """Embedding, retrieval, reranking and prompt, up to the LLM call."""
+        # Before retrieval: an ingest from here on makes the answer stale
+        generation = self._cache_generation()
+        response_format = self._resolve_response_format(response_format)
+        namespace = self._cache_namespace(
+            system_prompt, user_instruction_template, top_k, temperature, response_format
+        )
+
+        start = time.perf_counter()
+        embedding = self.embedding_service.generate_embedding(query)
+        embed_s = time.perf_counter() - start
+        EMBED_SECONDS.observe(embed_s)
+
+        cached = self._cached_similar(namespace, embedding)
+        if cached is not None:
+            return _Prepared(response_format, namespace, embedding, cached=cached)
+
+        start = time.perf_counter()
+        fetch_k = self._fetch_k(top_k)
+        if self.hybrid is not None:
+            candidates = self.repository.hybrid_search(embedding, query, fetch_k, **self.hybrid)
+        else:
+            candidates = self.repository.similarity_search(embedding, fetch_k)
+        retrieve_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        scores, outcome = None, "off"
+        if self._should_rerank(candidates):
+            try:
+                scores = self.reranker.score(
+                    query, self._passages(candidates), timeout_s=self.rerank_budget_s
+                )
+                outcome = "applied" if scores is not None else "budget_exceeded"
+            except Exception:
+                logger.warning("rerank_failed model=%s", self._rerank_model(), exc_info=True)
+                outcome = "failed"
+
+        results = self._select(candidates, scores, top_k)
+        self._record_retrieval(
+            len(candidates), len(results), embed_s, retrieve_s, time.perf_counter() - start, outcome
+        )
+
+        return self._prepared(
+            results, query, user_instruction_template, response_format, namespace, embedding,
+            generation,
+        )
+
+    async def _aprepare(
+        self,
+        query: str,
+        system_prompt: str,
+        user_instruction_template: str,
+        top_k: int,
+        temperature: float,
+        response_format: Optional[dict],
+    ) -> "_Prepared":
+        # Before retrieval: an ingest from here on makes the answer stale
+        generation = self._cache_generation()
+        response_format = self._resolve_response_format(response_format)
+        namespace = self._cache_namespace(
+            system_prompt, user_instruction_template, top_k, temperature, response_format
+        )
+
+        start = time.perf_counter()
+        embedding = await self.embedding_service.agenerate_embedding(query)
+        embed_s = time.perf_counter() - start
+        EMBED_SECONDS.observe(embed_s)
+
+        cached = self._cached_similar(namespace, embedding)
+        if cached is not None:
+            return _Prepared(response_format, namespace, embedding, cached=cached)
+
+        start = time.perf_counter()
+        fetch_k = self._fetch_k(top_k)
+        if self.hybrid is not None:
+            candidates = await self.repository.ahybrid_search(
+                embedding, query, fetch_k, **self.hybrid
+            )
+        else:
+            candidates = await self.repository.asimilarity_search(embedding, fetch_k)
+        retrieve_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        scores, outcome = None, "off"
+        if self._should_rerank(candidates):
+            try:
+                scores = await self.reranker.ascore(
+                    query, self._passages(candidates), timeout_s=self.rerank_budget_s
+                )
+                outcome = "applied" if scores is not None else "budget_exceeded"
+            except Exception:
+                logger.warning("rerank_failed model=%s", self._rerank_model(), exc_info=True)
+                outcome = "failed"
+
+        results = self._select(candidates, scores, top_k)
+        self._record_retrieval(
+            len(candidates), len(results), embed_s, retrieve_s, time.perf_counter() - start, outcome
+        )
+
+        return self._prepared(
+            results, query, user_instruction_template, response_format, namespace, embedding,
+            generation,
+        )
+
+    async def _aprepare_many(
+        self,
+        queries: Sequence[str],
+        system_prompt: str,
+        user_instruction_template: str,
+        top_k: int,
+        temperature: float,
+        response_format: Optional[dict],
+    ) -> List[Union["_Prepared", Exception]]:
+        """
+        _aprepare() for a batch: one embedding call and one multi-query
+        search. A query whose hybrid search failed gets its exception.
+        """
+        # Before retrieval: an ingest from here on makes the answer stale
+        generation = self._cache_generation()
+        response_format = self._resolve_response_format(response_format)
+        namespace = self._cache_namespace(
+            system_prompt, user_instruction_template, top_k, temperature, response_format
+        )
+
+        start = time.perf_counter()
+        embeddings = await self.embedding_service.agenerate_embeddings(list(queries))
+        embed_s = time.perf_counter() - start
+        EMBED_SECONDS.observe(embed_s)
+
+        prepared: List[Union[_Prepared, Exception, None]] = [None] * len(queries)
+        misses = []
+        for i, embedding in enumerate(embeddings):
+            cached = self._cached_similar(namespace, embedding)
+            if cached is not None:
+                prepared[i] = _Prepared(response_format, namespace, embedding, cached=cached)
+            else:
+                misses.append(i)
+
+        start = time.perf_counter()
+        fetch_k = self._fetch_k(top_k)
+        if not misses:
+            candidate_lists = []
+        elif self.hybrid is not None:
+            # The full-text leg has no multi-query form: one hybrid search per query,
+            # a few at a time so a batch leaves connections for other requests
+            candidate_lists = await gather_limited(
+                (
+                    partial(self.repository.ahybrid_search, embeddings[i], queries[i], fetch_k, **self.hybrid)
+                    for i in misses
+                ),
+                self.hybrid_batch_concurrency,
+                return_exceptions=True,
+            )
+        else:
+            candidate_lists = await self.repository.asimilarity_search_many(
+                [embeddings[i] for i in misses], fetch_k
+            )
+        retrieve_s = time.perf_counter() - start
+
+        rerank_s, reranked, failed = 0.0, 0, 0
+        for i, candidates in zip(misses, candidate_lists):
+            if isinstance(candidates, BaseException) and not isinstance(candidates, Exception):
+                # A cancelled search (CancelledError) is not a per-query failure
+                raise candidates
+            if isinstance(candidates, Exception):
+                # Only this query fails; the rest of the batch goes on
+                logger.warning("rag_batch_retrieval_failed queries=1", exc_info=candidates)
+                prepared[i] = candidates
+                failed += 1
+                continue
+
+            scores = None
+            if self._should_rerank(candidates):
+                # One at a time: the reranker scores on a single thread anyway,
+                # and queueing would count against each query's budget
+                rerank_start = time.perf_counter()
+                try:
+                    scores = await self.reranker.ascore(
+                        queries[i], self._passages(candidates), timeout_s=self.rerank_budget_s
+                    )
+                    outcome = "applied" if scores is not None else "budget_exceeded"
+                except Exception:
+                    logger.warning("rerank_failed model=%s", self._rerank_model(), exc_info=True)
+                    outcome = "failed"
+                elapsed = time.perf_counter() - rerank_start
+                rerank_s += elapsed
+                RERANK_SECONDS.observe(elapsed)
+                RERANKS.labels(outcome).inc()
+                reranked += scores is not None
+
+            prepared[i] = self._prepared(
+                self._select(candidates, scores, top_k),
+                queries[i],
+                user_instruction_template,
+                response_format,
+                namespace,
+                embeddings[i],
+                generation,
+            )
+
+        if misses:
+            search_stage(self.hybrid is not None).observe(retrieve_s)
+        logger.info(
+            "rag_batch_retrieval_completed queries=%d cache_hits=%d failed=%d reranked=%d "
+            "embed_s=%.3f retrieve_s=%.3f rerank_s=%.3f",
+            len(queries),
+            len(queries) - len(misses),
+            failed,
+            reranked,
+            embed_s,
+            retrieve_s,
+            rerank_s,
+        )
+        return prepared
+
+    def _prepared(
+        self, results, query, user_instruction_template, response_format, namespace, embedding,
+        generation=None,
+    ) -> "_Prepared":
+        user_prompt, context = self._build_user_prompt(results, query, user_instruction_template)
+        cache_key = self._cache_key(namespace, user_prompt)
+        return _Prepared(
+            response_format,
+            namespace,
+            embedding,
+            user_prompt=user_prompt,
+            context=context,
+            cache_key=cache_key,
+            cached=self._cached_exact(cache_key),
+            generation=generation,
+        )
+
+    def _fetch_k(self, top_k: int) -> int:
+        if self.reranker is None:
+            return top_k
+        return max(top_k, self.rerank_candidates)
+
+    def _should_rerank(self, candidates) -> bool:
+        return self.reranker is not None and len(candidates) > 1
+
+    def _rerank_model(self) -> Optional[str]:
+        return getattr(self.reranker, "model_name", None)
+
+    @staticmethod
+    def _passages(candidates) -> List[str]:
+        return [c.get("content") or "" for c in candidates]
+
+    @staticmethod
+    def _select(candidates, scores: Optional[List[float]], top_k: int):
+        if scores is None:
+            return candidates[:top_k]
+
+        # Stable sort: ties keep their retrieval order
+        order = sorted(range(len(candidates)), key=lambda i: -scores[i])[:top_k]
+        return [{**candidates[i], "rerank_score": scores[i]} for i in order]
+
+    def _record_retrieval(
+        self,
+        candidates: int,
+        results: int,
+        embed_s: float,
+        retrieve_s: float,
+        rerank_s: float,
+        rerank: str,
+    ) -> None:
+        search_stage(self.hybrid is not None).observe(retrieve_s)
+        if rerank != "off":
+            RERANK_SECONDS.observe(rerank_s)
+            RERANKS.labels(rerank).inc()
+
+        logger.info(
+            "rag_retrieval_completed candidates=%d results=%d embed_s=%.3f "
+            "retrieve_s=%.3f rerank_s=%.3f rerank=%s",
+            candidates,
+            results,
+            embed_s,
+            retrieve_s,
+            rerank_s,
+            rerank,
+        )
+
+    def _build_user_prompt(self, results, query: str, user_instruction_template: str):
+        start = time.perf_counter()
+        context = self.context_builder.build(results)
+        CONTEXT_SECONDS.observe(time.perf_counter() - start)
+        if not context.chunks:
+            text = "No relevant documents retrieved from knowledge base."
+        else:
+            text = context.text
+
+        user_prompt = user_instruction_template.format(
+            context=text,
+            query=query,
+        )
+        return user_prompt, context
+
+    def _resolve_response_format(self, response_format: Optional[dict]) -> Optional[dict]:
+        if response_format and not getattr(self.llm, "supports_response_format", False):
+            return None
+        return response_format
+
+    def _log_invocation(
+        self,
+        top_k: int,
+        temperature: float,
+        system_prompt: str,
+        prepared: "_Prepared",
+    ) -> str:
+        provider_name = self.llm.provider_name
+        prompt_tokens = sum(self.llm.count_tokens([system_prompt, prepared.user_prompt]))
+        context = prepared.context
+
+        logger.info(
+            "llm_invocation provider=%s top_k=%d temperature=%.2f structured=%s "
+            "prompt_tokens=%d context_tokens=%d context_chunks=%d duplicates=%d "
+            "over_budget=%d truncated=%s",
+            provider_name,
+            top_k,
+            temperature,
+            bool(prepared.response_format),
+            prompt_tokens,
+            context.tokens,
+            context.chunks,
+            context.duplicates,
+            context.over_budget,
+            context.truncated,
+        )
+
+        return provider_name
+
+    def _log_completed(self, provider_name: str, start: float, role: str) -> None:
+        duration = time.perf_counter() - start
+        LLM_SECONDS.labels(provider_name, role, "success").observe(duration)
+
+        logger.info(
+            "llm_completed provider=%s duration_s=%.3f",
+            provider_name,
+            duration,
+        )
+
+    def _log_first_token(self, provider_name: str, start: float, role: str) -> None:
+        duration = time.perf_counter() - start
+        LLM_FIRST_TOKEN_SECONDS.labels(provider_name, role).observe(duration)
+
+        logger.info(
+            "llm_first_token provider=%s role=%s ttft_s=%.3f",
+            provider_name,
+            role,
+            duration,
+        )
+
+    def _log_primary_failed(self, provider_name: str, start: float, error: Exception) -> None:
+        if isinstance(error, ProviderUnavailable):
+            # Refused without a call (open circuit, full queue): expected, no traceback
+            LLM_SECONDS.labels(provider_name, "primary", "rejected").observe(time.perf_counter() - start)
+            logger.info("primary_llm_unavailable provider=%s reason=%s", provider_name, error)
+            return
+
+        LLM_SECONDS.labels(provider_name, "primary", "error").observe(time.perf_counter() - start)
+        logger.warning(
+            "primary_llm_failed provider=%s",
+            provider_name,
+            exc_info=True,
+        )
+
+    def _log_stream_failed(self, provider_name: str, start: float, tokens: int, error: Exception) -> None:
+        if not tokens:
+            self._log_primary_failed(provider_name, start, error)
+            return
+
+        # Too late for the fallback: the caller already has part of the answer
+        LLM_SECONDS.labels(provider_name, "primary", "error").observe(time.perf_counter() - start)
+        logger.error(
+            "primary_llm_stream_interrupted provider=%s tokens=%d",
+            provider_name,
+            tokens,
+            exc_info=True,
+        )
+
+    def _fallback_provider(self, provider_name: str, error: Exception) -> str:
+        if not self.fallback_llm:
+            logger.error("no_fallback_llm_configured")
+            raise error
+
+        fallback_provider = self.fallback_llm.provider_name
+        LLM_FALLBACKS.labels(provider_name).inc()
+        logger.info("fallback_to_provider provider=%s", fallback_provider)
+        return fallback_provider
+
+    # -----------------------------
+    # Response cache
+    # -----------------------------
+
+    def _cache_namespace(
+        self,
+        system_prompt: str,
+        user_instruction_template: str,
+        top_k: int,
+        temperature: float,
+        response_format: Optional[dict],
+    ) -> str:
+        """Everything except the query that determines the answer."""
+        payload = json.dumps(
+            [
+                self.llm.provider_name,
+                getattr(self.llm, "model_name", None),
+                system_prompt,
+                user_instruction_template,
+                top_k,
+                temperature,
+                response_format,
+                self.hybrid,
+                self.collection,
+                self._rerank_model(),
+                self.rerank_candidates if self.reranker is not None else None,
+                self.context_builder.max_tokens,
+                self.context_builder.duplicate_threshold,
+            ],
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _cache_key(self, namespace: str, user_prompt: str) -> str:
+        payload = f"{namespace}\x00{user_prompt}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def _cached_similar(self, namespace: str, embedding) -> Optional[str]:
+        if self.response_cache is None:
+            return None
+
+        response = self.response_cache.get_similar(namespace, embedding)
+        if response is not None:
+            logger.info("response_cache_hit tier=semantic provider=%s", self.llm.provider_name)
+        return response
+
+    def _cached_exact(self, cache_key: str) -> Optional[str]:
+        if self.response_cache is None:
+            return None
+
+        response = self.response_cache.get(cache_key)
+        if response is not None:
+            logger.info("response_cache_hit tier=exact provider=%s", self.llm.provider_name)
+        return response
+
+    def _store(self, prepared: "_Prepared", response: str) -> None:
+        if self.response_cache is not None:
+            self.response_cache.put(
+                prepared.cache_key,
+                prepared.namespace,
+                response,
+                prepared.embedding,
+                generation=prepared.generation,
+            )
+
+    def _cache_generation(self) -> Optional[int]:
+        return self.response_cache.generation if self.response_cache is not None else None
+
+
+class _Prepared:
+    """Pipeline state between retrieval and the LLM call."""
+
+    def __init__(
+        self,
+        response_format: Optional[dict],
+        namespace: str,
+        embedding,
+        user_prompt: Optional[str] = None,
+        context: Optional[Context] = None,
+        cache_key: Optional[str] = None,
+        cached: Optional[str] = None,
+        generation: Optional[int] = None,
+    ):
+        self.response_format = response_format
+        self.namespace = namespace
+        self.embedding = embedding
+        self.user_prompt = user_prompt
+        self.context = context
+        self.cache_key = cache_key
+        # Set on a response cache hit; nothing else is needed then
+        self.cached = cached
+        # Response cache generation when retrieval started
+        self.generation = generation
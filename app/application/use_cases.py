@@ -1,23 +1,472 @@
+import asyncio
+import logging
+import time
 import uuid
+from functools import partial
+from typing import AsyncIterable, Iterable, Iterator, List, Optional
+
+from app.core.limits import gather_limited
+from app.core.metrics import EMBED_SECONDS, search_stage
+
+logger = logging.getLogger(__name__)
+
+def _invalidate(response_cache) -> None:
+    # Cached answers may have been built from a now-outdated knowledge base
+    if response_cache is not None:
+        response_cache.invalidate()
+
+def _chunk_records(
+    document_id: str, first_index: int, chunks: List[str], embeddings, metadata: Optional[dict]
+):
+    # Every chunk carries the document's metadata so filters apply per chunk
+    return [
+        (str(uuid.uuid4()), document_id, first_index + offset, text, metadata, embedding)
+        for offset, (text, embedding) in enumerate(zip(chunks, embeddings))
+    ]
+
+def _batched(values: Iterable[str], size: int) -> Iterator[List[str]]:
+    batch = []
+    for value in values:
+        batch.append(value)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
 class IngestTextUseCase:
+    """
+    Ingests one document as ordered chunks sharing a document id.
+
+    With a chunker, content is split into embedding-sized chunks that are
+    embedded in one batch and stored in one transaction; without one the
+    whole content is a single chunk. The stream variants chunk, embed and
+    insert text as it arrives, batch_size chunks at a time, and remove the
+    partially stored document if a batch fails.
+    """
+
+    def __init__(
+        self,
+        embedding_provider,
+        vector_repository,
+        response_cache=None,
+        chunker=None,
+        batch_size: int = 128,
+    ):
+        self.embedding_provider = embedding_provider
+        self.vector_repository = vector_repository
+        self.response_cache = response_cache
+        self.chunker = chunker
+        self.batch_size = batch_size
+
+    def execute(self, content: str, metadata: Optional[dict] = None) -> dict:
+        document_id = str(uuid.uuid4())
+        chunks = self._split(content)
+
+        if len(chunks) == 1:
+            embedding = self.embedding_provider.generate_embedding(chunks[0])
+            self.vector_repository.save(
+                str(uuid.uuid4()), chunks[0], embedding, document_id, metadata=metadata
+            )
+        else:
+            embeddings = self.embedding_provider.generate_embeddings(chunks)
+            self.vector_repository.save_many(
+                _chunk_records(document_id, 0, chunks, embeddings, metadata)
+            )
+
+        _invalidate(self.response_cache)
+        return {"document_id": document_id, "chunks": len(chunks)}
+
+    async def aexecute(self, content: str, metadata: Optional[dict] = None) -> dict:
+        document_id = str(uuid.uuid4())
+        chunks = await asyncio.to_thread(self._split, content) if self.chunker else [content]
+
+        if len(chunks) == 1:
+            # Single texts go through the embedding micro-batcher
+            embedding = await self.embedding_provider.agenerate_embedding(chunks[0])
+            await self.vector_repository.asave(
+                str(uuid.uuid4()), chunks[0], embedding, document_id, metadata=metadata
+            )
+        else:
+            embeddings = await self.embedding_provider.agenerate_embeddings(chunks)
+            await self.vector_repository.asave_many(
+                _chunk_records(document_id, 0, chunks, embeddings, metadata)
+            )
+
+        _invalidate(self.response_cache)
+        return {"document_id": document_id, "chunks": len(chunks)}
+
+    def execute_stream(self, pieces: Iterable[str], metadata: Optional[dict] = None) -> dict:
+        document_id = str(uuid.uuid4())
+        stored = 0
 
-    def __init__(self, embedding_provider, vector_repository):
+        try:
+            for batch in _batched(self._require_chunker().stream(pieces), self.batch_size):
+                embeddings = self.embedding_provider.generate_embeddings(batch)
+                self.vector_repository.save_many(
+                    _chunk_records(document_id, stored, batch, embeddings, metadata)
+                )
+                stored += len(batch)
+        except Exception:
+            if stored:
+                self.vector_repository.delete_document(document_id)
+            raise
+
+        if stored:
+            _invalidate(self.response_cache)
+        return {"document_id": document_id, "chunks": stored}
+
+    async def aexecute_stream(
+        self, pieces: AsyncIterable[str], metadata: Optional[dict] = None
+    ) -> dict:
+        document_id = str(uuid.uuid4())
+        stored = 0
+        batch: List[str] = []
+
+        async def flush():
+            nonlocal stored
+            embeddings = await self.embedding_provider.agenerate_embeddings(batch)
+            await self.vector_repository.asave_many(
+                _chunk_records(document_id, stored, batch, embeddings, metadata)
+            )
+            stored += len(batch)
+            batch.clear()
+
+        try:
+            async for chunk in self._require_chunker().astream(pieces):
+                batch.append(chunk)
+                if len(batch) >= self.batch_size:
+                    await flush()
+            if batch:
+                await flush()
+        except Exception:
+            if stored:
+                await self.vector_repository.adelete_document(document_id)
+            raise
+
+        if stored:
+            _invalidate(self.response_cache)
+        return {"document_id": document_id, "chunks": stored}
+
+    def _split(self, content: str) -> List[str]:
+        if self.chunker is None:
+            return [content]
+        return self.chunker.split(content) or [content]
+
+    def _require_chunker(self):
+        if self.chunker is None:
+            raise ValueError("Streaming ingestion requires a chunker.")
+        return self.chunker
+
+class BulkIngestTextUseCase:
+    """
+    Ingests many documents with batched embedding and batched writes.
+
+    Documents are processed in insert batches (one transaction each), and
+    the chunks of every insert batch are embedded in smaller embedding
+    batches. A failure only marks the documents of the affected batch as
+    failed; a document is stored with all of its chunks or not at all.
+    """
+
+    def __init__(
+        self,
+        embedding_provider,
+        vector_repository,
+        embed_batch_size: int = 128,
+        insert_batch_size: int = 1000,
+        response_cache=None,
+        chunker=None,
+    ):
         self.embedding_provider = embedding_provider
         self.vector_repository = vector_repository
+        self.embed_batch_size = embed_batch_size
+        self.insert_batch_size = insert_batch_size
+        self.response_cache = response_cache
+        self.chunker = chunker
+
+    def execute(self, contents: List[str], metadata: Optional[List[dict]] = None) -> dict:
+        start = time.perf_counter()
+        items, pending = self._prepare(contents)
+
+        for batch in self._slices(pending, self.insert_batch_size):
+            chunks = self._chunks(contents, batch)
+            rows = []
+
+            for embed_batch in self._slices(chunks, self.embed_batch_size):
+                try:
+                    embeddings = self.embedding_provider.generate_embeddings(
+                        [chunk[3] for chunk in embed_batch]
+                    )
+                except Exception as exc:
+                    self._mark_failed(items, self._documents(embed_batch), "embedding", exc)
+                    continue
+                rows.extend(self._rows(embed_batch, embeddings))
+
+            rows = self._complete(items, rows)
+            if not rows:
+                continue
+
+            try:
+                self.vector_repository.save_many(self._records(rows, metadata))
+            except Exception as exc:
+                self._mark_failed(items, self._documents(rows), "insert", exc)
+                continue
+            self._mark_indexed(items, rows)
+
+        return self._summary(items, start)
 
-    def execute(self, content: str):
-        embedding = self.embedding_provider.generate_embedding(content)
-        chunk_id = str(uuid.uuid4())
-        self.vector_repository.save(chunk_id, content, embedding)
+    async def aexecute(self, contents: List[str], metadata: Optional[List[dict]] = None) -> dict:
+        start = time.perf_counter()
+        items, pending = self._prepare(contents)
+
+        for batch in self._slices(pending, self.insert_batch_size):
+            if self.chunker is not None:
+                chunks = await asyncio.to_thread(self._chunks, contents, batch)
+            else:
+                chunks = self._chunks(contents, batch)
+            rows = []
+
+            for embed_batch in self._slices(chunks, self.embed_batch_size):
+                try:
+                    embeddings = await self.embedding_provider.agenerate_embeddings(
+                        [chunk[3] for chunk in embed_batch]
+                    )
+                except Exception as exc:
+                    self._mark_failed(items, self._documents(embed_batch), "embedding", exc)
+                    continue
+                rows.extend(self._rows(embed_batch, embeddings))
+
+            rows = self._complete(items, rows)
+            if not rows:
+                continue
+
+            try:
+                await self.vector_repository.asave_many(self._records(rows, metadata))
+            except Exception as exc:
+                self._mark_failed(items, self._documents(rows), "insert", exc)
+                continue
+            self._mark_indexed(items, rows)
+
+        return self._summary(items, start)
+
+    # -----------------------------
+    # Helpers
+    # -----------------------------
+
+    @staticmethod
+    def _slices(values: list, size: int):
+        for offset in range(0, len(values), size):
+            yield values[offset:offset + size]
+
+    @staticmethod
+    def _prepare(contents: List[str]):
+        items = [
+            {"index": i, "id": None, "chunks": 0, "error": None}
+            for i in range(len(contents))
+        ]
+
+        pending = []
+        for i, content in enumerate(contents):
+            if not content or not content.strip():
+                items[i]["error"] = "empty content"
+            else:
+                pending.append(i)
+
+        return items, pending
+
+    def _chunks(self, contents: List[str], indexes: List[int]):
+        """(document index, document id, chunk ordinal, text) for every chunk of the given documents."""
+        chunks = []
+        for i in indexes:
+            document_id = str(uuid.uuid4())
+            texts = self.chunker.split(contents[i]) if self.chunker else []
+            for ordinal, text in enumerate(texts or [contents[i]]):
+                chunks.append((i, document_id, ordinal, text))
+        return chunks
+
+    @staticmethod
+    def _documents(chunks) -> List[int]:
+        return sorted({chunk[0] for chunk in chunks})
+
+    @staticmethod
+    def _rows(chunks, embeddings):
+        return [chunk + (embedding,) for chunk, embedding in zip(chunks, embeddings)]
+
+    @staticmethod
+    def _complete(items, rows):
+        # A document whose chunks were only partly embedded is not stored at all
+        return [row for row in rows if items[row[0]]["error"] is None]
+
+    @staticmethod
+    def _records(rows, metadata: Optional[List[dict]]):
+        return [
+            (str(uuid.uuid4()), document_id, ordinal, text, metadata[i] if metadata else None, embedding)
+            for i, document_id, ordinal, text, embedding in rows
+        ]
+
+    @staticmethod
+    def _mark_failed(items, indexes: List[int], stage: str, exc: Exception) -> None:
+        logger.warning(
+            "bulk_%s_failed size=%d error=%s",
+            stage,
+            len(indexes),
+            str(exc),
+            exc_info=True,
+        )
+        for i in indexes:
+            items[i]["error"] = f"{stage} failed: {exc}"
+
+    @staticmethod
+    def _mark_indexed(items, rows) -> None:
+        for i, document_id, _, _, _ in rows:
+            items[i]["id"] = document_id
+            items[i]["chunks"] += 1
+
+    def _summary(self, items, start: float) -> dict:
+        duration = time.perf_counter() - start
+        indexed = sum(1 for item in items if item["id"] is not None)
+
+        if indexed:
+            _invalidate(self.response_cache)
+
+        return {
+            "indexed": indexed,
+            "failed": len(items) - indexed,
+            "duration_s": duration,
+            "docs_per_sec": indexed / duration if duration > 0 else 0.0,
+            "items": items,
+        }
 
 class QuerySimilarTextUseCase:
+    """
+    Vector search, or hybrid search when hybrid parameters are given
+    (candidates, semantic_weight, lexical_weight, rrf_k), optionally
+    restricted to chunks matching a metadata filter.
+
+    The _many variants embed all queries in one batch and run one
+    multi-query vector search, returning one result list per query. Hybrid
+    searches run one per query, at most hybrid_batch_concurrency at once
+    so a batch cannot take the whole connection pool.
+    """
+
+    def __init__(self, embedding_provider, vector_repository, hybrid_batch_concurrency: int = 4):
+        if hybrid_batch_concurrency < 1:
+            raise ValueError("hybrid_batch_concurrency must be >= 1.")
 
-    def __init__(self, embedding_provider, vector_repository):
         self.embedding_provider = embedding_provider
         self.vector_repository = vector_repository
+        self.hybrid_batch_concurrency = hybrid_batch_concurrency
 
-    def execute(self, query: str, k: int = 5):
+    def execute(
+        self,
+        query: str,
+        k: int = 5,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        hybrid: Optional[dict] = None,
+        metadata_filter: Optional[dict] = None,
+    ):
+        start = time.perf_counter()
         query_embedding = self.embedding_provider.generate_embedding(query)
-        return self.vector_repository.similarity_search(query_embedding, k)
+        EMBED_SECONDS.observe(time.perf_counter() - start)
+
+        search = dict(probes=probes, ef_search=ef_search)
+        if metadata_filter:
+            search["metadata_filter"] = metadata_filter
+
+        start = time.perf_counter()
+        if hybrid is not None:
+            results = self.vector_repository.hybrid_search(
+                query_embedding, query, k, **search, **hybrid
+            )
+        else:
+            results = self.vector_repository.similarity_search(query_embedding, k, **search)
+        search_stage(hybrid is not None).observe(time.perf_counter() - start)
+        return results
+
+    async def aexecute(
+        self,
+        query: str,
+        k: int = 5,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        hybrid: Optional[dict] = None,
+        metadata_filter: Optional[dict] = None,
+    ):
+        start = time.perf_counter()
+        query_embedding = await self.embedding_provider.agenerate_embedding(query)
+        EMBED_SECONDS.observe(time.perf_counter() - start)
+
+        search = dict(probes=probes, ef_search=ef_search)
+        if metadata_filter:
+            search["metadata_filter"] = metadata_filter
+
+        start = time.perf_counter()
+        if hybrid is not None:
+            results = await self.vector_repository.ahybrid_search(
+                query_embedding, query, k, **search, **hybrid
+            )
+        else:
+            results = await self.vector_repository.asimilarity_search(query_embedding, k, **search)
+        search_stage(hybrid is not None).observe(time.perf_counter() - start)
+        return results
+
+    def execute_many(
+        self,
+        queries: List[str],
+        k: int = 5,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        hybrid: Optional[dict] = None,
+        metadata_filter: Optional[dict] = None,
+    ) -> List[List[dict]]:
+        start = time.perf_counter()
+        embeddings = self.embedding_provider.generate_embeddings(queries)
+        EMBED_SECONDS.observe(time.perf_counter() - start)
+
+        search = dict(probes=probes, ef_search=ef_search)
+        if metadata_filter:
+            search["metadata_filter"] = metadata_filter
+
+        start = time.perf_counter()
+        if hybrid is not None:
+            # The full-text leg has no multi-query form: one hybrid search per query
+            results = [
+                self.vector_repository.hybrid_search(embedding, query, k, **search, **hybrid)
+                for embedding, query in zip(embeddings, queries)
+            ]
+        else:
+            results = self.vector_repository.similarity_search_many(embeddings, k, **search)
+        search_stage(hybrid is not None).observe(time.perf_counter() - start)
+        return results
+
+    async def aexecute_many(
+        self,
+        queries: List[str],
+        k: int = 5,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        hybrid: Optional[dict] = None,
+        metadata_filter: Optional[dict] = None,
+    ) -> List[List[dict]]:
+        start = time.perf_counter()
+        embeddings = await self.embedding_provider.agenerate_embeddings(queries)
+        EMBED_SECONDS.observe(time.perf_counter() - start)
+
+        search = dict(probes=probes, ef_search=ef_search)
+        if metadata_filter:
+            search["metadata_filter"] = metadata_filter
 
+        start = time.perf_counter()
+        if hybrid is not None:
+            results = await gather_limited(
+                (
+                    partial(self.vector_repository.ahybrid_search, embedding, query, k, **search, **hybrid)
+                    for embedding, query in zip(embeddings, queries)
+                ),
+                self.hybrid_batch_concurrency,
+            )
+        else:
+            results = await self.vector_repository.asimilarity_search_many(embeddings, k, **search)
+        search_stage(hybrid is not None).observe(time.perf_counter() - start)
+        return results
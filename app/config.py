@@ -1,3 +1,5 @@
+from typing import List, Optional
+
 from pydantic_settings import BaseSettings
 
 
@@ -8,11 +10,140 @@ class Settings(BaseSettings):
     DB_USER: str
     DB_PASSWORD: str
     
+    # Connection pools. Each worker holds up to DB_POOL_MAX_SIZE + DB_SYNC_POOL_MAX_SIZE
+    # connections; the other limits apply to both pools.
+    DB_POOL_MIN_SIZE: int = 1
+    DB_POOL_MAX_SIZE: int = 10  # async pool: ingestion, query and RAG routes
+    DB_SYNC_POOL_MAX_SIZE: int = 4  # sync pool: admin, collection lookups, health
+    DB_POOL_ACQUIRE_TIMEOUT_S: float = 5.0
+    DB_POOL_MAX_IDLE_S: float = 300.0
+    DB_POOL_MAX_LIFETIME_S: float = 3600.0
+    DB_POOL_VALIDATE_AFTER_IDLE_S: float = 30.0
+
+    # Vector store backend: pgvector | memory (in-process, per worker)
+    VECTOR_BACKEND: str = "pgvector"
+
+    # In-memory backend (VECTOR_BACKEND=memory)
+    MEMORY_STORE_PATH: Optional[str] = None  # directory; loaded at startup, written at shutdown
+    # Changed stores are also written this often; a crash loses the writes since the last one.
+    MEMORY_STORE_PERSIST_INTERVAL_S: Optional[float] = 60.0  # None: only at shutdown
+    MEMORY_STORE_ANN: bool = False  # hnswlib graph index instead of exact search; uses HNSW_* settings
+
+    # Vector search: must match the operator class of the ANN index
+    VECTOR_DISTANCE_METRIC: str = "cosine"  # cosine | l2 | inner_product
+    IVFFLAT_PROBES: Optional[int] = None  # None keeps the server default
+    HNSW_EF_SEARCH: Optional[int] = None  # None keeps the server default
+    # Filtered searches: keep scanning the ANN index until k rows pass the filter
+    VECTOR_ITERATIVE_SCAN: Optional[str] = "relaxed_order"  # relaxed_order | strict_order | None, pgvector >= 0.8
+    # What the ANN index stores (pgvector >= 0.7): none | halfvec | binary. Quantized
+    # candidates are rescored against the full-precision vectors in the same query.
+    VECTOR_QUANTIZATION: str = "none"  # default collection; rebuild the index after changing
+    VECTOR_RESCORE_FACTOR: int = 4  # quantized searches rescore factor * k candidates
+
+    # Collections: named tenants with their own table, model, metric and index.
+    # The "default" collection is document_chunks, configured by the settings above.
+    COLLECTION_CACHE_TTL_S: float = 30.0  # per-worker lookup cache; bounds staleness after a drop
+
+    # ANN index management
+    VECTOR_INDEX_TYPE: str = "ivfflat"  # ivfflat | hnsw, used for builds via /admin/index
+    HNSW_M: int = 16
+    HNSW_EF_CONSTRUCTION: int = 64
+    INDEX_MAINTENANCE_WORK_MEM: Optional[str] = None  # e.g. "1GB" for faster builds
+
+    # Hybrid retrieval: vector + full-text candidates fused with reciprocal rank fusion
+    HYBRID_CANDIDATES: int = 50  # per leg, before fusion
+    HYBRID_SEMANTIC_WEIGHT: float = 1.0
+    HYBRID_LEXICAL_WEIGHT: float = 1.0
+    HYBRID_RRF_K: int = 60
+    HYBRID_BATCH_CONCURRENCY: int = 4  # hybrid searches in flight per batch request; keep below DB_POOL_MAX_SIZE
+    RAG_SEARCH_MODE: str = "vector"  # vector | hybrid, retrieval used by the RAG orchestrator
+
+    # Multi-query search (/query/batch)
+    QUERY_BATCH_MAX_QUERIES: int = 100
+
+    # Reranking: the RAG orchestrator rescores retrieved chunks with a local cross-encoder
+    RERANK_ENABLED: bool = False
+    RERANK_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_CANDIDATES: int = 20  # chunks retrieved and scored; the best top_k reach the prompt
+    RERANK_BUDGET_MS: Optional[float] = 150.0  # per request; on overrun the retrieval order is kept
+    RERANK_BATCH_SIZE: int = 16  # pairs per forward pass; the budget is checked between batches
+    RERANK_MAX_LENGTH: int = 256  # tokens per (query, chunk) pair
+
+    # RAG context assembly (token counts use the LLM's tokenizer, e.g. tiktoken for OpenAI)
+    CONTEXT_MAX_TOKENS: Optional[int] = 3000  # retrieved chunks packed best-first; None sends all
+    CONTEXT_DUPLICATE_THRESHOLD: Optional[float] = 0.8  # word-shingle Jaccard; None keeps duplicates
+
+    # Admin API
+    ADMIN_API_KEY: Optional[str] = None  # /admin requires X-Admin-Key; /admin is disabled (403) when unset
+
+    # Observability
+    METRICS_ENABLED: bool = True  # Prometheus /metrics, per worker process
+
     OPENAI_API_KEY: str 
     LLM_PROVIDER: str
 
+    # Primary LLM provider health, per worker process (the local fallback is not wrapped)
+    LLM_BREAKER_ENABLED: bool = True
+    LLM_BREAKER_FAILURES: int = 5  # consecutive failed calls that open the circuit
+    LLM_BREAKER_LATENCY_S: Optional[float] = None  # also opens when the latency percentile exceeds this
+    LLM_BREAKER_LATENCY_PERCENTILE: float = 0.95
+    LLM_BREAKER_WINDOW: int = 50  # recent calls the percentile is taken over
+    LLM_BREAKER_MIN_CALLS: int = 20
+    LLM_BREAKER_RESET_S: float = 30.0  # open this long before a trial call
+    LLM_MAX_CONCURRENCY: Optional[int] = None  # calls in flight; more callers queue
+    LLM_QUEUE_TIMEOUT_S: Optional[float] = None  # queued callers give up and fall back after this
+    LLM_HEDGE_PERCENTILE: Optional[float] = None  # e.g. 0.95: second call when the first is slower
+    LLM_HEDGE_MIN_DELAY_S: float = 0.5
+
+    # Embeddings
+    EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    EMBEDDING_PRELOAD_MODELS: str = ""  # comma-separated, loaded in addition to EMBEDDING_MODEL
+    EMBEDDING_WARMUP: bool = True
+    # CPU runtime: torch | onnx (graph exported once into EMBEDDING_ONNX_DIR, needs onnxruntime)
+    EMBEDDING_BACKEND: str = "torch"
+    EMBEDDING_ONNX_QUANTIZATION: str = "none"  # none | avx2 | avx512 | avx512_vnni | arm64: dynamic int8 weights
+    EMBEDDING_ONNX_DIR: str = "./data/onnx"
+    EMBEDDING_INTRA_OP_THREADS: Optional[int] = None  # None keeps the runtime default; torch applies it process-wide
+    EMBEDDING_BATCHING_ENABLED: bool = True
+    EMBEDDING_BATCH_MAX_SIZE: int = 32
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0
+    EMBEDDING_EXECUTOR_WORKERS: int = 2  # threads for encode calls made from async routes
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 10000
+    EMBEDDING_CACHE_TTL_S: Optional[float] = None
+    EMBEDDING_CACHE_DISK_PATH: Optional[str] = None  # SQLite file for a restart-surviving tier
+
+    # LLM response cache (per worker; invalidated on ingest)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1000
+    RESPONSE_CACHE_TTL_S: Optional[float] = 600.0
+    RESPONSE_CACHE_SEMANTIC_THRESHOLD: Optional[float] = None  # cosine, e.g. 0.97; None disables
+
+    # Chunking (token counts use the embedding model's tokenizer)
+    CHUNKING_ENABLED: bool = True
+    CHUNK_MAX_TOKENS: int = 200  # clamped to the model's max_seq_length
+    CHUNK_OVERLAP_TOKENS: int = 40
+    STREAM_INGEST_BATCH_SIZE: int = 64  # chunks embedded and inserted per batch
+
+    # Bulk ingestion
+    BULK_MAX_DOCUMENTS: int = 10000
+    BULK_EMBED_BATCH_SIZE: int = 128
+    BULK_INSERT_BATCH_SIZE: int = 1000
+
+    # Batch financial analysis (/financial/analyze/batch and /financial/analyze/jobs)
+    FINANCIAL_BATCH_MAX_DOCUMENTS: int = 100  # per synchronous request
+    FINANCIAL_JOB_MAX_DOCUMENTS: int = 10000
+    FINANCIAL_BATCH_SIZE: int = 64  # documents embedded and retrieved together
+    FINANCIAL_BATCH_CONCURRENCY: int = 8  # LLM calls in flight, shared by all batches of a worker
+    FINANCIAL_BATCH_RATE_PER_S: Optional[float] = None  # LLM calls started per second per worker
+    FINANCIAL_JOB_TTL_S: float = 3600.0  # how long finished jobs stay pollable
+
+    @property
+    def embedding_models(self) -> List[str]:
+        extra = [m.strip() for m in self.EMBEDDING_PRELOAD_MODELS.split(",") if m.strip()]
+        return [self.EMBEDDING_MODEL] + [m for m in extra if m != self.EMBEDDING_MODEL]
+
     class Config:
         env_file = ".env"
 
 settings = Settings()
-
@@ -0,0 +1,110 @@
+import json
+from typing import Any, Dict, List, Tuple
+
+_OPEN = {"{": "}", "[": "]"}
+
+
+class JsonObjectStream:
+    """
+    Validates a JSON object while it arrives in pieces, e.g. streamed LLM
+    output.
+
+    feed() returns the top-level members completed by the new text as
+    (key, value) pairs and raises ValueError as soon as the text can no
+    longer be a JSON object: wrong first character, mismatched brackets, a
+    malformed member or trailing text. close() raises if the object is
+    incomplete and returns it otherwise.
+
+    Only nesting and string state is tracked per character; each top-level
+    member is parsed with json once its closing comma or brace arrives.
+    """
+
+    def __init__(self):
+        self.value: Dict[str, Any] = {}
+        self._member: List[str] = []
+        self._keyed = False
+        self._stack: List[str] = []
+        self._started = False
+        self._done = False
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        members = []
+
+        for char in text:
+            if self._done:
+                if not char.isspace():
+                    raise ValueError("Unexpected text after the JSON object.")
+                continue
+
+            if not self._started:
+                if char.isspace():
+                    continue
+                if char != "{":
+                    raise ValueError("Expected a JSON object.")
+                self._started = True
+                self._stack.append("}")
+                continue
+
+            if self._in_string:
+                self._member.append(char)
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            depth = len(self._stack)
+            if depth == 1 and char in ",}":
+                member = self._end_member(closing=char == "}")
+                if member is not None:
+                    members.append(member)
+                if char == "}":
+                    self._stack.pop()
+                    self._done = True
+                continue
+
+            if depth == 1 and not self._keyed and not char.isspace():
+                # Every member starts with its key
+                if char != '"':
+                    raise ValueError(f"Expected a key, got {char!r}.")
+                self._keyed = True
+
+            self._member.append(char)
+            if char == '"':
+                self._in_string = True
+            elif char in _OPEN:
+                self._stack.append(_OPEN[char])
+            elif char in "}]":
+                if self._stack.pop() != char:
+                    raise ValueError(f"Mismatched {char!r}.")
+
+        return members
+
+    def close(self) -> Dict[str, Any]:
+        if not self._done:
+            raise ValueError("Incomplete JSON object.")
+        return self.value
+
+    def _end_member(self, closing: bool):
+        text = "".join(self._member).strip()
+        self._member = []
+        self._keyed = False
+
+        if not text:
+            # "{}" is the only place a member may be empty
+            if closing and not self.value:
+                return None
+            raise ValueError("Empty member.")
+
+        try:
+            parsed = json.loads("{" + text + "}")
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"Invalid member {text[:40]!r}: {exc.msg}") from exc
+
+        ((key, value),) = parsed.items()
+        self.value[key] = value
+        return key, value
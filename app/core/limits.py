@@ -0,0 +1,92 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Iterable, List, Optional
+
+
+class RateLimiter:
+    """
+    Token bucket for asyncio callers: acquire() returns at most rate_per_s
+    times per second on average, with bursts of up to burst calls. Waiters
+    are served in arrival order.
+    """
+
+    def __init__(self, rate_per_s: float, burst: int = 1):
+        if rate_per_s <= 0:
+            raise ValueError("rate_per_s must be > 0.")
+        if burst < 1:
+            raise ValueError("burst must be >= 1.")
+
+        self.rate_per_s = rate_per_s
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        # One waiter at a time sleeps for the next token; the rest queue on the lock
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate_per_s)
+                self._refill()
+            self._tokens -= 1
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate_per_s)
+        self._updated = now
+
+
+class CallLimiter:
+    """
+    Async context manager bounding calls to a downstream service: at most
+    max_concurrency inside at once and, with rate_per_s, a start rate.
+    Callers over either limit wait their turn.
+    """
+
+    def __init__(self, max_concurrency: int, rate_per_s: Optional[float] = None):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1.")
+
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._rate = RateLimiter(rate_per_s) if rate_per_s else None
+
+    async def __aenter__(self) -> "CallLimiter":
+        await self._semaphore.acquire()
+        if self._rate is not None:
+            try:
+                await self._rate.acquire()
+            except BaseException:
+                # Cancelled while waiting for the rate limit
+                self._semaphore.release()
+                raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self._semaphore.release()
+
+
+async def gather_limited(
+    calls: Iterable[Callable[[], Awaitable]], limit: int, return_exceptions: bool = False
+) -> List:
+    """
+    asyncio.gather over calls, with at most limit of them running at once.
+    Without return_exceptions, the first failure cancels the calls still
+    running or waiting and is raised once they have finished.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(call):
+        async with semaphore:
+            return await call()
+
+    tasks = [asyncio.ensure_future(run(call)) for call in calls]
+    try:
+        results = await asyncio.gather(*tasks, return_exceptions=return_exceptions)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    return list(results)
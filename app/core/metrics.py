@@ -0,0 +1,94 @@
+from prometheus_client import Counter, Histogram
+
+# Prometheus metrics for the request path, exposed at /metrics.
+#
+# Values are per worker process. Label values are bounded (route templates,
+# stage and provider names, attempt numbers); never label with ids or text.
+# Gauges and counters that components already track (pools, caches) are
+# read from their stats() at scrape time instead, see app/api/metrics.py.
+
+_STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+_LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0)
+_REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+REQUEST_SECONDS = Histogram(
+    "vectorengine_http_request_duration_seconds",
+    "Whole HTTP request, by route template.",
+    ["method", "route", "status"],
+    buckets=_REQUEST_BUCKETS,
+)
+
+STAGE_SECONDS = Histogram(
+    "vectorengine_stage_duration_seconds",
+    "Retrieval pipeline stages: embed, vector_search, hybrid_search, rerank, context.",
+    ["stage"],
+    buckets=_STAGE_BUCKETS,
+)
+
+LLM_SECONDS = Histogram(
+    "vectorengine_llm_request_duration_seconds",
+    "LLM generation as seen by the orchestrator, including provider retries.",
+    ["provider", "role", "outcome"],
+    buckets=_LLM_BUCKETS,
+)
+
+LLM_FIRST_TOKEN_SECONDS = Histogram(
+    "vectorengine_llm_first_token_seconds",
+    "Streamed generation: time until the first token, including provider retries.",
+    ["provider", "role"],
+    buckets=_LLM_BUCKETS,
+)
+
+LLM_ATTEMPT_SECONDS = Histogram(
+    "vectorengine_llm_attempt_duration_seconds",
+    "Single provider API call.",
+    ["provider", "attempt", "outcome"],
+    buckets=_LLM_BUCKETS,
+)
+
+LLM_RETRIES = Counter(
+    "vectorengine_llm_retries_total",
+    "Provider API calls retried after a failure.",
+    ["provider"],
+)
+
+LLM_FALLBACKS = Counter(
+    "vectorengine_llm_fallbacks_total",
+    "Requests answered by the fallback LLM, by failed primary provider.",
+    ["provider"],
+)
+
+LLM_CIRCUIT_TRANSITIONS = Counter(
+    "vectorengine_llm_circuit_transitions_total",
+    "Circuit breaker state changes, by new state: open, half_open, closed.",
+    ["provider", "state"],
+)
+
+LLM_REJECTIONS = Counter(
+    "vectorengine_llm_rejected_total",
+    "Provider calls refused without an attempt: circuit_open, queue_timeout.",
+    ["provider", "reason"],
+)
+
+LLM_HEDGES = Counter(
+    "vectorengine_llm_hedges_total",
+    "Hedged second calls: fired, and won when they answered first.",
+    ["provider", "outcome"],
+)
+
+RERANKS = Counter(
+    "vectorengine_rerank_total",
+    "Rerank stage outcomes: applied, budget_exceeded, failed.",
+    ["outcome"],
+)
+
+# Children bound once: labels() takes a lock and a dict lookup per call
+EMBED_SECONDS = STAGE_SECONDS.labels("embed")
+VECTOR_SEARCH_SECONDS = STAGE_SECONDS.labels("vector_search")
+HYBRID_SEARCH_SECONDS = STAGE_SECONDS.labels("hybrid_search")
+RERANK_SECONDS = STAGE_SECONDS.labels("rerank")
+CONTEXT_SECONDS = STAGE_SECONDS.labels("context")
+
+
+def search_stage(hybrid: bool):
+    return HYBRID_SEARCH_SECONDS if hybrid else VECTOR_SEARCH_SECONDS
@@ -0,0 +1,116 @@
+from typing import Any, Dict
+
+# Metadata filters are JSON objects keyed by metadata field:
+#
+#   {"client": "acme"}                          equality (JSONB containment)
+#   {"doc_type": {"in": ["10-K", "10-Q"]}}      any of
+#   {"status": {"ne": "draft"}}                 not equal
+#   {"period": {"gte": "2024-01", "lt": "2025-01"}, "amount": {"gt": 1000}}
+#
+# All conditions must hold. Range operators compare numbers with numbers
+# and strings with strings; values of another type never match.
+
+MetadataFilter = Dict[str, Any]
+
+RANGE_OPERATORS = {"gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+OPERATORS = {"eq", "ne", "in"} | set(RANGE_OPERATORS)
+
+
+def validate_filter(metadata_filter: MetadataFilter) -> MetadataFilter:
+    """Raise ValueError unless the filter follows the grammar above."""
+    if not isinstance(metadata_filter, dict):
+        raise ValueError("filter must be an object keyed by metadata field.")
+
+    for key, condition in metadata_filter.items():
+        if not isinstance(key, str) or not key:
+            raise ValueError("filter keys must be non-empty strings.")
+        if not _is_operator_object(condition):
+            continue
+
+        for operator, value in condition.items():
+            if operator == "in":
+                if not isinstance(value, list) or not value:
+                    raise ValueError(f"'{key}.in' must be a non-empty list.")
+            elif operator in RANGE_OPERATORS:
+                if not range_type(value):
+                    raise ValueError(f"'{key}.{operator}' must be a number or a string.")
+
+    return metadata_filter
+
+
+def conditions(metadata_filter: MetadataFilter):
+    """(key, operator, value) triples, with plain values as eq."""
+    for key, condition in metadata_filter.items():
+        if _is_operator_object(condition):
+            for operator, value in condition.items():
+                yield key, operator, value
+        else:
+            yield key, "eq", condition
+
+
+def range_type(value: Any):
+    """JSON type name used for range comparisons, None if not comparable."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    return None
+
+
+def matches(metadata: Dict[str, Any], metadata_filter: MetadataFilter) -> bool:
+    """Python evaluation with the same semantics as the SQL translation."""
+    for key, operator, value in conditions(metadata_filter):
+        if operator == "eq":
+            if key not in metadata or not contains(metadata[key], value):
+                return False
+        elif operator == "ne":
+            if key in metadata and contains(metadata[key], value):
+                return False
+        elif operator == "in":
+            if key not in metadata or not any(contains(metadata[key], v) for v in value):
+                return False
+        else:
+            stored = metadata.get(key)
+            if range_type(stored) is None or range_type(stored) != range_type(value):
+                return False
+            if not _compare(stored, operator, value):
+                return False
+    return True
+
+
+def contains(stored: Any, wanted: Any) -> bool:
+    """JSONB containment (@>) for a single value."""
+    if isinstance(wanted, dict):
+        return isinstance(stored, dict) and all(
+            k in stored and contains(stored[k], v) for k, v in wanted.items()
+        )
+    if isinstance(wanted, list):
+        return isinstance(stored, list) and all(
+            any(contains(s, w) for s in stored) for w in wanted
+        )
+    if isinstance(stored, (dict, list)):
+        # Nested containers never equal a scalar (use {"tags": ["a"]} for membership)
+        return False
+    if isinstance(stored, bool) or isinstance(wanted, bool):
+        return stored is wanted
+    return stored == wanted
+
+
+def _compare(stored, operator: str, value) -> bool:
+    if operator == "gt":
+        return stored > value
+    if operator == "gte":
+        return stored >= value
+    if operator == "lt":
+        return stored < value
+    return stored <= value
+
+
+def _is_operator_object(condition: Any) -> bool:
+    return (
+        isinstance(condition, dict)
+        and bool(condition)
+        and all(operator in OPERATORS for operator in condition)
+    )
@@ -1,29 +1,245 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional, Sequence, Tuple
+
+from app.domain.filters import MetadataFilter
 
 class EmbeddingProvider(ABC):
     """
     Contract for embedding generation. 
     Domain depens on this abstraction only.
+
+    Embeddings are float sequences; infrastructure implementations return
+    float32 NumPy arrays so vectors are never materialized as Python lists.
     """
 
     @abstractmethod
     def generate_embedding(self, text: str) -> List[float]:
         pass
 
+    def generate_embeddings(self, texts: Sequence[str]) -> List[List[float]]:
+        """
+        Batch variant. Providers that can encode several texts in one call
+        should override this; the default falls back to one call per text.
+        """
+        return [self.generate_embedding(text) for text in texts]
+
+    async def agenerate_embedding(self, text: str) -> List[float]:
+        """
+        Async variant. Embedding is CPU-bound, so the default runs the sync
+        implementation off the event loop.
+        """
+        return await asyncio.to_thread(self.generate_embedding, text)
+
+    async def agenerate_embeddings(self, texts: Sequence[str]) -> List[List[float]]:
+        return await asyncio.to_thread(self.generate_embeddings, texts)
+
 class VectorRepository(ABC):
     """
     Contract for vector storage and retrieval
     """
 
     @abstractmethod
-    def save(self, chunk_id: str, content: str, embedding: List[float]) -> None:
+    def save(
+        self,
+        chunk_id: str,
+        content: str,
+        embedding: List[float],
+        document_id: Optional[str] = None,
+        chunk_index: int = 0,
+        metadata: Optional[dict] = None,
+    ) -> None:
+        """Without a document_id the chunk is stored as its own document."""
+        pass
+
+    @abstractmethod
+    def save_many(self, items: Sequence[Tuple[str, str, int, str, dict, List[float]]]) -> None:
+        """
+        Persist many (chunk_id, document_id, chunk_index, content, metadata,
+        embedding) rows in a single transaction. Either all rows are stored
+        or none are.
+        """
+        pass
+
+    @abstractmethod
+    def delete_document(self, document_id: str) -> int:
+        pass
+
+    @abstractmethod
+    def similarity_search(
+        self,
+        embedding: List[float],
+        k: int,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        metadata_filter: Optional[MetadataFilter] = None,
+    ):
+        """
+        Return the k nearest chunks as dicts with id, document_id,
+        chunk_index, content, metadata and score, where score is a
+        similarity (higher is more similar).
+
+        With a metadata_filter (see app.domain.filters) only matching chunks
+        are considered, and k results are returned whenever at least k
+        chunks match.
+        """
+        pass
+
+    def similarity_search_many(
+        self,
+        embeddings: Sequence[List[float]],
+        k: int,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        metadata_filter: Optional[MetadataFilter] = None,
+    ) -> List[list]:
+        """
+        similarity_search() for each embedding, results in the same order.
+        Backends override this to search all of them at once.
+        """
+        return [
+            self.similarity_search(embedding, k, probes, ef_search, metadata_filter)
+            for embedding in embeddings
+        ]
+
+    def hybrid_search(
+        self,
+        embedding: List[float],
+        query_text: str,
+        k: int,
+        candidates: int = 50,
+        semantic_weight: float = 1.0,
+        lexical_weight: float = 1.0,
+        rrf_k: int = 60,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        metadata_filter: Optional[MetadataFilter] = None,
+    ):
+        """
+        Fuse the top `candidates` of vector and lexical retrieval with
+        weighted reciprocal rank fusion. Results carry the fused score plus
+        semantic_rank and lexical_rank (None when absent from that leg).
+        Optional capability; backends without it raise NotImplementedError.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support hybrid search.")
+
+
+class AsyncVectorRepository(ABC):
+    """
+    Async contract for vector storage and retrieval.
+    Same semantics as VectorRepository.
+    """
+
+    @abstractmethod
+    async def asave(
+        self,
+        chunk_id: str,
+        content: str,
+        embedding: List[float],
+        document_id: Optional[str] = None,
+        chunk_index: int = 0,
+        metadata: Optional[dict] = None,
+    ) -> None:
         pass
 
     @abstractmethod
-    def similarity_search(self, embedding: List[float], k: int):
+    async def asave_many(self, items: Sequence[Tuple[str, str, int, str, dict, List[float]]]) -> None:
         pass
 
+    @abstractmethod
+    async def adelete_document(self, document_id: str) -> int:
+        pass
+
+    @abstractmethod
+    async def asimilarity_search(
+        self,
+        embedding: List[float],
+        k: int,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        metadata_filter: Optional[MetadataFilter] = None,
+    ):
+        pass
+
+    async def asimilarity_search_many(
+        self,
+        embeddings: Sequence[List[float]],
+        k: int,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        metadata_filter: Optional[MetadataFilter] = None,
+    ) -> List[list]:
+        return [
+            await self.asimilarity_search(embedding, k, probes, ef_search, metadata_filter)
+            for embedding in embeddings
+        ]
+
+    async def ahybrid_search(self, embedding: List[float], query_text: str, k: int, **params):
+        raise NotImplementedError(f"{type(self).__name__} does not support hybrid search.")
+
+
+class ResponseCache(ABC):
+    """
+    Contract for caching generated responses.
+
+    Exact lookups use a key derived from the full request; similarity
+    lookups match a query embedding against cached entries in the same
+    namespace (same prompts, model and generation parameters).
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def get_similar(self, namespace: str, embedding) -> Optional[str]:
+        pass
+
+    @property
+    def generation(self) -> int:
+        """Incremented by invalidate(); read before retrieval and passed to put()."""
+        return 0
+
+    @abstractmethod
+    def put(
+        self, key: str, namespace: str, response: str, embedding=None, generation: Optional[int] = None
+    ) -> None:
+        """Answers built before an invalidate() (older generation) are not stored."""
+        pass
+
+    @abstractmethod
+    def invalidate(self) -> None:
+        """Drop all entries, e.g. after the knowledge base changed."""
+        pass
+
+
+class Reranker(ABC):
+    """
+    Contract for scoring query relevance of retrieved passages.
+
+    Scores are only comparable within one call (higher is more relevant).
+    With a timeout_s, implementations return None instead of scores when
+    they cannot finish in time, so callers can keep the retrieval order.
+    """
+
+    @abstractmethod
+    def score(
+        self, query: str, passages: Sequence[str], timeout_s: Optional[float] = None
+    ) -> Optional[List[float]]:
+        pass
+
+    async def ascore(
+        self, query: str, passages: Sequence[str], timeout_s: Optional[float] = None
+    ) -> Optional[List[float]]:
+        return await asyncio.to_thread(self.score, query, passages, timeout_s)
+
+
+class ProviderUnavailable(RuntimeError):
+    """
+    The provider refused a call without attempting it (open circuit, full
+    queue). Callers should go straight to their fallback.
+    """
+
 
 class LLMProvider(ABC):
     """
@@ -0,0 +1,198 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.domain.services import ResponseCache
+
+
+class _Entry:
+    __slots__ = ("namespace", "response", "embedding", "created_at")
+
+    def __init__(self, namespace: str, response: str, embedding: Optional[np.ndarray], created_at: float):
+        self.namespace = namespace
+        self.response = response
+        self.embedding = embedding
+        self.created_at = created_at
+
+
+class InMemoryResponseCache(ResponseCache):
+    """
+    Per-process LLM response cache.
+
+    - Exact tier: key is a hash of everything that determines the answer
+      (system prompt, rendered user prompt, model, temperature, format).
+    - Semantic tier (optional): within a namespace (same prompts/model/
+      parameters), returns the answer cached for a query whose embedding
+      has cosine similarity >= semantic_threshold with the new one.
+
+    Entries expire after ttl_s and the least recently used are evicted
+    beyond max_entries. invalidate() drops everything and starts a new
+    generation, so answers still being generated from the old knowledge
+    base are not stored; it is local to the worker process.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttl_s: Optional[float] = 600.0,
+        semantic_threshold: Optional[float] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.semantic_threshold = semantic_threshold
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # namespace -> (keys, normalized embedding matrix), rebuilt lazily
+        self._matrices: Dict[str, Tuple[List[str], np.ndarray]] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.stale_puts = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self.semantic_threshold is not None
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._expire_if_stale(key, entry, now):
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry.response
+
+            self.misses += 1
+            return None
+
+    def get_similar(self, namespace: str, embedding) -> Optional[str]:
+        if not self.semantic_enabled:
+            return None
+
+        query = self._normalize(embedding)
+        now = time.time()
+
+        with self._lock:
+            keys, matrix = self._matrix(namespace)
+            if not keys:
+                return None
+
+            scores = matrix @ query
+            # Best first among those above the threshold, skipping expired entries
+            for best in np.argsort(-scores):
+                if scores[best] < self.semantic_threshold:
+                    break
+
+                key = keys[best]
+                entry = self._entries.get(key)
+                if entry is None or self._expire_if_stale(key, entry, now):
+                    continue
+
+                self._entries.move_to_end(key)
+                self.semantic_hits += 1
+                return entry.response
+
+            return None
+
+    def put(
+        self, key: str, namespace: str, response: str, embedding=None, generation: Optional[int] = None
+    ) -> None:
+        vector = (
+            self._normalize(embedding)
+            if self.semantic_enabled and embedding is not None
+            else None
+        )
+
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                # Built from retrieval that ran before the last invalidate()
+                self.stale_puts += 1
+                return
+
+            self._entries[key] = _Entry(namespace, response, vector, time.time())
+            self._entries.move_to_end(key)
+            self._matrices.pop(namespace, None)
+
+            while len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._matrices.pop(evicted.namespace, None)
+                self.evictions += 1
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._matrices.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.exact_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl_s,
+                "semantic_threshold": self.semantic_threshold,
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "stale_puts": self.stale_puts,
+                # Semantic hits short-circuit before the exact lookup
+                "hit_rate": round(
+                    (self.exact_hits + self.semantic_hits) / (lookups + self.semantic_hits), 4
+                )
+                if lookups + self.semantic_hits
+                else 0.0,
+            }
+
+    # -----------------------------
+    # Internals (caller holds the lock)
+    # -----------------------------
+
+    def _expire_if_stale(self, key: str, entry: _Entry, now: float) -> bool:
+        if self.ttl_s is None or now - entry.created_at <= self.ttl_s:
+            return False
+        del self._entries[key]
+        self._matrices.pop(entry.namespace, None)
+        self.expirations += 1
+        return True
+
+    def _matrix(self, namespace: str) -> Tuple[List[str], np.ndarray]:
+        cached = self._matrices.get(namespace)
+        if cached is None:
+            keys = [
+                key
+                for key, entry in self._entries.items()
+                if entry.namespace == namespace and entry.embedding is not None
+            ]
+            matrix = (
+                np.stack([self._entries[key].embedding for key in keys])
+                if keys
+                else np.empty((0, 0), dtype=np.float32)
+            )
+            cached = (keys, matrix)
+            self._matrices[namespace] = cached
+        return cached
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
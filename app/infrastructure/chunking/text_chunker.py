@@ -0,0 +1,217 @@
+import asyncio
+import re
+from typing import AsyncIterable, AsyncIterator, Callable, Iterable, Iterator, List, Sequence, Tuple
+
+# Sentence ends followed by something that does not look like a continuation
+# (lowercase after "e.g. " or "approx. "), or a blank line between paragraphs.
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+(?=[^a-z])|\n\s*\n")
+_APPROXIMATE_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+TokenCounter = Callable[[Sequence[str]], List[int]]
+
+
+def approximate_token_count(texts: Sequence[str]) -> List[int]:
+    """Word and punctuation count; a lower bound for WordPiece/BPE tokenizers."""
+    return [len(_APPROXIMATE_TOKEN.findall(text)) for text in texts]
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_BOUNDARY.split(text) if s and s.strip()]
+
+
+class _ChunkPacker:
+    """
+    Greedy packing of sentences into chunks of at most max_tokens, carrying
+    the trailing sentences (up to overlap_tokens) into the next chunk.
+    """
+
+    def __init__(self, max_tokens: int, overlap_tokens: int):
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self._pieces: List[Tuple[str, int]] = []
+        self._tokens = 0
+        # Pieces carried over from the previous chunk only; never emitted alone
+        self._carried = 0
+
+    def add(self, piece: str, tokens: int) -> List[str]:
+        emitted = []
+
+        if self._pieces and self._tokens + tokens > self.max_tokens:
+            if len(self._pieces) > self._carried:
+                emitted.append(self._join())
+            self._carry_overlap()
+            # Drop overlap that would not leave room for the new piece
+            while self._pieces and self._tokens + tokens > self.max_tokens:
+                _, dropped = self._pieces.pop(0)
+                self._tokens -= dropped
+                self._carried -= 1
+
+        self._pieces.append((piece, tokens))
+        self._tokens += tokens
+        return emitted
+
+    def flush(self) -> List[str]:
+        if len(self._pieces) > self._carried:
+            chunk = self._join()
+            self._pieces, self._tokens, self._carried = [], 0, 0
+            return [chunk]
+        return []
+
+    def _join(self) -> str:
+        return " ".join(piece for piece, _ in self._pieces)
+
+    def _carry_overlap(self) -> None:
+        carried: List[Tuple[str, int]] = []
+        tokens = 0
+        for piece, count in reversed(self._pieces):
+            if tokens + count > self.overlap_tokens:
+                break
+            carried.insert(0, (piece, count))
+            tokens += count
+
+        self._pieces = carried
+        self._tokens = tokens
+        self._carried = len(carried)
+
+
+class TextChunker:
+    """
+    Token-aware splitting of documents into embedding-sized chunks.
+
+    Chunks end on sentence boundaries and hold at most max_tokens tokens as
+    counted by count_tokens (the embedding model's tokenizer, so nothing is
+    truncated at encode time). Consecutive chunks share up to
+    overlap_tokens of trailing sentences. Sentences longer than max_tokens
+    are split on word boundaries, without overlap, and words longer than
+    max_tokens on their own are cut between characters.
+    """
+
+    def __init__(
+        self,
+        count_tokens: TokenCounter = approximate_token_count,
+        max_tokens: int = 200,
+        overlap_tokens: int = 40,
+        stream_window_chars: int = 16384,
+    ):
+        if max_tokens < 1:
+            raise ValueError("max_tokens must be positive.")
+        if not 0 <= overlap_tokens < max_tokens:
+            raise ValueError("overlap_tokens must be in [0, max_tokens).")
+
+        self.count_tokens = count_tokens
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        # Text buffered before splitting during streaming; bounds memory
+        self.stream_window_chars = stream_window_chars
+
+    def split(self, text: str) -> List[str]:
+        packer = self._packer()
+        chunks = self._feed(packer, split_sentences(text))
+        return chunks + packer.flush()
+
+    def stream(self, pieces: Iterable[str]) -> Iterator[str]:
+        """Chunk text arriving in pieces, holding at most a window of it in memory."""
+        packer = self._packer()
+        buffer = ""
+
+        for piece in pieces:
+            buffer += piece
+            if len(buffer) >= self.stream_window_chars:
+                complete, buffer = self._complete_sentences(buffer)
+                yield from self._feed(packer, complete)
+
+        yield from self._feed(packer, split_sentences(buffer))
+        yield from packer.flush()
+
+    async def astream(self, pieces: AsyncIterable[str]) -> AsyncIterator[str]:
+        packer = self._packer()
+        buffer = ""
+
+        async for piece in pieces:
+            buffer += piece
+            if len(buffer) >= self.stream_window_chars:
+                complete, buffer = self._complete_sentences(buffer)
+                # Tokenizing a window is CPU-bound; keep it off the event loop
+                for chunk in await asyncio.to_thread(self._feed, packer, complete):
+                    yield chunk
+
+        for chunk in await asyncio.to_thread(self._feed, packer, split_sentences(buffer)):
+            yield chunk
+        for chunk in packer.flush():
+            yield chunk
+
+    # -----------------------------
+    # Internals
+    # -----------------------------
+
+    def _packer(self) -> _ChunkPacker:
+        return _ChunkPacker(self.max_tokens, self.overlap_tokens)
+
+    def _feed(self, packer: _ChunkPacker, sentences: List[str]) -> List[str]:
+        chunks = []
+        if not sentences:
+            return chunks
+
+        for sentence, tokens in zip(sentences, self.count_tokens(sentences)):
+            if tokens <= self.max_tokens:
+                chunks.extend(packer.add(sentence, tokens))
+                continue
+            for part, part_tokens in self._split_long(sentence):
+                chunks.extend(packer.add(part, part_tokens))
+
+        return chunks
+
+    def _split_long(self, sentence: str) -> List[Tuple[str, int]]:
+        words = sentence.split()
+        parts: List[Tuple[str, int]] = []
+        current: List[str] = []
+        tokens = 0
+
+        for word, count in zip(words, self.count_tokens(words)):
+            if current and tokens + count > self.max_tokens:
+                parts.append((" ".join(current), tokens))
+                current, tokens = [], 0
+            if count > self.max_tokens:
+                # No whitespace to split on (CJK, URLs, base64): cut the word itself
+                pieces = self._split_word(word)
+                parts.extend(pieces[:-1])
+                word, count = pieces[-1]
+            current.append(word)
+            tokens += count
+
+        if current:
+            parts.append((" ".join(current), tokens))
+        return parts
+
+    def _split_word(self, word: str) -> List[Tuple[str, int]]:
+        """Longest character prefixes within max_tokens (binary search on the length)."""
+        pieces: List[Tuple[str, int]] = []
+        while word:
+            low, high = 1, len(word)
+            while low < high:
+                middle = (low + high + 1) // 2
+                if self.count_tokens([word[:middle]])[0] <= self.max_tokens:
+                    low = middle
+                else:
+                    high = middle - 1
+            piece = word[:low]
+            pieces.append((piece, self.count_tokens([piece])[0]))
+            word = word[low:]
+        return pieces
+
+    def _complete_sentences(self, buffer: str) -> Tuple[List[str], str]:
+        """Split off the sentences that cannot grow anymore; keep the last one buffered."""
+        sentences = split_sentences(buffer)
+        if len(sentences) > 1:
+            tail_start = buffer.rfind(sentences[-1])
+            return sentences[:-1], buffer[tail_start:]
+
+        # One unterminated run of text: cut at the last whitespace so the
+        # buffer stays bounded without splitting a word
+        if len(buffer) < 2 * self.stream_window_chars:
+            return [], buffer
+        cut = max(buffer.rfind(" "), buffer.rfind("\n"))
+        if cut <= 0:
+            # No whitespace at all: split mid-word rather than buffer forever
+            cut = len(buffer) - self.stream_window_chars
+        return [buffer[:cut].strip()], buffer[cut:]
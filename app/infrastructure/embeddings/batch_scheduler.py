@@ -0,0 +1,139 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class EmbeddingBatchScheduler:
+    """
+    Micro-batching front for a shared embedding model.
+
+    Callers submit single texts and get a Future back. A worker thread
+    collects submissions arriving within max_wait_ms (up to max_batch_size
+    texts), runs them through one encode call and routes each vector back
+    to its caller. A lone request waits at most max_wait_ms extra.
+    """
+
+    def __init__(self, model, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1.")
+
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000.0
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+        # Makes the closed check and the put one step, so _STOP is always the last item
+        self._submit_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"embedding-batcher-{getattr(model, 'name', 'model')}",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        future: Future = Future()
+        with self._submit_lock:
+            if self._closed:
+                raise RuntimeError("Embedding scheduler is closed.")
+            self._queue.put((text, future))
+        return future
+
+    def encode(self, text: str):
+        return self.submit(text).result()
+
+    def close(self, timeout: float = 5.0) -> None:
+        with self._submit_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_s * 1000.0,
+            "batches": self._batches,
+            "items": self._items,
+            "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+            "queued": self._queue.qsize(),
+        }
+
+    # -----------------------------
+    # Worker
+    # -----------------------------
+
+    def _run(self) -> None:
+        stopping = False
+
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            batch: List[Tuple[str, Future]] = [item]
+            deadline = time.monotonic() + self.max_wait_s
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    # Drain whatever is already queued even once the window closed
+                    item = (
+                        self._queue.get(timeout=remaining)
+                        if remaining > 0
+                        else self._queue.get_nowait()
+                    )
+                except queue.Empty:
+                    break
+
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._process(batch)
+
+    def _process(self, batch: List[Tuple[str, Future]]) -> None:
+        batch = [(text, f) for text, f in batch if f.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        texts = [text for text, _ in batch]
+        start = time.perf_counter()
+
+        try:
+            vectors = self.model.encode(texts, batch_size=len(texts))
+        except Exception as exc:
+            logger.warning(
+                "embedding_batch_failed size=%d error=%s",
+                len(texts),
+                str(exc),
+                exc_info=True,
+            )
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+
+        self._batches += 1
+        self._items += len(texts)
+
+        logger.debug(
+            "embedding_batch_completed size=%d duration_s=%.3f",
+            len(texts),
+            time.perf_counter() - start,
+        )
+
+        for (_, future), vector in zip(batch, vectors):
+            future.set_result(vector)
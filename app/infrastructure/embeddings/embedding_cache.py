@@ -0,0 +1,287 @@
+import asyncio
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.domain.services import EmbeddingProvider
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form used for cache keys. Only changes that cannot affect the
+    embedding are applied: Unicode NFC and whitespace collapsing.
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def cache_key(model_name: str, text: str, backend: str = "torch") -> str:
+    # The runtime is part of the key: ONNX and int8 vectors differ slightly from
+    # torch ones. torch keeps the original key so existing disk caches stay valid.
+    namespace = model_name if backend == "torch" else f"{model_name}\x00{backend}"
+    payload = f"{namespace}\x00{normalize_text(text)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class _DiskTier:
+    """SQLite-backed second tier so warm entries survive restarts."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[List[float], float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vector, created_at FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32), row[1]
+
+    def put_many(self, entries: Sequence[Tuple[str, List[float]]], created_at: float) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, created_at) VALUES (?, ?, ?)",
+                [
+                    (key, np.asarray(vector, dtype=np.float32).tobytes(), created_at)
+                    for key, vector in entries
+                ],
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class EmbeddingCache:
+    """
+    Bounded LRU cache of embeddings with optional TTL and disk tier.
+
+    Keys are content hashes of (model name, normalized text), so the cache
+    never holds raw document text in memory or on disk.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_s: Optional[float] = None,
+        disk_path: Optional[str] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries: "OrderedDict[str, Tuple[List[float], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = _DiskTier(disk_path) if disk_path else None
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def has_disk(self) -> bool:
+        return self._disk is not None
+
+    def get(self, key: str) -> Optional[List[float]]:
+        vector = self.get_memory(key)
+        if vector is None:
+            vector = self.get_disk(key)
+        return vector
+
+    def get_memory(self, key: str) -> Optional[List[float]]:
+        """In-memory tier only; a miss is counted by the get_disk() that follows."""
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            vector, created_at = entry
+            if self._expired(created_at, now):
+                del self._entries[key]
+                self.expirations += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def get_disk(self, key: str) -> Optional[List[float]]:
+        """Disk tier after a memory miss. Blocking: async callers run it in a thread."""
+        now = time.time()
+
+        if self._disk is not None:
+            stored = self._disk.get(key)
+            if stored is not None:
+                vector, created_at = stored
+                if not self._expired(created_at, now):
+                    self._insert(key, vector, created_at)
+                    with self._lock:
+                        self.disk_hits += 1
+                    return vector
+                self._disk.delete(key)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, vector: List[float]) -> None:
+        self.put_many([(key, vector)])
+
+    def put_many(self, entries: Sequence[Tuple[str, List[float]]]) -> None:
+        created_at = time.time()
+        for key, vector in entries:
+            self._insert(key, vector, created_at)
+        # One disk transaction per batch
+        if self._disk is not None and entries:
+            self._disk.put_many(entries, created_at)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl_s,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_s is not None and now - created_at > self.ttl_s
+
+    def _insert(self, key: str, vector: List[float], created_at: float) -> None:
+        # Own copy (rows of a batch matrix would otherwise pin the whole
+        # matrix), shared between callers, so keep it immutable
+        vector = np.array(vector, dtype=np.float32)
+        vector.setflags(write=False)
+
+        with self._lock:
+            self._entries[key] = (vector, created_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+
+class CachedEmbeddingProvider(EmbeddingProvider):
+    """
+    EmbeddingProvider decorator that consults an EmbeddingCache before
+    delegating to the wrapped provider. Batch calls only send the misses
+    to the wrapped provider.
+    """
+
+    def __init__(
+        self,
+        provider: EmbeddingProvider,
+        cache: EmbeddingCache,
+        model_name: str,
+        backend: str = "torch",
+    ):
+        self.provider = provider
+        self.cache = cache
+        self.model_name = model_name
+        self.backend = backend
+
+    def generate_embedding(self, text: str) -> List[float]:
+        key = cache_key(self.model_name, text, self.backend)
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = self.provider.generate_embedding(text)
+            self.cache.put(key, vector)
+        return vector
+
+    def generate_embeddings(self, texts: Sequence[str]) -> List[List[float]]:
+        keys, vectors, missing = self._lookup(texts)
+        if missing:
+            computed = self.provider.generate_embeddings([texts[i] for i in missing])
+            self._fill(keys, vectors, missing, computed)
+        return vectors
+
+    async def agenerate_embedding(self, text: str) -> List[float]:
+        key = cache_key(self.model_name, text, self.backend)
+        vector = self.cache.get_memory(key)
+        if vector is None:
+            vector = await self._disk_io(lambda: self.cache.get_disk(key))
+        if vector is None:
+            vector = await self.provider.agenerate_embedding(text)
+            await self._disk_io(lambda: self.cache.put(key, vector))
+        return vector
+
+    async def agenerate_embeddings(self, texts: Sequence[str]) -> List[List[float]]:
+        keys = [cache_key(self.model_name, text, self.backend) for text in texts]
+        vectors = [self.cache.get_memory(key) for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if not missing:
+            return vectors
+
+        # SQLite calls would stall the event loop; memory hits never leave it
+        stored = await self._disk_io(lambda: [self.cache.get_disk(keys[i]) for i in missing])
+        for i, vector in zip(missing, stored):
+            vectors[i] = vector
+        missing = [i for i in missing if vectors[i] is None]
+
+        if missing:
+            computed = await self.provider.agenerate_embeddings([texts[i] for i in missing])
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+            await self._disk_io(lambda: self.cache.put_many([(keys[i], vectors[i]) for i in missing]))
+        return vectors
+
+    def close(self) -> None:
+        close = getattr(self.provider, "close", None)
+        if close is not None:
+            close()
+        self.cache.close()
+
+    def _lookup(self, texts: Sequence[str]):
+        keys = [cache_key(self.model_name, text, self.backend) for text in texts]
+        vectors = [self.cache.get(key) for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        return keys, vectors, missing
+
+    def _fill(self, keys, vectors, missing, computed) -> None:
+        for i, vector in zip(missing, computed):
+            vectors[i] = vector
+        self.cache.put_many([(keys[i], vectors[i]) for i in missing])
+
+    async def _disk_io(self, call):
+        if self.cache.has_disk:
+            return await asyncio.to_thread(call)
+        return call()
@@ -1,13 +1,73 @@
-from typing import List
-from sentence_transformers import SentenceTransformer
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Sequence
+
+import numpy as np
+
 from app.domain.services import EmbeddingProvider
+from app.infrastructure.embeddings.batch_scheduler import EmbeddingBatchScheduler
+from app.infrastructure.embeddings.model_registry import model_registry
 
 
 class LocalEmbeddingService(EmbeddingProvider):
 
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
-        self.model = SentenceTransformer(model_name)
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        registry=None,
+        batching: bool = False,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        executor_workers: int = 2,
+    ):
+        self.model_name = model_name
+        # Models are loaded once per process and shared across requests
+        self.model = (registry or model_registry).get(model_name)
+
+        # Concurrent single-text requests are coalesced into one encode batch
+        self.scheduler: Optional[EmbeddingBatchScheduler] = (
+            EmbeddingBatchScheduler(self.model, max_batch_size, max_wait_ms)
+            if batching
+            else None
+        )
+
+        # Bounded pool for CPU-bound encode calls made from the event loop
+        self._executor = ThreadPoolExecutor(
+            max_workers=executor_workers,
+            thread_name_prefix="embedding",
+        )
+
+    # Embeddings are returned as float32 NumPy arrays (2-D for batches) and
+    # handed to the vector store as-is, never converted to Python lists.
+
+    def generate_embedding(self, text: str) -> np.ndarray:
+        if self.scheduler is not None:
+            return self.scheduler.encode(text)
+        return self.model.encode(text)
+
+    def generate_embeddings(
+        self, texts: Sequence[str], batch_size: int = 64
+    ) -> np.ndarray:
+        # Large batches go straight to the model; the scheduler is for single texts
+        return self.model.encode(list(texts), batch_size=batch_size)
+
+    async def agenerate_embedding(self, text: str) -> np.ndarray:
+        if self.scheduler is not None:
+            # The scheduler thread does the work; just await its future
+            return await asyncio.wrap_future(self.scheduler.submit(text))
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.generate_embedding, text)
+
+    async def agenerate_embeddings(
+        self, texts: Sequence[str], batch_size: int = 64
+    ) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self.generate_embeddings, texts, batch_size
+        )
 
-    def generate_embedding(self, text: str) -> List[float]:
-        embedding = self.model.encode(text)
-        return embedding.tolist()
+    def close(self) -> None:
+        if self.scheduler is not None:
+            self.scheduler.close()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,181 @@
+import logging
+import resource
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sentence_transformers import SentenceTransformer
+
+from app.config import settings
+from app.infrastructure.embeddings.runtime import EmbeddingRuntime
+
+logger = logging.getLogger(__name__)
+
+_WARMUP_TEXT = "VectorEngine embedding warm-up."
+
+
+def _resident_memory_mb() -> float:
+    """
+    Current resident set size of the process in MB.
+
+    Reads /proc on Linux (current RSS); falls back to peak RSS elsewhere.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * resource.getpagesize() / (1024 * 1024)
+    except (OSError, IndexError, ValueError):
+        # ru_maxrss is reported in KB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class SharedEmbeddingModel:
+    """
+    A loaded SentenceTransformer shared by every request in the worker.
+
+    HuggingFace fast tokenizers are not safe for concurrent use from
+    multiple threads, so encode calls are serialized per model. Torch still
+    parallelizes each call across its intra-op threads.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        model: SentenceTransformer,
+        load_s: float,
+        rss_delta_mb: float,
+    ) -> None:
+        self.name = name
+        self.model = model
+        self.load_s = load_s
+        self.rss_delta_mb = rss_delta_mb
+        self.warmup_s: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    @property
+    def max_seq_length(self) -> int:
+        """Tokens the model reads per text (including special tokens); the rest is truncated."""
+        return self.model.max_seq_length
+
+    def encode(self, sentences, **kwargs):
+        with self._lock:
+            return self.model.encode(sentences, **kwargs)
+
+    def count_tokens(self, texts: Sequence[str]) -> List[int]:
+        """Tokenizer lengths without special tokens or truncation."""
+        if not texts:
+            return []
+        # Shares the encode lock: the tokenizer is the non-thread-safe part
+        with self._lock:
+            encoded = self.model.tokenizer(
+                list(texts),
+                add_special_tokens=False,
+                return_attention_mask=False,
+                return_token_type_ids=False,
+            )
+        return [len(ids) for ids in encoded["input_ids"]]
+
+    def warmup(self) -> float:
+        start = time.perf_counter()
+        self.encode([_WARMUP_TEXT])
+        self.warmup_s = time.perf_counter() - start
+        return self.warmup_s
+
+
+class EmbeddingModelRegistry:
+    """
+    Process-wide registry of embedding models.
+
+    Each model is loaded at most once per worker process; concurrent
+    requests for a model that is still loading wait for the first load
+    instead of triggering their own.
+    """
+
+    def __init__(self, loader=SentenceTransformer, backend: str = "torch") -> None:
+        self._loader = loader
+        self.backend = backend
+        self._models: Dict[str, SharedEmbeddingModel] = {}
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+    def get(self, model_name: str) -> SharedEmbeddingModel:
+        model = self._models.get(model_name)
+        if model is not None:
+            return model
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(model_name, threading.Lock())
+
+        with load_lock:
+            model = self._models.get(model_name)
+            if model is None:
+                model = self._load(model_name)
+                self._models[model_name] = model
+
+        return model
+
+    def preload(self, model_names: Iterable[str], warmup: bool = True) -> None:
+        for model_name in model_names:
+            model = self.get(model_name)
+
+            if warmup and model.warmup_s is None:
+                warmup_s = model.warmup()
+                logger.info(
+                    "embedding_model_warmed_up model=%s warmup_s=%.3f",
+                    model_name,
+                    warmup_s,
+                )
+
+    def stats(self) -> Dict[str, dict]:
+        return {
+            name: {
+                "dimension": model.dimension,
+                "backend": self.backend,
+                "load_s": round(model.load_s, 3),
+                "warmup_s": (
+                    round(model.warmup_s, 3) if model.warmup_s is not None else None
+                ),
+                "rss_delta_mb": round(model.rss_delta_mb, 1),
+            }
+            for name, model in self._models.items()
+        }
+
+    def _load(self, model_name: str) -> SharedEmbeddingModel:
+        rss_before = _resident_memory_mb()
+        start = time.perf_counter()
+
+        model = self._loader(model_name)
+
+        load_s = time.perf_counter() - start
+        rss_after = _resident_memory_mb()
+
+        logger.info(
+            "embedding_model_loaded model=%s backend=%s load_s=%.3f rss_mb=%.1f rss_delta_mb=%.1f",
+            model_name,
+            self.backend,
+            load_s,
+            rss_after,
+            rss_after - rss_before,
+        )
+
+        return SharedEmbeddingModel(
+            name=model_name,
+            model=model,
+            load_s=load_s,
+            rss_delta_mb=rss_after - rss_before,
+        )
+
+
+_runtime = EmbeddingRuntime(
+    backend=settings.EMBEDDING_BACKEND,
+    onnx_quantization=settings.EMBEDDING_ONNX_QUANTIZATION,
+    intra_op_threads=settings.EMBEDDING_INTRA_OP_THREADS,
+    onnx_dir=settings.EMBEDDING_ONNX_DIR,
+)
+
+# Shared by every LocalEmbeddingService in this worker process
+model_registry = EmbeddingModelRegistry(loader=_runtime.load, backend=_runtime.label)
@@ -0,0 +1,162 @@
+import logging
+import os
+import re
+import tempfile
+import time
+from typing import Optional
+
+from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+try:
+    import onnxruntime
+except ImportError:  # optional, only needed for EMBEDDING_BACKEND=onnx
+    onnxruntime = None
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_BACKENDS = ("torch", "onnx")
+# Dynamic int8 quantization presets of the ONNX Runtime quantizer, per CPU ISA
+ONNX_QUANTIZATIONS = ("none", "avx2", "avx512", "avx512_vnni", "arm64")
+
+# Documented parity with the torch backend: minimum cosine similarity between
+# the two embeddings of the same text, checked by python -m scripts.bench embeddings.
+# The fp32 graph only differs by kernel rounding; int8 weights cost a little more.
+PARITY_MIN_COSINE_ONNX = 0.9999
+PARITY_MIN_COSINE_INT8 = 0.98
+
+_ONNX_FILE = "onnx/model.onnx"
+
+
+class EmbeddingRuntime:
+    """
+    How embedding models execute on CPU.
+
+    The torch backend is plain SentenceTransformer. The onnx backend runs the
+    same model through an ONNX graph exported once into onnx_dir (per model,
+    reused by later processes), optionally with dynamically quantized int8
+    weights. Either way the registry gets a SentenceTransformer, so pooling,
+    normalization, tokenization and max_seq_length are unchanged.
+
+    intra_op_threads is per session for onnx; torch only has a process-wide
+    setting, which also applies to the cross-encoder reranker.
+    """
+
+    def __init__(
+        self,
+        backend: str = "torch",
+        onnx_quantization: str = "none",
+        intra_op_threads: Optional[int] = None,
+        onnx_dir: str = "./data/onnx",
+    ):
+        backend = backend.lower().strip()
+        onnx_quantization = (onnx_quantization or "none").lower().strip()
+
+        if backend not in EMBEDDING_BACKENDS:
+            raise ValueError(
+                f"Unsupported embedding backend: {backend}. Expected one of {list(EMBEDDING_BACKENDS)}."
+            )
+        if onnx_quantization not in ONNX_QUANTIZATIONS:
+            raise ValueError(
+                f"Unsupported ONNX quantization: {onnx_quantization}. "
+                f"Expected one of {list(ONNX_QUANTIZATIONS)}."
+            )
+        if onnx_quantization != "none" and backend != "onnx":
+            raise ValueError("ONNX quantization needs EMBEDDING_BACKEND=onnx.")
+        if intra_op_threads is not None and intra_op_threads < 1:
+            raise ValueError("intra_op_threads must be >= 1.")
+
+        self.backend = backend
+        self.onnx_quantization = onnx_quantization
+        self.intra_op_threads = intra_op_threads
+        self.onnx_dir = onnx_dir
+
+    @property
+    def label(self) -> str:
+        if self.backend == "onnx" and self.onnx_quantization != "none":
+            return f"onnx-int8-{self.onnx_quantization}"
+        return self.backend
+
+    @property
+    def parity_min_cosine(self) -> float:
+        if self.backend == "torch":
+            return 1.0
+        if self.onnx_quantization != "none":
+            return PARITY_MIN_COSINE_INT8
+        return PARITY_MIN_COSINE_ONNX
+
+    def load(self, model_name: str) -> SentenceTransformer:
+        if self.backend == "torch":
+            if self.intra_op_threads is not None:
+                import torch
+
+                torch.set_num_threads(self.intra_op_threads)
+            return SentenceTransformer(model_name)
+
+        if onnxruntime is None:
+            raise RuntimeError(
+                "EMBEDDING_BACKEND=onnx needs onnxruntime and optimum: "
+                "pip install 'sentence-transformers[onnx]'"
+            )
+
+        options = onnxruntime.SessionOptions()
+        if self.intra_op_threads is not None:
+            options.intra_op_num_threads = self.intra_op_threads
+        return _onnx_model(self.export(model_name), self._file_name(), session_options=options)
+
+    def export(self, model_name: str) -> str:
+        """Local directory with the ONNX graph for model_name, exported on first use."""
+        path = os.path.join(self.onnx_dir, re.sub(r"[^\w.-]+", "__", model_name).strip("_"))
+        target = os.path.join(path, self._file_name())
+        if os.path.exists(target):
+            return path
+
+        start = time.perf_counter()
+        os.makedirs(self.onnx_dir, exist_ok=True)
+
+        # Staged and moved into place, so concurrent workers never load a partial file
+        with tempfile.TemporaryDirectory(dir=self.onnx_dir) as scratch:
+            staged = os.path.join(scratch, "model")
+
+            if os.path.exists(os.path.join(path, _ONNX_FILE)):
+                model = _onnx_model(path, _ONNX_FILE)
+            else:
+                model = _onnx_model(model_name, export=True)
+            # The SentenceTransformer config and tokenizer, plus onnx/model.onnx
+            model.save(staged)
+
+            if self.onnx_quantization != "none":
+                export_dynamic_quantized_onnx_model(
+                    model,
+                    self.onnx_quantization,
+                    staged,
+                    file_suffix=f"int8_{self.onnx_quantization}",
+                )
+
+            try:
+                os.rename(staged, path)
+            except OSError:
+                # Another process exported this model first; add just our graph
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(os.path.join(staged, self._file_name()), target)
+
+        logger.info(
+            "embedding_model_exported model=%s backend=%s path=%s export_s=%.3f",
+            model_name,
+            self.label,
+            path,
+            time.perf_counter() - start,
+        )
+        return path
+
+    def _file_name(self) -> str:
+        if self.onnx_quantization == "none":
+            return _ONNX_FILE
+        return f"onnx/model_int8_{self.onnx_quantization}.onnx"
+
+
+def _onnx_model(name_or_path: str, file_name: Optional[str] = None, **model_kwargs):
+    # Pinned to the CPU provider, also when onnxruntime-gpu is installed
+    model_kwargs["provider"] = "CPUExecutionProvider"
+    if file_name is not None:
+        model_kwargs["file_name"] = file_name
+    return SentenceTransformer(name_or_path, backend="onnx", device="cpu", model_kwargs=model_kwargs)
@@ -1,7 +1,16 @@
 from __future__ import annotations
 
+import asyncio
+from typing import AsyncIterator, Iterator, List, Sequence
+
 class BaseLLM:
     supports_response_format: bool = False
+    model_name: str | None = None
+
+    @property
+    def provider_name(self) -> str:
+        """Name in logs, metrics and cache keys; wrappers report the wrapped provider."""
+        return type(self).__name__
 
     def generate(
         self,
@@ -12,3 +21,62 @@ class BaseLLM:
     ) -> str:
         raise NotImplementedError
 
+    def count_tokens(self, texts: Sequence[str]) -> List[int]:
+        """
+        Prompt tokens per text. Providers with a local tokenizer should
+        override this; the default estimates about four characters per token.
+        """
+        return [-(-len(text) // 4) for text in texts]
+
+    async def agenerate(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.2,
+        response_format: dict | None = None,
+    ) -> str:
+        """
+        Async variant. Providers with a native async client should override
+        this; the default runs generate() in a worker thread.
+        """
+        return await asyncio.to_thread(
+            self.generate,
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            temperature=temperature,
+            response_format=response_format,
+        )
+
+    def stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.2,
+        response_format: dict | None = None,
+    ) -> Iterator[str]:
+        """
+        Yields the completion in pieces as the provider produces them.
+        Providers with a streaming API should override this; the default
+        yields generate() as a single piece.
+        """
+        yield self.generate(
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            temperature=temperature,
+            response_format=response_format,
+        )
+
+    async def astream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.2,
+        response_format: dict | None = None,
+    ) -> AsyncIterator[str]:
+        """Async variant of stream(); the default yields agenerate()."""
+        yield await self.agenerate(
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            temperature=temperature,
+            response_format=response_format,
+        )
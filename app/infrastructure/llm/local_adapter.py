@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 import json
-from typing import Optional, Dict, Any
+import re
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
 
 from .base_llm import BaseLLM
 
+# Word-sized pieces, roughly what a provider streams per token
+_PIECE = re.compile(r"\S+\s*|\s+")
+
 
 class LocalAdapter(BaseLLM):
     """
@@ -22,6 +26,7 @@ class LocalAdapter(BaseLLM):
     """
 
     supports_response_format = False
+    model_name = "stub"
 
     def __init__(self, backend: Optional[str] = None) -> None:
         self.backend = backend or "stub"
@@ -53,3 +58,49 @@ class LocalAdapter(BaseLLM):
         }
 
         return json.dumps(response_payload)
+
+    async def agenerate(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.2,
+        model: Optional[str] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        # No I/O involved, so no need to leave the event loop
+        return self.generate(
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            temperature=temperature,
+            model=model,
+            response_format=response_format,
+        )
+
+    def stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.2,
+        model: Optional[str] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[str]:
+        yield from self._pieces(
+            self.generate(system_prompt, user_prompt, temperature, model, response_format)
+        )
+
+    async def astream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.2,
+        model: Optional[str] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[str]:
+        for piece in self._pieces(
+            self.generate(system_prompt, user_prompt, temperature, model, response_format)
+        ):
+            yield piece
+
+    @staticmethod
+    def _pieces(text: str) -> List[str]:
+        return _PIECE.findall(text)
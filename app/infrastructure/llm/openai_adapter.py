@@ -1,13 +1,20 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import time
-from typing import Any, Optional, Dict
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from app.config import settings
+from app.core.metrics import LLM_ATTEMPT_SECONDS, LLM_RETRIES
 from .base_llm import BaseLLM
 
+try:
+    import tiktoken
+except ImportError:  # optional: exact prompt-token counts
+    tiktoken = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,24 +27,46 @@ class OpenAIAdapter(BaseLLM):
     _MAX_RETRIES = 2  # total attempts = 1 + _MAX_RETRIES
     _BACKOFF_BASE_S = 0.6
 
+    model_name = _DEFAULT_MODEL
+
     def __init__(self) -> None:
         self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.async_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self._encoding = self._load_encoding(self.model_name)
 
-    def generate(
+    @staticmethod
+    def _load_encoding(model: str):
+        if tiktoken is None:
+            logger.info(
+                "llm_tokenizer_unavailable provider=openai model=%s reason=tiktoken_not_installed",
+                model,
+            )
+            return None
+
+        try:
+            try:
+                return tiktoken.encoding_for_model(model)
+            except KeyError:
+                # Model newer than the installed tiktoken
+                return tiktoken.get_encoding("o200k_base")
+        except Exception:
+            # Encodings are downloaded on first use; estimates beat failing requests
+            logger.warning("llm_tokenizer_unavailable provider=openai model=%s", model, exc_info=True)
+            return None
+
+    def count_tokens(self, texts: Sequence[str]) -> List[int]:
+        if self._encoding is None:
+            return super().count_tokens(texts)
+        return [len(ids) for ids in self._encoding.encode_ordinary_batch(list(texts))]
+
+    def _build_request(
         self,
         system_prompt: str,
         user_prompt: str,
-        temperature: float = 0.2,
-        model: str = _DEFAULT_MODEL,
-        response_format: Optional[Dict[str, Any]] = None,
-    ) -> str:
-        """
-        Production-aware behavior:
-        - Explicit timeout per request
-        - Retry with backoff on transient failures
-        - Logs latency and high-level call metadata
-        - Raises a bounded RuntimeError for the application layer
-        """
+        temperature: float,
+        model: str,
+        response_format: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
         kwargs: Dict[str, Any] = {
             "model": model,
             "temperature": temperature,
@@ -52,6 +81,27 @@ class OpenAIAdapter(BaseLLM):
         if response_format is not None:
             kwargs["response_format"] = response_format
 
+        return kwargs
+
+    def generate(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.2,
+        model: str = _DEFAULT_MODEL,
+        response_format: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """
+        Production-aware behavior:
+        - Explicit timeout per request
+        - Retry with backoff on transient failures
+        - Logs latency and high-level call metadata
+        - Raises a bounded RuntimeError for the application layer
+        """
+        kwargs = self._build_request(
+            system_prompt, user_prompt, temperature, model, response_format
+        )
+
         last_exc: Optional[Exception] = None
 
         for attempt in range(self._MAX_RETRIES + 1):
@@ -65,6 +115,7 @@ class OpenAIAdapter(BaseLLM):
                     raise RuntimeError("OpenAI returned an empty message content.")
 
                 elapsed = time.perf_counter() - start
+                LLM_ATTEMPT_SECONDS.labels("openai", str(attempt + 1), "success").observe(elapsed)
                 logger.info(
                     "llm_call_success provider=openai model=%s latency_s=%.3f attempt=%d",
                     model,
@@ -76,6 +127,7 @@ class OpenAIAdapter(BaseLLM):
             except Exception as exc:
                 elapsed = time.perf_counter() - start
                 last_exc = exc
+                LLM_ATTEMPT_SECONDS.labels("openai", str(attempt + 1), "error").observe(elapsed)
 
                 # Log with traceback for debugging; message remains stable for callers
                 logger.warning(
@@ -92,9 +144,187 @@ class OpenAIAdapter(BaseLLM):
                 if attempt >= self._MAX_RETRIES:
                     raise RuntimeError("OpenAI LLM invocation failed after retries.") from exc
 
+                LLM_RETRIES.labels("openai").inc()
+
                 # Simple exponential-ish backoff (kept deterministic & lightweight)
                 sleep_s = self._BACKOFF_BASE_S * (attempt + 1)
                 time.sleep(sleep_s)
 
         # Should be unreachable, but keeps type checkers happy
         raise RuntimeError("OpenAI LLM invocation failed.") from last_exc
+
+    async def agenerate(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.2,
+        model: str = _DEFAULT_MODEL,
+        response_format: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """
+        Same contract as generate(), using AsyncOpenAI and non-blocking
+        backoff so a slow provider does not hold a worker thread.
+        """
+        kwargs = self._build_request(
+            system_prompt, user_prompt, temperature, model, response_format
+        )
+
+        last_exc: Optional[Exception] = None
+
+        for attempt in range(self._MAX_RETRIES + 1):
+            start = time.perf_counter()
+            try:
+                response = await self.async_client.chat.completions.create(**kwargs)
+
+                content = response.choices[0].message.content
+                if content is None:
+                    raise RuntimeError("OpenAI returned an empty message content.")
+
+                elapsed = time.perf_counter() - start
+                LLM_ATTEMPT_SECONDS.labels("openai", str(attempt + 1), "success").observe(elapsed)
+                logger.info(
+                    "llm_call_success provider=openai model=%s latency_s=%.3f attempt=%d",
+                    model,
+                    elapsed,
+                    attempt + 1,
+                )
+                return content
+
+            except Exception as exc:
+                elapsed = time.perf_counter() - start
+                last_exc = exc
+                LLM_ATTEMPT_SECONDS.labels("openai", str(attempt + 1), "error").observe(elapsed)
+
+                logger.warning(
+                    "llm_call_failed provider=openai model=%s latency_s=%.3f attempt=%d/%d error=%s",
+                    model,
+                    elapsed,
+                    attempt + 1,
+                    self._MAX_RETRIES + 1,
+                    str(exc),
+                    exc_info=True,
+                )
+
+                if attempt >= self._MAX_RETRIES:
+                    raise RuntimeError("OpenAI LLM invocation failed after retries.") from exc
+
+                LLM_RETRIES.labels("openai").inc()
+                await asyncio.sleep(self._BACKOFF_BASE_S * (attempt + 1))
+
+        raise RuntimeError("OpenAI LLM invocation failed.") from last_exc
+
+    def stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.2,
+        model: str = _DEFAULT_MODEL,
+        response_format: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[str]:
+        """
+        Yields content deltas as they arrive. Failures before the first delta
+        are retried like generate(); once content has been yielded the caller
+        holds a partial answer, so errors are raised instead of retried.
+        """
+        kwargs = self._build_request(
+            system_prompt, user_prompt, temperature, model, response_format
+        )
+        kwargs["stream"] = True
+
+        for attempt in range(self._MAX_RETRIES + 1):
+            start = time.perf_counter()
+            emitted = False
+            try:
+                response = self.client.chat.completions.create(**kwargs)
+                try:
+                    for chunk in response:
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            emitted = True
+                            yield delta
+                finally:
+                    # Also when the caller stops early: releases the connection
+                    response.close()
+
+                if not emitted:
+                    raise RuntimeError("OpenAI returned an empty message content.")
+
+                self._log_stream_success(model, start, attempt)
+                return
+
+            except Exception as exc:
+                self._log_stream_failure(model, start, attempt, exc)
+                if emitted:
+                    raise RuntimeError("OpenAI LLM stream interrupted.") from exc
+                if attempt >= self._MAX_RETRIES:
+                    raise RuntimeError("OpenAI LLM invocation failed after retries.") from exc
+
+                LLM_RETRIES.labels("openai").inc()
+                time.sleep(self._BACKOFF_BASE_S * (attempt + 1))
+
+    async def astream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.2,
+        model: str = _DEFAULT_MODEL,
+        response_format: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[str]:
+        """Same contract as stream(), using AsyncOpenAI."""
+        kwargs = self._build_request(
+            system_prompt, user_prompt, temperature, model, response_format
+        )
+        kwargs["stream"] = True
+
+        for attempt in range(self._MAX_RETRIES + 1):
+            start = time.perf_counter()
+            emitted = False
+            try:
+                response = await self.async_client.chat.completions.create(**kwargs)
+                try:
+                    async for chunk in response:
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            emitted = True
+                            yield delta
+                finally:
+                    await response.close()
+
+                if not emitted:
+                    raise RuntimeError("OpenAI returned an empty message content.")
+
+                self._log_stream_success(model, start, attempt)
+                return
+
+            except Exception as exc:
+                self._log_stream_failure(model, start, attempt, exc)
+                if emitted:
+                    raise RuntimeError("OpenAI LLM stream interrupted.") from exc
+                if attempt >= self._MAX_RETRIES:
+                    raise RuntimeError("OpenAI LLM invocation failed after retries.") from exc
+
+                LLM_RETRIES.labels("openai").inc()
+                await asyncio.sleep(self._BACKOFF_BASE_S * (attempt + 1))
+
+    def _log_stream_success(self, model: str, start: float, attempt: int) -> None:
+        elapsed = time.perf_counter() - start
+        LLM_ATTEMPT_SECONDS.labels("openai", str(attempt + 1), "success").observe(elapsed)
+        logger.info(
+            "llm_stream_success provider=openai model=%s latency_s=%.3f attempt=%d",
+            model,
+            elapsed,
+            attempt + 1,
+        )
+
+    def _log_stream_failure(self, model: str, start: float, attempt: int, exc: Exception) -> None:
+        elapsed = time.perf_counter() - start
+        LLM_ATTEMPT_SECONDS.labels("openai", str(attempt + 1), "error").observe(elapsed)
+        logger.warning(
+            "llm_stream_failed provider=openai model=%s latency_s=%.3f attempt=%d/%d error=%s",
+            model,
+            elapsed,
+            attempt + 1,
+            self._MAX_RETRIES + 1,
+            str(exc),
+            exc_info=True,
+        )
@@ -0,0 +1,476 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator, List, Optional, Sequence
+
+from app.core.metrics import LLM_CIRCUIT_TRANSITIONS, LLM_HEDGES, LLM_REJECTIONS
+from app.domain.services import ProviderUnavailable
+from .base_llm import BaseLLM
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+CIRCUIT_STATES = (CLOSED, OPEN, HALF_OPEN)
+
+
+class CircuitBreaker:
+    """
+    Provider health shared by all requests of a worker process.
+
+    Closed: calls pass. failure_threshold consecutive failures, or the
+    latency_percentile of the last window calls above latency_threshold_s
+    (once min_calls are in), open the circuit. Open: calls are refused for
+    reset_timeout_s, then one trial call is let through (half-open); its
+    outcome closes or reopens the circuit.
+
+    Thread-safe: sync callers run in worker threads.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        failure_threshold: int = 5,
+        latency_threshold_s: Optional[float] = None,
+        latency_percentile: float = 0.95,
+        window: int = 50,
+        min_calls: int = 20,
+        reset_timeout_s: float = 30.0,
+    ):
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be >= 1.")
+        if not 0 < latency_percentile < 1:
+            raise ValueError("latency_percentile must be between 0 and 1.")
+        if not 1 <= min_calls <= window:
+            raise ValueError("min_calls must be between 1 and window.")
+
+        self.provider = provider
+        self.failure_threshold = failure_threshold
+        self.latency_threshold_s = latency_threshold_s
+        self.latency_percentile = latency_percentile
+        self.min_calls = min_calls
+        self.reset_timeout_s = reset_timeout_s
+
+        self.state = CLOSED
+        self._failures = 0
+        self._latencies: deque = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> Optional[str]:
+        """The state the call is admitted in, or None if it is refused."""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout_s:
+                    return None
+                self._transition(HALF_OPEN, "reset_timeout")
+
+            if self.state == HALF_OPEN:
+                if self._trial:
+                    return None
+                self._trial = True
+
+            return self.state
+
+    def record(self, admitted: str, success: bool, latency_s: Optional[float] = None) -> None:
+        with self._lock:
+            if admitted == HALF_OPEN:
+                self._trial = False
+                if not success:
+                    self._transition(OPEN, "trial_failed")
+                elif self._too_slow(latency_s):
+                    self._transition(OPEN, "trial_slow")
+                else:
+                    self._transition(CLOSED, "trial_succeeded")
+                return
+
+            # Calls admitted before the circuit opened do not count any more
+            if self.state != CLOSED:
+                return
+
+            if latency_s is not None:
+                self._latencies.append(latency_s)
+
+            self._failures = 0 if success else self._failures + 1
+            if self._failures >= self.failure_threshold:
+                self._transition(OPEN, "failures")
+            elif self._too_slow(self._quantile(self.latency_percentile)):
+                self._transition(OPEN, "latency")
+
+    def release(self, admitted: str) -> None:
+        """For an admitted call that ended without an outcome, e.g. cancelled."""
+        if admitted == HALF_OPEN:
+            with self._lock:
+                self._trial = False
+
+    def latency_quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            return self._quantile(q)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self._failures,
+                "calls": len(self._latencies),
+                "latency_quantile_s": self._quantile(self.latency_percentile),
+            }
+
+    def _too_slow(self, latency_s: Optional[float]) -> bool:
+        return (
+            self.latency_threshold_s is not None
+            and latency_s is not None
+            and latency_s > self.latency_threshold_s
+        )
+
+    def _quantile(self, q: float) -> Optional[float]:
+        if len(self._latencies) < self.min_calls:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def _transition(self, state: str, reason: str) -> None:
+        previous, self.state = self.state, state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        else:
+            # A fresh start: the history that opened the circuit is stale
+            self._failures = 0
+            self._latencies.clear()
+
+        LLM_CIRCUIT_TRANSITIONS.labels(self.provider, state).inc()
+        log = logger.warning if state == OPEN else logger.info
+        log(
+            "llm_circuit_transition provider=%s from=%s to=%s reason=%s",
+            self.provider,
+            previous,
+            state,
+            reason,
+        )
+
+
+class ResilientLLM(BaseLLM):
+    """
+    Wraps a provider with a circuit breaker, an in-flight limit and,
+    optionally, hedged requests. Refused calls raise ProviderUnavailable
+    without touching the provider, so the orchestrator falls back at once.
+
+    max_concurrency caps calls in flight; further callers queue, for at most
+    queue_timeout_s if set. Sync and async callers have separate limits.
+
+    With hedge_percentile, agenerate() fires a second call when the first
+    has not answered after that percentile of recent latencies (at least
+    hedge_min_delay_s), returns whichever answers first and cancels the
+    other. Hedges only use free slots and only run while the circuit is
+    closed. Streams are never hedged: tokens may already have been sent.
+    """
+
+    def __init__(
+        self,
+        llm: BaseLLM,
+        breaker: CircuitBreaker,
+        max_concurrency: Optional[int] = None,
+        queue_timeout_s: Optional[float] = None,
+        hedge_percentile: Optional[float] = None,
+        hedge_min_delay_s: float = 0.5,
+    ):
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1.")
+        if hedge_percentile is not None and not 0 < hedge_percentile < 1:
+            raise ValueError("hedge_percentile must be between 0 and 1.")
+
+        self.llm = llm
+        self.breaker = breaker
+        self.max_concurrency = max_concurrency
+        self.queue_timeout_s = queue_timeout_s
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay_s = hedge_min_delay_s
+
+        self.supports_response_format = llm.supports_response_format
+        self.model_name = llm.model_name
+
+        self._slots = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        self._sync_slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self._in_flight = 0
+        self._queued = 0
+        self._counts = threading.Lock()
+
+    @property
+    def provider_name(self) -> str:
+        return self.llm.provider_name
+
+    def count_tokens(self, texts: Sequence[str]) -> List[int]:
+        return self.llm.count_tokens(texts)
+
+    def stats(self) -> dict:
+        with self._counts:
+            in_flight, queued = self._in_flight, self._queued
+        return {**self.breaker.stats(), "in_flight": in_flight, "queued": queued}
+
+    # -----------------------------
+    # Generation
+    # -----------------------------
+
+    def generate(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.2,
+        response_format: dict | None = None,
+    ) -> str:
+        request = dict(
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            temperature=temperature,
+            response_format=response_format,
+        )
+        admitted = self._admit()
+        start = None
+
+        try:
+            with self._slot():
+                start = time.perf_counter()
+                response = self.llm.generate(**request)
+
+        except Exception:
+            self._record(admitted, start, success=False)
+            raise
+
+        except BaseException:
+            self.breaker.release(admitted)
+            raise
+
+        self._record(admitted, start, success=True)
+        return response
+
+    async def agenerate(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.2,
+        response_format: dict | None = None,
+    ) -> str:
+        request = dict(
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            temperature=temperature,
+            response_format=response_format,
+        )
+        admitted = self._admit()
+        start = None
+
+        try:
+            async with self._aslot():
+                start = time.perf_counter()
+                if admitted == CLOSED:
+                    response = await self._ahedged(request)
+                else:
+                    response = await self.llm.agenerate(**request)
+
+        except Exception:
+            self._record(admitted, start, success=False)
+            raise
+
+        except BaseException:
+            self.breaker.release(admitted)
+            raise
+
+        self._record(admitted, start, success=True)
+        return response
+
+    def stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.2,
+        response_format: dict | None = None,
+    ) -> Iterator[str]:
+        request = dict(
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            temperature=temperature,
+            response_format=response_format,
+        )
+        admitted = self._admit()
+        start = None
+
+        try:
+            # The slot is held until the stream ends
+            with self._slot():
+                start = time.perf_counter()
+                yield from self.llm.stream(**request)
+
+        except Exception:
+            self._record(admitted, start, success=False, timed=False)
+            raise
+
+        except BaseException:
+            # Including GeneratorExit when the caller stops early
+            self.breaker.release(admitted)
+            raise
+
+        self._record(admitted, start, success=True, timed=False)
+
+    async def astream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.2,
+        response_format: dict | None = None,
+    ) -> AsyncIterator[str]:
+        request = dict(
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            temperature=temperature,
+            response_format=response_format,
+        )
+        admitted = self._admit()
+        start = None
+
+        try:
+            async with self._aslot():
+                start = time.perf_counter()
+                async for token in self.llm.astream(**request):
+                    yield token
+
+        except Exception:
+            self._record(admitted, start, success=False, timed=False)
+            raise
+
+        except BaseException:
+            self.breaker.release(admitted)
+            raise
+
+        self._record(admitted, start, success=True, timed=False)
+
+    # -----------------------------
+    # Breaker, slots and hedging
+    # -----------------------------
+
+    def _admit(self) -> str:
+        admitted = self.breaker.allow()
+        if admitted is None:
+            LLM_REJECTIONS.labels(self.provider_name, "circuit_open").inc()
+            raise ProviderUnavailable(f"{self.provider_name} circuit is open.")
+        return admitted
+
+    def _record(self, admitted: str, start: Optional[float], success: bool, timed: bool = True) -> None:
+        if start is None:
+            # Refused before reaching the provider (queue timeout)
+            self.breaker.release(admitted)
+            return
+        # Stream durations depend on the answer length, so they only count as outcomes
+        latency_s = time.perf_counter() - start if timed else None
+        self.breaker.record(admitted, success, latency_s)
+
+    def _queue_timeout(self) -> ProviderUnavailable:
+        LLM_REJECTIONS.labels(self.provider_name, "queue_timeout").inc()
+        return ProviderUnavailable(
+            f"{self.provider_name} has {self.max_concurrency} calls in flight; "
+            f"queued longer than {self.queue_timeout_s}s."
+        )
+
+    def _count(self, in_flight: int = 0, queued: int = 0) -> None:
+        with self._counts:
+            self._in_flight += in_flight
+            self._queued += queued
+
+    @contextmanager
+    def _slot(self):
+        if self._sync_slots is not None:
+            self._count(queued=1)
+            try:
+                acquired = self._sync_slots.acquire(
+                    timeout=-1 if self.queue_timeout_s is None else self.queue_timeout_s
+                )
+            finally:
+                self._count(queued=-1)
+            if not acquired:
+                raise self._queue_timeout()
+
+        self._count(in_flight=1)
+        try:
+            yield
+        finally:
+            self._count(in_flight=-1)
+            if self._sync_slots is not None:
+                self._sync_slots.release()
+
+    @asynccontextmanager
+    async def _aslot(self, wait: bool = True):
+        if self._slots is not None:
+            if not wait and self._slots.locked():
+                raise ProviderUnavailable(f"{self.provider_name} has no free slot.")
+
+            self._count(queued=1)
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout_s)
+            except asyncio.TimeoutError:
+                raise self._queue_timeout() from None
+            finally:
+                self._count(queued=-1)
+
+        self._count(in_flight=1)
+        try:
+            yield
+        finally:
+            self._count(in_flight=-1)
+            if self._slots is not None:
+                self._slots.release()
+
+    async def _ahedged(self, request: dict) -> str:
+        delay = self._hedge_delay()
+        if delay is None:
+            return await self.llm.agenerate(**request)
+
+        first = asyncio.ensure_future(self.llm.agenerate(**request))
+        pending = {first}
+        error: Optional[BaseException] = None
+
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done and not (self._slots is not None and self._slots.locked()):
+                LLM_HEDGES.labels(self.provider_name, "fired").inc()
+                logger.info(
+                    "llm_hedge_fired provider=%s delay_s=%.3f", self.provider_name, delay
+                )
+                pending.add(asyncio.ensure_future(self._hedge(request)))
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            LLM_HEDGES.labels(self.provider_name, "won").inc()
+                        return task.result()
+                    if task is first or error is None:
+                        error = task.exception()
+
+            raise error
+
+        finally:
+            # Wait for the losers to unwind so their connections and slots are released
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _hedge(self, request: dict) -> str:
+        # Counts against max_concurrency, but never waits for a slot
+        async with self._aslot(wait=False):
+            return await self.llm.agenerate(**request)
+
+    def _hedge_delay(self) -> Optional[float]:
+        if self.hedge_percentile is None:
+            return None
+        latency_s = self.breaker.latency_quantile(self.hedge_percentile)
+        if latency_s is None:
+            # Not enough calls yet to know what slow is
+            return None
+        return max(latency_s, self.hedge_min_delay_s)
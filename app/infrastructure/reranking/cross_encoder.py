@@ -0,0 +1,117 @@
+import asyncio
+import concurrent.futures
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence
+
+from sentence_transformers import CrossEncoder
+
+from app.domain.services import Reranker
+
+logger = logging.getLogger(__name__)
+
+_WARMUP_QUERY = "VectorEngine rerank warm-up."
+
+
+class CrossEncoderReranker(Reranker):
+    """
+    Local cross-encoder scoring (query, passage) pairs on CPU.
+
+    All scoring runs on one worker thread: the model is shared by every
+    request in the worker and its tokenizer is not thread-safe, while torch
+    still parallelizes each batch across its intra-op threads.
+
+    A timeout covers time spent queued behind other requests as well as
+    scoring. A request that runs out of time gets None right away; its
+    pending batches are dropped at the next batch boundary.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        batch_size: int = 16,
+        max_length: int = 256,
+        loader=CrossEncoder,
+    ):
+        if batch_size < 1:
+            raise ValueError("batch_size must be >= 1.")
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+
+        start = time.perf_counter()
+        self.model = loader(model_name, max_length=max_length, device="cpu")
+        self.load_s = time.perf_counter() - start
+        self.warmup_s: Optional[float] = None
+
+        logger.info("rerank_model_loaded model=%s load_s=%.3f", model_name, self.load_s)
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+
+    def score(
+        self, query: str, passages: Sequence[str], timeout_s: Optional[float] = None
+    ) -> Optional[List[float]]:
+        if not passages:
+            return []
+
+        future = self._submit(query, passages, timeout_s)
+        try:
+            return future.result(timeout=timeout_s)
+        except concurrent.futures.TimeoutError:
+            # Still queued: never runs; already running: stops after this batch
+            future.cancel()
+            return None
+
+    async def ascore(
+        self, query: str, passages: Sequence[str], timeout_s: Optional[float] = None
+    ) -> Optional[List[float]]:
+        if not passages:
+            return []
+
+        future = self._submit(query, passages, timeout_s)
+        try:
+            # wait_for cancels the wrapped future on timeout
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout_s)
+        except asyncio.TimeoutError:
+            return None
+
+    def warmup(self) -> float:
+        start = time.perf_counter()
+        self.score(_WARMUP_QUERY, [_WARMUP_QUERY])
+        self.warmup_s = time.perf_counter() - start
+        return self.warmup_s
+
+    def stats(self) -> dict:
+        return {
+            "model": self.model_name,
+            "batch_size": self.batch_size,
+            "load_s": round(self.load_s, 3),
+            "warmup_s": round(self.warmup_s, 3) if self.warmup_s is not None else None,
+        }
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, query: str, passages: Sequence[str], timeout_s: Optional[float]):
+        deadline = time.perf_counter() + timeout_s if timeout_s is not None else None
+        return self._executor.submit(self._score, query, list(passages), deadline)
+
+    def _score(self, query: str, passages: List[str], deadline: Optional[float]):
+        scores: List[float] = []
+
+        for start in range(0, len(passages), self.batch_size):
+            if deadline is not None and time.perf_counter() > deadline:
+                # The caller has already given up; free the thread for the next request
+                return None
+
+            batch = passages[start:start + self.batch_size]
+            logits = self.model.predict(
+                [(query, passage) for passage in batch],
+                batch_size=self.batch_size,
+                show_progress_bar=False,
+                convert_to_numpy=True,
+            )
+            scores.extend(float(s) for s in logits)
+
+        return scores
@@ -0,0 +1,200 @@
+from typing import List, Optional, Sequence, Tuple
+
+from psycopg_pool import AsyncConnectionPool
+
+from app.domain.filters import MetadataFilter
+from app.domain.services import AsyncVectorRepository
+from app.infrastructure.vector_store.distance import get_metric
+from app.infrastructure.vector_store.index_manager import TABLE_NAME
+from app.infrastructure.vector_store.pgvector_repository import (
+    copy_sql,
+    delete_document_sql,
+    exact_search_sql,
+    filter_sql,
+    hybrid_ef_search,
+    hybrid_params,
+    hybrid_result,
+    hybrid_search_sql,
+    insert_row,
+    insert_sql,
+    log_exact_fallback,
+    search_ef_search,
+    search_many_params,
+    search_many_results,
+    search_many_sql,
+    search_params,
+    search_result,
+    search_settings,
+    search_sql,
+)
+from app.infrastructure.vector_store.quantization import get_quantization
+from app.infrastructure.vector_store.vector_codec import binary_copy_payload
+
+
+class AsyncPgVectorRepository(AsyncVectorRepository):
+    """
+    psycopg 3 / asyncio counterpart of PgVectorRepository.
+
+    Runs the same SQL, but awaits the network instead of holding a
+    threadpool thread for the duration of each query.
+    """
+
+    def __init__(
+        self,
+        pool: AsyncConnectionPool,
+        metric: str = "cosine",
+        default_probes: Optional[int] = None,
+        default_ef_search: Optional[int] = None,
+        iterative_scan: Optional[str] = None,
+        table: str = TABLE_NAME,
+        quantization: str = "none",
+        dimension: Optional[int] = None,
+        rescore_factor: int = 4,
+    ):
+        self.pool = pool
+        self.metric = get_metric(metric)
+        self.default_probes = default_probes
+        self.default_ef_search = default_ef_search
+        self.iterative_scan = iterative_scan
+        self.table = table
+        self.quantization = get_quantization(quantization, dimension)
+        self.rescore_factor = rescore_factor
+
+    async def asave(
+        self,
+        chunk_id: str,
+        content: str,
+        embedding: List[float],
+        document_id: Optional[str] = None,
+        chunk_index: int = 0,
+        metadata: Optional[dict] = None,
+    ) -> None:
+        row = insert_row(chunk_id, content, embedding, document_id, chunk_index, metadata)
+
+        async with self.pool.connection() as conn:
+            # The pool's context manager commits on success, rolls back on error
+            await conn.execute(insert_sql(self.table), row)
+
+    async def asave_many(self, items: Sequence[Tuple[str, str, int, str, dict, List[float]]]) -> None:
+        if not items:
+            return
+
+        payload = binary_copy_payload(items)
+
+        async with self.pool.connection() as conn:
+            async with conn.cursor() as cur:
+                async with cur.copy(copy_sql(self.table)) as copy:
+                    await copy.write(payload.getbuffer())
+
+    async def asimilarity_search(
+        self,
+        embedding: List[float],
+        k: int,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        metadata_filter: Optional[MetadataFilter] = None,
+    ):
+        where, params = filter_sql(metadata_filter)
+        # Sent in pgvector's binary format, not as text
+        params.update(search_params(embedding, k, self.quantization, self.rescore_factor))
+        sql = search_sql(self.table, self.metric, where, self.quantization)
+
+        async with self.pool.connection() as conn:
+            async with conn.cursor() as cur:
+                for setting_sql, setting_params in search_settings(
+                    probes or self.default_probes,
+                    search_ef_search(ef_search or self.default_ef_search, params),
+                    self.iterative_scan if where else None,
+                ):
+                    await cur.execute(setting_sql, setting_params)
+
+                await cur.execute(sql, params)
+                rows = await cur.fetchall()
+
+                if where and len(rows) < k:
+                    ann_rows = len(rows)
+                    await cur.execute(exact_search_sql(self.table, self.metric, where), params)
+                    rows = await cur.fetchall()
+                    log_exact_fallback(k, ann_rows, len(rows))
+
+        return [search_result(row, self.metric) for row in rows]
+
+    async def asimilarity_search_many(
+        self,
+        embeddings: Sequence[List[float]],
+        k: int,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        metadata_filter: Optional[MetadataFilter] = None,
+    ) -> List[List[dict]]:
+        if not embeddings:
+            return []
+
+        where, params = filter_sql(metadata_filter)
+        params.update(search_many_params(embeddings, k, self.quantization, self.rescore_factor))
+        sql = search_many_sql(self.table, self.metric, where, self.quantization)
+
+        async with self.pool.connection() as conn:
+            async with conn.cursor() as cur:
+                for setting_sql, setting_params in search_settings(
+                    probes or self.default_probes,
+                    search_ef_search(ef_search or self.default_ef_search, params),
+                    self.iterative_scan if where else None,
+                ):
+                    await cur.execute(setting_sql, setting_params)
+
+                await cur.execute(sql, params)
+                results = search_many_results(await cur.fetchall(), len(embeddings), self.metric)
+
+                for i, embedding in enumerate(params["embeddings"] if where else []):
+                    if len(results[i]) < k:
+                        ann_rows = len(results[i])
+                        await cur.execute(
+                            exact_search_sql(self.table, self.metric, where),
+                            {**params, "embedding": embedding},
+                        )
+                        results[i] = [search_result(row, self.metric) for row in await cur.fetchall()]
+                        log_exact_fallback(k, ann_rows, len(results[i]))
+
+        return results
+
+    async def ahybrid_search(
+        self,
+        embedding: List[float],
+        query_text: str,
+        k: int,
+        candidates: int = 50,
+        semantic_weight: float = 1.0,
+        lexical_weight: float = 1.0,
+        rrf_k: int = 60,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        metadata_filter: Optional[MetadataFilter] = None,
+    ):
+        where, filter_params = filter_sql(metadata_filter)
+        params = hybrid_params(
+            embedding, query_text, k, candidates, semantic_weight, lexical_weight, rrf_k,
+            self.quantization, self.rescore_factor,
+        )
+        params.update(filter_params)
+
+        async with self.pool.connection() as conn:
+            async with conn.cursor() as cur:
+                for sql, setting_params in search_settings(
+                    probes or self.default_probes,
+                    hybrid_ef_search(ef_search or self.default_ef_search, params),
+                    self.iterative_scan if where else None,
+                ):
+                    await cur.execute(sql, setting_params)
+
+                await cur.execute(
+                    hybrid_search_sql(self.table, self.metric, where, self.quantization), params
+                )
+                rows = await cur.fetchall()
+
+        return [hybrid_result(row) for row in rows]
+
+    async def adelete_document(self, document_id: str) -> int:
+        async with self.pool.connection() as conn:
+            cur = await conn.execute(delete_document_sql(self.table), (document_id,))
+            return cur.rowcount
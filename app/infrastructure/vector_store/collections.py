@@ -0,0 +1,450 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional
+
+import psycopg2.errors
+
+from app.infrastructure.vector_store.connection_pool import PgConnectionPool
+from app.infrastructure.vector_store.distance import get_metric
+from app.infrastructure.vector_store.index_manager import INDEX_TYPES, index_name, index_with_clause
+from app.infrastructure.vector_store.pgvector_repository import TEXT_SEARCH_CONFIG
+from app.infrastructure.vector_store.quantization import get_quantization
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COLLECTION = "default"
+
+# Names end up in table and index identifiers (63 bytes max in Postgres)
+_COLLECTION_NAME = re.compile(r"^[a-z][a-z0-9_]{0,31}$")
+_COLLECTION_FILE = "collection.json"
+_COLLECTIONS_DIR = "collections"
+
+
+class CollectionNotFound(LookupError):
+    """Raised when a collection name is not registered."""
+
+
+class CollectionAlreadyExists(RuntimeError):
+    """Raised when creating a collection whose name is taken."""
+
+
+class Collection:
+    """
+    A named set of chunks with its own storage (a table with pgvector),
+    embedding model, dimension, distance metric and ANN index parameters.
+    quantization (none | halfvec | binary) sets what the pgvector ANN index
+    stores; the in-memory backend always searches full precision.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        table: str,
+        embedding_model: str,
+        dimension: Optional[int],
+        metric: str,
+        index_type: str,
+        index_params: Optional[dict] = None,
+        created_at: Optional[str] = None,
+        quantization: str = "none",
+    ):
+        self.name = name
+        self.table = table
+        self.embedding_model = embedding_model
+        self.dimension = dimension
+        self.metric = metric
+        self.index_type = index_type
+        self.index_params = index_params or {}
+        self.created_at = created_at
+        self.quantization = quantization
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "table": self.table,
+            "embedding_model": self.embedding_model,
+            "dimension": self.dimension,
+            "metric": self.metric,
+            "index_type": self.index_type,
+            "index_params": self.index_params,
+            "quantization": self.quantization,
+            "created_at": self.created_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Collection":
+        return cls(**data)
+
+
+def validate_collection_name(name: str) -> str:
+    if not _COLLECTION_NAME.match(name or ""):
+        raise ValueError(
+            "Collection names are 1-32 characters: lowercase letters, digits and "
+            "underscores, starting with a letter."
+        )
+    return name
+
+
+class CollectionRegistry(ABC):
+    """
+    Named collections on top of the default one.
+
+    The default collection is defined by Settings (document_chunks with the
+    configured model, metric and index) and always exists; backends store
+    the others. Lookups are cached per worker for cache_ttl_s, so a
+    collection dropped through another worker stops resolving here within
+    that time.
+    """
+
+    def __init__(self, default: Collection, cache_ttl_s: float = 30.0):
+        self.default = default
+        self.cache_ttl_s = cache_ttl_s
+        self._lock = threading.Lock()
+        self._cache: Dict[str, tuple] = {}
+
+    def get(self, name: str) -> Collection:
+        if name == self.default.name:
+            return self.default
+
+        collection = self._cached(name)
+        if collection is None:
+            collection = self._load(name)
+            if collection is None:
+                raise CollectionNotFound(f"Collection '{name}' does not exist.")
+            self._remember(collection)
+        return collection
+
+    async def aget(self, name: str) -> Collection:
+        if name == self.default.name:
+            return self.default
+
+        # Cache hits stay on the event loop; misses read the backend in a thread
+        collection = self._cached(name)
+        if collection is None:
+            collection = await asyncio.to_thread(self.get, name)
+        return collection
+
+    def list(self) -> List[Collection]:
+        return [self.default] + self._list()
+
+    def create(
+        self,
+        name: str,
+        embedding_model: str,
+        dimension: int,
+        metric: str,
+        index_type: str,
+        index_params: Optional[dict] = None,
+        quantization: str = "none",
+    ) -> Collection:
+        validate_collection_name(name)
+        if name == self.default.name:
+            raise CollectionAlreadyExists(f"Collection '{name}' already exists.")
+        get_metric(metric)
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unsupported index type: {index_type}")
+        get_quantization(quantization, dimension)
+
+        collection = Collection(
+            name=name,
+            table=f"chunks_{name}",
+            embedding_model=embedding_model,
+            dimension=dimension,
+            metric=metric,
+            index_type=index_type,
+            index_params=index_params,
+            created_at=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            quantization=quantization,
+        )
+
+        start = time.perf_counter()
+        self._create(collection)
+        self._remember(collection)
+
+        logger.info(
+            "collection_created name=%s model=%s dimension=%d metric=%s index=%s "
+            "quantization=%s duration_s=%.3f",
+            name,
+            embedding_model,
+            dimension,
+            metric,
+            index_type,
+            quantization,
+            time.perf_counter() - start,
+        )
+        return collection
+
+    def drop(self, name: str) -> None:
+        if name == self.default.name:
+            raise ValueError("The default collection cannot be dropped.")
+
+        with self._lock:
+            self._cache.pop(name, None)
+        if not self._drop(name):
+            raise CollectionNotFound(f"Collection '{name}' does not exist.")
+
+        logger.info("collection_dropped name=%s", name)
+
+    # -----------------------------
+    # Backend
+    # -----------------------------
+
+    @abstractmethod
+    def _load(self, name: str) -> Optional[Collection]:
+        pass
+
+    @abstractmethod
+    def _list(self) -> List[Collection]:
+        pass
+
+    @abstractmethod
+    def _create(self, collection: Collection) -> None:
+        pass
+
+    @abstractmethod
+    def _drop(self, name: str) -> bool:
+        pass
+
+    # -----------------------------
+    # Cache
+    # -----------------------------
+
+    def _cached(self, name: str) -> Optional[Collection]:
+        with self._lock:
+            entry = self._cache.get(name)
+        if entry is None or time.monotonic() - entry[1] > self.cache_ttl_s:
+            return None
+        return entry[0]
+
+    def _remember(self, collection: Collection) -> None:
+        with self._lock:
+            self._cache[collection.name] = (collection, time.monotonic())
+
+
+def collection_table_sql(collection: Collection) -> List[str]:
+    """
+    DDL for a collection's table. Same columns and secondary indexes as
+    document_chunks in init.sql; the ANN index is created right away since
+    the table is empty. Quantized collections still store full-precision
+    vectors; only the index is built over the quantized expression.
+    """
+    table = collection.table
+    metric = get_metric(collection.metric)
+    quantization = get_quantization(collection.quantization, collection.dimension)
+    indexed = f"{quantization.index_expression()} {quantization.opclass(metric)}"
+    with_clause = index_with_clause(collection.index_type, **collection.index_params)
+
+    return [
+        f"""
+        CREATE TABLE {table} (
+            id UUID PRIMARY KEY,
+            document_id UUID,
+            chunk_index INT NOT NULL DEFAULT 0,
+            content TEXT NOT NULL,
+            metadata JSONB NOT NULL DEFAULT '{{}}',
+            embedding VECTOR({int(collection.dimension)}),
+            content_tsv TSVECTOR
+                GENERATED ALWAYS AS (to_tsvector('{TEXT_SEARCH_CONFIG}', content)) STORED
+        )
+        """,
+        f"CREATE INDEX {table}_document_idx ON {table} (document_id, chunk_index)",
+        f"CREATE INDEX {table}_content_tsv_idx ON {table} USING GIN (content_tsv)",
+        f"CREATE INDEX {table}_metadata_idx ON {table} USING GIN (metadata jsonb_path_ops)",
+        f"""
+        CREATE INDEX {index_name(table)} ON {table}
+        USING {collection.index_type} ({indexed})
+        WITH ({with_clause})
+        """,
+    ]
+
+
+class PgCollectionRegistry(CollectionRegistry):
+    """
+    Collections as separate tables (chunks_<name>), registered in
+    vector_collections. Each table has its own ANN index, statistics and
+    vacuum cycle, so a large tenant does not slow down a small one.
+    """
+
+    _SELECT = """
+        SELECT name, table_name, embedding_model, dimension, metric, index_type, index_params,
+               to_char(created_at AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS"Z"'), quantization
+        FROM vector_collections
+    """
+
+    def __init__(self, pool: PgConnectionPool, default: Collection, cache_ttl_s: float = 30.0):
+        super().__init__(default, cache_ttl_s)
+        self.pool = pool
+
+    def _load(self, name: str) -> Optional[Collection]:
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(self._SELECT + " WHERE name = %s", (name,))
+                row = cur.fetchone()
+        return self._collection(row) if row else None
+
+    def _list(self) -> List[Collection]:
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(self._SELECT + " ORDER BY name")
+                rows = cur.fetchall()
+        return [self._collection(row) for row in rows]
+
+    def _create(self, collection: Collection) -> None:
+        # Table, indexes and registry row commit together or not at all
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        """
+                        INSERT INTO vector_collections
+                            (name, table_name, embedding_model, dimension, metric, index_type,
+                             index_params, quantization)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s::jsonb, %s)
+                        """,
+                        (
+                            collection.name,
+                            collection.table,
+                            collection.embedding_model,
+                            collection.dimension,
+                            collection.metric,
+                            collection.index_type,
+                            json.dumps(collection.index_params),
+                            collection.quantization,
+                        ),
+                    )
+                    for statement in collection_table_sql(collection):
+                        cur.execute(statement)
+                conn.commit()
+        except (psycopg2.errors.UniqueViolation, psycopg2.errors.DuplicateTable):
+            raise CollectionAlreadyExists(f"Collection '{collection.name}' already exists.")
+
+    def _drop(self, name: str) -> bool:
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "DELETE FROM vector_collections WHERE name = %s RETURNING table_name",
+                    (name,),
+                )
+                row = cur.fetchone()
+                if row is None:
+                    conn.rollback()
+                    return False
+                # Waits only for queries on this collection's table
+                cur.execute(f"DROP TABLE IF EXISTS {row[0]}")
+            conn.commit()
+        return True
+
+    @staticmethod
+    def _collection(row) -> Collection:
+        name, table, model, dimension, metric, index_type, index_params, created_at, quantization = row
+        return Collection(
+            name, table, model, dimension, metric, index_type, index_params, created_at, quantization
+        )
+
+
+class MemoryCollectionRegistry(CollectionRegistry):
+    """
+    Collections as separate InMemoryVectorStore instances, persisted under
+    <path>/collections/<name>. Like the stores themselves, collections are
+    per process: each uvicorn worker has its own registry, so a collection
+    created through one worker does not exist in the others. Run a single
+    worker with VECTOR_BACKEND=memory, or use pgvector.
+    """
+
+    def __init__(
+        self,
+        default: Collection,
+        default_store,
+        store_factory: Callable[[str, Optional[str]], object],
+        path: Optional[str] = None,
+    ):
+        # Everything is in-process, so there is nothing to go stale
+        super().__init__(default, cache_ttl_s=float("inf"))
+        self.default_store = default_store
+        self.store_factory = store_factory
+        self.path = path
+        self._specs: Dict[str, Collection] = {}
+        self._stores: Dict[str, object] = {}
+        # Keeps a snapshot from recreating the directory of a collection being dropped
+        self._persist_lock = threading.Lock()
+
+        if path:
+            self._load_all()
+
+    def store(self, name: str):
+        if name == self.default.name:
+            return self.default_store
+        with self._lock:
+            store = self._stores.get(name)
+        if store is None:
+            raise CollectionNotFound(f"Collection '{name}' does not exist.")
+        return store
+
+    def stores(self) -> Dict[str, object]:
+        with self._lock:
+            return {self.default.name: self.default_store, **self._stores}
+
+    def persist(self, changed_only: bool = False) -> None:
+        with self._persist_lock:
+            for store in self.stores().values():
+                if store.path and (store.unpersisted or not changed_only):
+                    store.persist()
+
+    def _load(self, name: str) -> Optional[Collection]:
+        with self._lock:
+            return self._specs.get(name)
+
+    def _list(self) -> List[Collection]:
+        with self._lock:
+            return [self._specs[name] for name in sorted(self._specs)]
+
+    def _create(self, collection: Collection) -> None:
+        directory = self._directory(collection.name)
+
+        with self._lock:
+            if collection.name in self._specs:
+                raise CollectionAlreadyExists(f"Collection '{collection.name}' already exists.")
+            self._stores[collection.name] = self.store_factory(collection.metric, directory)
+            self._specs[collection.name] = collection
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, _COLLECTION_FILE), "w", encoding="utf-8") as f:
+                json.dump(collection.to_dict(), f)
+
+    def _drop(self, name: str) -> bool:
+        with self._lock:
+            if self._specs.pop(name, None) is None:
+                return False
+            self._stores.pop(name, None)
+
+        directory = self._directory(name)
+        if directory:
+            with self._persist_lock:
+                if os.path.isdir(directory):
+                    shutil.rmtree(directory)
+        return True
+
+    def _directory(self, name: str) -> Optional[str]:
+        return os.path.join(self.path, _COLLECTIONS_DIR, name) if self.path else None
+
+    def _load_all(self) -> None:
+        root = os.path.join(self.path, _COLLECTIONS_DIR)
+        if not os.path.isdir(root):
+            return
+
+        for name in sorted(os.listdir(root)):
+            spec_path = os.path.join(root, name, _COLLECTION_FILE)
+            if not os.path.exists(spec_path):
+                continue
+            with open(spec_path, encoding="utf-8") as f:
+                collection = Collection.from_dict(json.load(f))
+            self._specs[name] = collection
+            self._stores[name] = self.store_factory(collection.metric, os.path.join(root, name))
@@ -0,0 +1,299 @@
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(RuntimeError):
+    """Raised when no connection becomes available within the acquire timeout."""
+
+
+class PoolClosedError(RuntimeError):
+    """Raised when acquiring from a pool that has been closed."""
+
+
+class PgConnectionPool:
+    """
+    Thread-safe psycopg2 connection pool.
+
+    - Bounded size (min_size kept warm, never more than max_size open)
+    - Acquire timeout instead of unbounded waiting
+    - Idle connections above min_size are closed after max_idle_s
+    - Connections are recycled after max_lifetime_s
+    - Connections idle longer than validate_after_idle_s are checked
+      with SELECT 1 before being handed out
+    """
+
+    def __init__(
+        self,
+        host,
+        port,
+        db_name,
+        user,
+        password,
+        min_size: int = 1,
+        max_size: int = 10,
+        acquire_timeout_s: float = 5.0,
+        max_idle_s: float = 300.0,
+        max_lifetime_s: float = 3600.0,
+        validate_after_idle_s: float = 30.0,
+        configure: Optional[Callable] = None,
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Invalid pool size: require 0 <= min_size <= max_size and max_size >= 1.")
+
+        self._connect_kwargs = {
+            "host": host,
+            "port": port,
+            "dbname": db_name,
+            "user": user,
+            "password": password,
+        }
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout_s = acquire_timeout_s
+        self.max_idle_s = max_idle_s
+        self.max_lifetime_s = max_lifetime_s
+        self.validate_after_idle_s = validate_after_idle_s
+        # Called once on every new connection, e.g. to register type adapters
+        self._configure = configure
+
+        # Idle entries are (connection, created_at, last_used_at)
+        self._idle: Deque[Tuple[object, float, float]] = deque()
+        self._created_at: Dict[int, float] = {}
+        self._size = 0
+        self._waiting = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self._acquisitions = 0
+        self._timeouts = 0
+        self._wait_s_total = 0.0
+        self._wait_s_max = 0.0
+
+    # -----------------------------
+    # Lifecycle
+    # -----------------------------
+
+    def open(self) -> None:
+        """Pre-open min_size connections. Failures are logged, not raised."""
+        for _ in range(self.min_size):
+            with self._cond:
+                if self._size >= self.min_size:
+                    break
+                self._size += 1
+
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                logger.warning("db_pool_prefill_failed", exc_info=True)
+                return
+
+            now = time.monotonic()
+            with self._cond:
+                self._idle.append((conn, self._created_at[id(conn)], now))
+                self._cond.notify()
+
+        logger.info(
+            "db_pool_opened min_size=%d max_size=%d",
+            self.min_size,
+            self.max_size,
+        )
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+
+        for conn, _, _ in idle:
+            self._discard(conn)
+
+        logger.info("db_pool_closed")
+
+    # -----------------------------
+    # Borrowing
+    # -----------------------------
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """
+        Borrow a connection for the duration of the block.
+
+        Uncommitted work is rolled back on release; broken connections are
+        dropped from the pool instead of being reused.
+        """
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def acquire(self, timeout: Optional[float] = None):
+        timeout = self.acquire_timeout_s if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        entry = None
+
+        with self._cond:
+            self._waiting += 1
+            try:
+                while True:
+                    if self._closed:
+                        raise PoolClosedError("Connection pool is closed.")
+
+                    if self._idle:
+                        # LIFO keeps hot connections busy and lets cold ones age out
+                        entry = self._idle.pop()
+                        break
+
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            f"Timed out after {timeout:.2f}s waiting for a database connection "
+                            f"(max_size={self.max_size})."
+                        )
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+
+        try:
+            conn = self._connect() if entry is None else self._checkout(*entry)
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        wait_s = time.monotonic() - start
+        with self._cond:
+            self._acquisitions += 1
+            self._wait_s_total += wait_s
+            self._wait_s_max = max(self._wait_s_max, wait_s)
+
+        return conn
+
+    def release(self, conn) -> None:
+        healthy = not conn.closed
+
+        if healthy:
+            try:
+                if conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                healthy = False
+
+        now = time.monotonic()
+        created_at = self._created_at.get(id(conn), now)
+        expired = now - created_at > self.max_lifetime_s
+
+        with self._cond:
+            if healthy and not expired and not self._closed:
+                self._idle.append((conn, created_at, now))
+                stale = self._reap_idle(now)
+            else:
+                self._size -= 1
+                stale = [conn]
+            self._cond.notify()
+
+        for stale_conn in stale:
+            self._discard(stale_conn)
+
+    # -----------------------------
+    # Observability
+    # -----------------------------
+
+    def stats(self) -> dict:
+        with self._cond:
+            in_use = self._size - len(self._idle)
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": in_use,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "utilization": round(in_use / self.max_size, 3),
+                "acquisitions": self._acquisitions,
+                "timeouts": self._timeouts,
+                "wait_s_avg": round(self._wait_s_total / self._acquisitions, 6)
+                if self._acquisitions
+                else 0.0,
+                "wait_s_max": round(self._wait_s_max, 6),
+            }
+
+    # -----------------------------
+    # Internals
+    # -----------------------------
+
+    def _connect(self):
+        conn = psycopg2.connect(**self._connect_kwargs)
+        try:
+            if self._configure is not None:
+                self._configure(conn)
+                conn.commit()
+        except Exception:
+            conn.close()
+            raise
+        self._created_at[id(conn)] = time.monotonic()
+        return conn
+
+    def _discard(self, conn) -> None:
+        self._created_at.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _checkout(self, conn, created_at: float, last_used_at: float):
+        now = time.monotonic()
+
+        if conn.closed or now - created_at > self.max_lifetime_s:
+            self._discard(conn)
+            return self._connect()
+
+        if now - last_used_at > self.validate_after_idle_s and not self._is_alive(conn):
+            logger.warning("db_pool_connection_invalid replacing=true")
+            self._discard(conn)
+            return self._connect()
+
+        return conn
+
+    def _is_alive(self, conn) -> bool:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+                cur.fetchone()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _reap_idle(self, now: float) -> list:
+        """Pop idle connections above min_size unused for max_idle_s. Caller holds the lock."""
+        stale = []
+        # Oldest idle entries sit at the left of the deque
+        while self._idle and self._size > self.min_size:
+            conn, _, last_used_at = self._idle[0]
+            if now - last_used_at <= self.max_idle_s:
+                break
+            self._idle.popleft()
+            self._size -= 1
+            stale.append(conn)
+        return stale
@@ -0,0 +1,46 @@
+from typing import Callable, Dict
+
+
+class DistanceMetric:
+    """
+    Ties together everything that must agree for pgvector to use an index:
+    the ORDER BY operator, the index operator class and the conversion of
+    the raw distance into a "higher is better" similarity score.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        operator: str,
+        opclass: str,
+        to_similarity: Callable[[float], float],
+    ):
+        self.name = name
+        self.operator = operator
+        self.opclass = opclass
+        self.to_similarity = to_similarity
+
+
+METRICS: Dict[str, DistanceMetric] = {
+    # <=> is cosine distance in [0, 2]; similarity = cosine similarity in [-1, 1]
+    "cosine": DistanceMetric(
+        "cosine", "<=>", "vector_cosine_ops", lambda d: 1.0 - d
+    ),
+    # <-> is euclidean distance in [0, inf); similarity mapped into (0, 1]
+    "l2": DistanceMetric(
+        "l2", "<->", "vector_l2_ops", lambda d: 1.0 / (1.0 + d)
+    ),
+    # <#> is the negative inner product; similarity = dot product
+    "inner_product": DistanceMetric(
+        "inner_product", "<#>", "vector_ip_ops", lambda d: -d
+    ),
+}
+
+
+def get_metric(name: str) -> DistanceMetric:
+    metric = METRICS.get((name or "").lower().strip())
+    if metric is None:
+        raise ValueError(
+            f"Unsupported distance metric: {name}. Expected one of {sorted(METRICS)}."
+        )
+    return metric
@@ -0,0 +1,362 @@
+import logging
+import math
+import threading
+import time
+from typing import Optional
+
+from app.infrastructure.vector_store.connection_pool import PgConnectionPool
+from app.infrastructure.vector_store.distance import get_metric
+from app.infrastructure.vector_store.quantization import get_quantization
+
+logger = logging.getLogger(__name__)
+
+TABLE_NAME = "document_chunks"
+INDEX_TYPES = ("ivfflat", "hnsw")
+
+
+def index_name(table: str) -> str:
+    return f"{table}_embedding_idx"
+
+
+class IndexOperationInProgress(RuntimeError):
+    """Raised when a build or rebuild is requested while another one runs."""
+
+
+def recommended_ivfflat_lists(row_count: int) -> int:
+    """
+    pgvector guidance: rows / 1000 up to 1M rows, sqrt(rows) above that.
+    """
+    if row_count <= 1_000_000:
+        return max(1, row_count // 1000)
+    return int(math.sqrt(row_count))
+
+
+def index_with_clause(
+    index_type: str,
+    lists: Optional[int] = None,
+    m: Optional[int] = None,
+    ef_construction: Optional[int] = None,
+) -> str:
+    if index_type == "ivfflat":
+        return f"lists = {int(lists or 100)}"
+    return f"m = {int(m or 16)}, ef_construction = {int(ef_construction or 64)}"
+
+
+class VectorIndexManager:
+    """
+    Online management of the ANN index on one collection table's embedding
+    column (document_chunks for the default collection), or on its halfvec
+    or binary expression when the collection is quantized.
+
+    Builds always create the new index CONCURRENTLY under a temporary name,
+    then drop the old index CONCURRENTLY and take over the canonical name,
+    so searches keep using the previous index until the new one is valid.
+    Only one build, rebuild or vacuum runs per table and process at a time;
+    other collections have their own manager.
+    """
+
+    def __init__(
+        self,
+        pool: PgConnectionPool,
+        metric: str = "cosine",
+        default_index_type: str = "ivfflat",
+        hnsw_m: int = 16,
+        hnsw_ef_construction: int = 64,
+        maintenance_work_mem: Optional[str] = None,
+        table: str = TABLE_NAME,
+        quantization: str = "none",
+        dimension: Optional[int] = None,
+    ):
+        self.pool = pool
+        self.table = table
+        self.index_name = index_name(table)
+        self.metric = get_metric(metric)
+        # Must match the repositories' quantization, or searches cannot use the index
+        self.quantization = get_quantization(quantization, dimension)
+        self.opclass = self.quantization.opclass(self.metric)
+        self.default_index_type = default_index_type
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.maintenance_work_mem = maintenance_work_mem
+
+        self._lock = threading.Lock()
+        self._operation: Optional[dict] = None
+        self._last_operation: Optional[dict] = None
+
+    # -----------------------------
+    # Status
+    # -----------------------------
+
+    def status(self) -> dict:
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                    (self.table,),
+                )
+                row = cur.fetchone()
+                row_count = max(0, row[0]) if row else 0
+
+                cur.execute(
+                    """
+                    SELECT i.relname, am.amname, pg_get_indexdef(i.oid),
+                           ix.indisvalid, ix.indisready, pg_relation_size(i.oid)
+                    FROM pg_index ix
+                    JOIN pg_class i ON i.oid = ix.indexrelid
+                    JOIN pg_class t ON t.oid = ix.indrelid
+                    JOIN pg_am am ON am.oid = i.relam
+                    WHERE t.relname = %s AND am.amname IN ('ivfflat', 'hnsw')
+                    ORDER BY i.relname
+                    """,
+                    (self.table,),
+                )
+                indexes = cur.fetchall()
+
+                cur.execute(
+                    """
+                    SELECT p.phase, p.blocks_done, p.blocks_total,
+                           p.tuples_done, p.tuples_total
+                    FROM pg_stat_progress_create_index p
+                    JOIN pg_class t ON t.oid = p.relid
+                    WHERE t.relname = %s
+                    """,
+                    (self.table,),
+                )
+                progress = cur.fetchone()
+
+                cur.execute(
+                    """
+                    SELECT n_live_tup, n_dead_tup, last_vacuum, last_autovacuum
+                    FROM pg_stat_user_tables
+                    WHERE relname = %s
+                    """,
+                    (self.table,),
+                )
+                table_stats = cur.fetchone()
+
+        return {
+            "table": self.table,
+            "estimated_rows": row_count,
+            "metric": self.metric.name,
+            "quantization": self.quantization.name,
+            "recommended_ivfflat_lists": recommended_ivfflat_lists(row_count),
+            "indexes": [
+                {
+                    "name": name,
+                    "type": method,
+                    "definition": definition,
+                    "valid": valid,
+                    "ready": ready,
+                    "size_bytes": size,
+                    "metric_matches": self.opclass in definition,
+                }
+                for name, method, definition, valid, ready, size in indexes
+            ],
+            "build_progress": (
+                {
+                    "phase": progress[0],
+                    "blocks_done": progress[1],
+                    "blocks_total": progress[2],
+                    "tuples_done": progress[3],
+                    "tuples_total": progress[4],
+                }
+                if progress
+                else None
+            ),
+            "vacuum": (
+                {
+                    "live_tuples": table_stats[0],
+                    "dead_tuples": table_stats[1],
+                    "last_vacuum": table_stats[2],
+                    "last_autovacuum": table_stats[3],
+                }
+                if table_stats
+                else None
+            ),
+            "operation": self._operation,
+            "last_operation": self._last_operation,
+        }
+
+    # -----------------------------
+    # Build / rebuild
+    # -----------------------------
+
+    def begin(self, kind: str, **params) -> dict:
+        """Reserve the single operation slot; raises if one is already running."""
+        with self._lock:
+            if self._operation is not None:
+                raise IndexOperationInProgress(
+                    f"Index {self._operation['kind']} already running since {self._operation['started_at']}."
+                )
+            self._operation = {
+                "kind": kind,
+                "params": params,
+                "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            }
+            return dict(self._operation)
+
+    def build(
+        self,
+        index_type: Optional[str] = None,
+        lists: Optional[int] = None,
+        m: Optional[int] = None,
+        ef_construction: Optional[int] = None,
+    ) -> None:
+        """
+        Build a new ANN index and swap it in. Must be preceded by begin().
+        ivfflat lists default to the recommendation for the current row count.
+        """
+        index_type = (index_type or self.default_index_type).lower()
+        if index_type not in INDEX_TYPES:
+            self._finish("failed", error=f"Unsupported index type: {index_type}")
+            raise ValueError(f"Unsupported index type: {index_type}")
+
+        start = time.perf_counter()
+        temp_name = f"{self.index_name}_new"
+
+        try:
+            with self.pool.connection(timeout=30.0) as conn:
+                conn.autocommit = True
+                try:
+                    with conn.cursor() as cur:
+                        self._apply_maintenance_settings(cur)
+
+                        if index_type == "ivfflat" and lists is None:
+                            cur.execute(f"SELECT count(*) FROM {self.table}")
+                            lists = recommended_ivfflat_lists(cur.fetchone()[0])
+                        with_clause = index_with_clause(
+                            index_type,
+                            lists,
+                            m or self.hnsw_m,
+                            ef_construction or self.hnsw_ef_construction,
+                        )
+
+                        # Leftover from an interrupted build would be INVALID
+                        cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {temp_name}")
+                        cur.execute(
+                            f"""
+                            CREATE INDEX CONCURRENTLY {temp_name}
+                            ON {self.table}
+                            USING {index_type} ({self.quantization.index_expression()} {self.opclass})
+                            WITH ({with_clause})
+                            """
+                        )
+
+                        cur.execute(
+                            """
+                            SELECT i.relname
+                            FROM pg_index ix
+                            JOIN pg_class i ON i.oid = ix.indexrelid
+                            JOIN pg_class t ON t.oid = ix.indrelid
+                            JOIN pg_am am ON am.oid = i.relam
+                            WHERE t.relname = %s AND am.amname IN ('ivfflat', 'hnsw')
+                            AND i.relname <> %s
+                            """,
+                            (self.table, temp_name),
+                        )
+                        for (old_name,) in cur.fetchall():
+                            cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {old_name}")
+
+                        cur.execute(f"ALTER INDEX {temp_name} RENAME TO {self.index_name}")
+                        cur.execute(f"ANALYZE {self.table}")
+                finally:
+                    self._reset_maintenance_settings(conn)
+                    conn.autocommit = False
+
+        except Exception as exc:
+            logger.error(
+                "vector_index_build_failed table=%s type=%s", self.table, index_type, exc_info=True
+            )
+            self._finish("failed", error=str(exc))
+            raise
+
+        duration = time.perf_counter() - start
+        logger.info(
+            "vector_index_built table=%s type=%s quantization=%s params=%s duration_s=%.3f",
+            self.table,
+            index_type,
+            self.quantization.name,
+            with_clause,
+            duration,
+        )
+        self._finish("completed", duration_s=duration)
+
+    def rebuild(self) -> None:
+        """
+        REINDEX CONCURRENTLY with the current parameters. For ivfflat this
+        recomputes list centroids, restoring recall after bulk inserts.
+        Must be preceded by begin().
+        """
+        start = time.perf_counter()
+
+        try:
+            with self.pool.connection(timeout=30.0) as conn:
+                conn.autocommit = True
+                try:
+                    with conn.cursor() as cur:
+                        self._apply_maintenance_settings(cur)
+                        cur.execute(f"REINDEX INDEX CONCURRENTLY {self.index_name}")
+                finally:
+                    self._reset_maintenance_settings(conn)
+                    conn.autocommit = False
+
+        except Exception as exc:
+            logger.error("vector_index_rebuild_failed table=%s", self.table, exc_info=True)
+            self._finish("failed", error=str(exc))
+            raise
+
+        duration = time.perf_counter() - start
+        logger.info("vector_index_rebuilt table=%s duration_s=%.3f", self.table, duration)
+        self._finish("completed", duration_s=duration)
+
+    def vacuum(self) -> None:
+        """
+        VACUUM (ANALYZE) this table only, e.g. after a bulk load or a large
+        delete. Must be preceded by begin().
+        """
+        start = time.perf_counter()
+
+        try:
+            with self.pool.connection(timeout=30.0) as conn:
+                # VACUUM cannot run inside a transaction block
+                conn.autocommit = True
+                try:
+                    with conn.cursor() as cur:
+                        self._apply_maintenance_settings(cur)
+                        cur.execute(f"VACUUM (ANALYZE) {self.table}")
+                finally:
+                    self._reset_maintenance_settings(conn)
+                    conn.autocommit = False
+
+        except Exception as exc:
+            logger.error("vector_table_vacuum_failed table=%s", self.table, exc_info=True)
+            self._finish("failed", error=str(exc))
+            raise
+
+        duration = time.perf_counter() - start
+        logger.info("vector_table_vacuumed table=%s duration_s=%.3f", self.table, duration)
+        self._finish("completed", duration_s=duration)
+
+    # -----------------------------
+    # Internals
+    # -----------------------------
+
+    def _apply_maintenance_settings(self, cur) -> None:
+        if self.maintenance_work_mem:
+            cur.execute(
+                "SELECT set_config('maintenance_work_mem', %s, false)",
+                (self.maintenance_work_mem,),
+            )
+
+    def _reset_maintenance_settings(self, conn) -> None:
+        # Pooled connections are reused; do not leak session settings
+        if self.maintenance_work_mem and not conn.closed:
+            with conn.cursor() as cur:
+                cur.execute("RESET maintenance_work_mem")
+
+    def _finish(self, outcome: str, **details) -> None:
+        with self._lock:
+            operation = dict(self._operation or {})
+            operation.update(details, outcome=outcome)
+            self._last_operation = operation
+            self._operation = None
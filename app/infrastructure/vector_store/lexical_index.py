@@ -0,0 +1,99 @@
+import math
+import re
+import threading
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+_TOKEN = re.compile(r"\w+")
+
+
+def lexical_tokens(text: str) -> List[str]:
+    """Lowercased word tokens. No stemming, so tickers and codes match exactly."""
+    return _TOKEN.findall(text.lower())
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Tuple[Sequence[str], float]],
+    rrf_k: int = 60,
+) -> List[Tuple[str, float, List[int]]]:
+    """
+    Weighted RRF: score(d) = sum(weight / (rrf_k + rank)), ranks from 1.
+    Returns (key, score, per-ranking rank or None) sorted by score.
+    """
+    scores: Dict[str, float] = {}
+    ranks: Dict[str, List] = {}
+
+    for position, (keys, weight) in enumerate(rankings):
+        for rank, key in enumerate(keys, start=1):
+            scores[key] = scores.get(key, 0.0) + weight / (rrf_k + rank)
+            ranks.setdefault(key, [None] * len(rankings))[position] = rank
+
+    fused = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return [(key, score, ranks[key]) for key, score in fused]
+
+
+class BM25Index:
+    """
+    Inverted index with Okapi BM25 scoring, the in-process counterpart of
+    the tsvector/GIN lexical leg used with Postgres.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._total_length = 0
+
+    def add_many(self, documents: Iterable[Tuple[str, str]]) -> None:
+        tokenized = [(key, Counter(lexical_tokens(text))) for key, text in documents]
+
+        with self._lock:
+            for key, counts in tokenized:
+                for term, frequency in counts.items():
+                    self._postings.setdefault(term, {})[key] = frequency
+                length = sum(counts.values())
+                self._lengths[key] = length
+                self._total_length += length
+
+    def remove_many(self, documents: Iterable[Tuple[str, str]]) -> None:
+        with self._lock:
+            for key, text in documents:
+                for term in set(lexical_tokens(text)):
+                    postings = self._postings.get(term)
+                    if postings is not None:
+                        postings.pop(key, None)
+                        if not postings:
+                            del self._postings[term]
+                self._total_length -= self._lengths.pop(key, 0)
+
+    def search(
+        self,
+        query: str,
+        limit: int,
+        allowed: Optional[Callable[[str], bool]] = None,
+    ) -> List[str]:
+        """Top keys by BM25; `allowed` restricts the candidates before the limit."""
+        terms = set(lexical_tokens(query))
+
+        with self._lock:
+            count = len(self._lengths)
+            if not count or not terms:
+                return []
+            average_length = self._total_length / count
+
+            scores: Dict[str, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1.0 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for key, frequency in postings.items():
+                    norm = self.k1 * (1.0 - self.b + self.b * self._lengths[key] / average_length)
+                    scores[key] = scores.get(key, 0.0) + idf * frequency * (self.k1 + 1.0) / (frequency + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if allowed is not None:
+            ranked = [item for item in ranked if allowed(item[0])]
+        return [key for key, _ in ranked[:limit]]
@@ -0,0 +1,587 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.domain.filters import MetadataFilter, matches
+from app.domain.services import AsyncVectorRepository, VectorRepository
+from app.infrastructure.vector_store.distance import get_metric
+from app.infrastructure.vector_store.lexical_index import BM25Index, reciprocal_rank_fusion
+from app.infrastructure.vector_store.vector_codec import as_float32
+
+try:
+    import hnswlib
+except ImportError:  # Optional: only needed for ann=True
+    hnswlib = None
+
+logger = logging.getLogger(__name__)
+
+_EMBEDDINGS_FILE = "embeddings.npy"
+_LABELS_FILE = "labels.npy"
+_CHUNKS_FILE = "chunks.jsonl"
+_GRAPH_FILE = "hnsw.bin"
+_META_FILE = "meta.json"
+
+# hnswlib space per metric; its raw distances are converted to pgvector's
+_HNSW_SPACES = {"cosine": "cosine", "l2": "l2", "inner_product": "ip"}
+_INITIAL_CAPACITY = 1024
+_DEFAULT_EF_SEARCH = 64
+
+
+class InMemoryVectorStore(VectorRepository, AsyncVectorRepository):
+    """
+    In-process vector store for corpora that fit in RAM.
+
+    Embeddings live in one contiguous float32 matrix; exact top-k is a
+    matrix-vector product followed by argpartition. With ann=True an
+    hnswlib graph index answers searches instead (ef_search applies,
+    probes is ignored). Hybrid search fuses either with a BM25 index over
+    the chunk contents. Metadata-filtered searches are always exact over
+    the matching rows.
+
+    Scores use the same metric definitions as PgVectorRepository, so both
+    backends rank and score identically. With a path, the store is loaded
+    from disk at construction (embeddings memory-mapped, nothing is
+    re-embedded) and written back by persist(). Writes made since the
+    last persist() are lost if the process dies.
+
+    State is per process: with several workers, each holds its own copy.
+    """
+
+    def __init__(
+        self,
+        metric: str = "cosine",
+        path: Optional[str] = None,
+        ann: bool = False,
+        hnsw_m: int = 16,
+        hnsw_ef_construction: int = 64,
+        default_ef_search: Optional[int] = None,
+    ):
+        if ann and hnswlib is None:
+            raise RuntimeError("ann=True requires the hnswlib package (pip install hnswlib).")
+
+        self.metric = get_metric(metric)
+        self.path = path
+        self.ann = ann
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.default_ef_search = default_ef_search
+
+        self._lock = threading.RLock()
+        self._dimension: Optional[int] = None
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._sq_norms = np.empty(0, dtype=np.float32)
+        self._size = 0
+        self._ids: List[str] = []
+        self._document_ids: List[str] = []
+        self._chunk_indexes: List[int] = []
+        self._contents: List[str] = []
+        self._metadata: List[dict] = []
+        self._id_rows: Dict[str, int] = {}
+        self._lexical = BM25Index()
+
+        # Graph labels are stable ids; rows move when documents are deleted
+        self._labels = np.empty(0, dtype=np.int64)
+        self._label_rows: Dict[int, int] = {}
+        self._next_label = 0
+        self._graph = None
+
+        # Mutations since construction, and as of the last persist()
+        self._changes = 0
+        self._persisted_changes = 0
+        self._persist_lock = threading.Lock()
+
+        if path and os.path.exists(os.path.join(path, _META_FILE)):
+            self._load(path)
+
+    # -----------------------------
+    # VectorRepository
+    # -----------------------------
+
+    def save(
+        self,
+        chunk_id: str,
+        content: str,
+        embedding: List[float],
+        document_id: Optional[str] = None,
+        chunk_index: int = 0,
+        metadata: Optional[dict] = None,
+    ) -> None:
+        self.save_many([(chunk_id, document_id or chunk_id, chunk_index, content, metadata, embedding)])
+
+    def save_many(self, items: Sequence[Tuple[str, str, int, str, dict, List[float]]]) -> None:
+        if not items:
+            return
+
+        vectors = np.stack([as_float32(item[5]) for item in items])
+
+        with self._lock:
+            self._ensure_dimension(vectors.shape[1])
+            start = self._size
+            end = start + len(items)
+            self._reserve(end)
+
+            self._matrix[start:end] = vectors
+            self._sq_norms[start:end] = np.einsum("ij,ij->i", vectors, vectors)
+            labels = np.arange(self._next_label, self._next_label + len(items), dtype=np.int64)
+            self._labels[start:end] = labels
+            self._next_label += len(items)
+
+            for offset, (chunk_id, document_id, chunk_index, content, metadata, _) in enumerate(items):
+                self._ids.append(str(chunk_id))
+                self._document_ids.append(str(document_id))
+                self._chunk_indexes.append(chunk_index)
+                self._contents.append(content)
+                self._metadata.append(metadata or {})
+                self._id_rows[str(chunk_id)] = start + offset
+
+            self._lexical.add_many((str(item[0]), item[3]) for item in items)
+
+            if self._graph is not None:
+                self._graph_add(vectors, labels)
+                self._label_rows.update((int(label), start + offset) for offset, label in enumerate(labels))
+
+            # Published last: searches only read rows below _size
+            self._size = end
+            self._changes += 1
+
+    def delete_document(self, document_id: str) -> int:
+        document_id = str(document_id)
+
+        with self._lock:
+            keep = [i for i in range(self._size) if self._document_ids[i] != document_id]
+            deleted = self._size - len(keep)
+            if not deleted:
+                return 0
+
+            removed = [i for i in range(self._size) if self._document_ids[i] == document_id]
+            if self._graph is not None:
+                for i in removed:
+                    self._graph.mark_deleted(int(self._labels[i]))
+            self._lexical.remove_many((self._ids[i], self._contents[i]) for i in removed)
+
+            # Fresh arrays and lists: searches holding the old snapshot stay valid
+            rows = np.asarray(keep, dtype=np.int64)
+            self._matrix = np.ascontiguousarray(self._matrix[rows])
+            self._sq_norms = self._sq_norms[rows].copy()
+            self._labels = self._labels[rows].copy()
+            self._ids = [self._ids[i] for i in keep]
+            self._document_ids = [self._document_ids[i] for i in keep]
+            self._chunk_indexes = [self._chunk_indexes[i] for i in keep]
+            self._contents = [self._contents[i] for i in keep]
+            self._metadata = [self._metadata[i] for i in keep]
+            self._size = len(keep)
+            self._id_rows = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+            self._label_rows = self._rows_by_label()
+            self._changes += 1
+
+        return deleted
+
+    def similarity_search(
+        self,
+        embedding: List[float],
+        k: int,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        metadata_filter: Optional[MetadataFilter] = None,
+    ):
+        query = as_float32(embedding)
+
+        if metadata_filter:
+            # Exact over the matching rows: k results whenever k rows match
+            return self._exact_search(query, k, metadata_filter)
+        if self._graph is not None:
+            return self._graph_search(query, k, ef_search or self.default_ef_search)
+        return self._exact_search(query, k)
+
+    def hybrid_search(
+        self,
+        embedding: List[float],
+        query_text: str,
+        k: int,
+        candidates: int = 50,
+        semantic_weight: float = 1.0,
+        lexical_weight: float = 1.0,
+        rrf_k: int = 60,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        metadata_filter: Optional[MetadataFilter] = None,
+    ):
+        candidates = max(candidates, k)
+        semantic = self.similarity_search(embedding, candidates, probes, ef_search, metadata_filter)
+        lexical = self._lexical.search(
+            query_text, candidates, self._filter_predicate(metadata_filter)
+        )
+
+        fused = reciprocal_rank_fusion(
+            [([r["id"] for r in semantic], semantic_weight), (lexical, lexical_weight)],
+            rrf_k,
+        )
+
+        with self._lock:
+            columns = self._columns()
+            id_rows = self._id_rows
+
+        results = []
+        for chunk_id, score, (semantic_rank, lexical_rank) in fused:
+            row = id_rows.get(chunk_id)
+            if row is None or row >= len(columns[0]):
+                continue  # Deleted or still being inserted
+            result = self._result(columns, row, 0.0)
+            result.update(score=score, semantic_rank=semantic_rank, lexical_rank=lexical_rank)
+            results.append(result)
+            if len(results) == k:
+                break
+        return results
+
+    # -----------------------------
+    # AsyncVectorRepository
+    # -----------------------------
+
+    # Searches and inserts are CPU-bound (NumPy releases the GIL), so the
+    # async variants run them in a thread instead of on the event loop.
+
+    async def asave(
+        self,
+        chunk_id: str,
+        content: str,
+        embedding: List[float],
+        document_id: Optional[str] = None,
+        chunk_index: int = 0,
+        metadata: Optional[dict] = None,
+    ) -> None:
+        await asyncio.to_thread(
+            self.save, chunk_id, content, embedding, document_id, chunk_index, metadata
+        )
+
+    async def asave_many(self, items: Sequence[Tuple[str, str, int, str, dict, List[float]]]) -> None:
+        await asyncio.to_thread(self.save_many, items)
+
+    async def adelete_document(self, document_id: str) -> int:
+        return await asyncio.to_thread(self.delete_document, document_id)
+
+    async def asimilarity_search(
+        self,
+        embedding: List[float],
+        k: int,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        metadata_filter: Optional[MetadataFilter] = None,
+    ):
+        return await asyncio.to_thread(
+            self.similarity_search, embedding, k, probes, ef_search, metadata_filter
+        )
+
+    async def asimilarity_search_many(
+        self,
+        embeddings: Sequence[List[float]],
+        k: int,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        metadata_filter: Optional[MetadataFilter] = None,
+    ):
+        # One thread hop for all queries
+        return await asyncio.to_thread(
+            self.similarity_search_many, embeddings, k, probes, ef_search, metadata_filter
+        )
+
+    async def ahybrid_search(self, embedding: List[float], query_text: str, k: int, **params):
+        return await asyncio.to_thread(self.hybrid_search, embedding, query_text, k, **params)
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+
+    def persist(self, path: Optional[str] = None) -> None:
+        """
+        Write the store to a directory. Each file is written under a
+        temporary name and renamed into place, meta.json last.
+        """
+        path = path or self.path
+        if not path:
+            raise ValueError("No path configured for the vector store.")
+
+        # Periodic and shutdown snapshots share the temporary files
+        with self._persist_lock:
+            start = time.perf_counter()
+            os.makedirs(path, exist_ok=True)
+
+            with self._lock:
+                size = self._size
+                changes = self._changes
+                dimension = self._dimension
+                next_label = self._next_label
+                matrix = self._matrix[:size]
+                labels = self._labels[:size]
+                chunks = list(zip(*self._columns()))[:size]
+
+                # An hnswlib index cannot be copied cheaply; save it under the lock
+                if self._graph is not None:
+                    self._graph.save_index(os.path.join(path, _GRAPH_FILE + ".tmp"))
+
+            self._write(path, _EMBEDDINGS_FILE, lambda f: np.save(f, matrix))
+            self._write(path, _LABELS_FILE, lambda f: np.save(f, labels))
+            self._write(
+                path,
+                _CHUNKS_FILE,
+                lambda f: f.writelines(
+                    (json.dumps(chunk, ensure_ascii=False) + "\n").encode("utf-8") for chunk in chunks
+                ),
+            )
+            if self._graph is not None:
+                os.replace(os.path.join(path, _GRAPH_FILE + ".tmp"), os.path.join(path, _GRAPH_FILE))
+
+            meta = {
+                "metric": self.metric.name,
+                "dimension": dimension,
+                "count": size,
+                "next_label": next_label,
+                "ann": self._graph is not None,
+            }
+            self._write(path, _META_FILE, lambda f: f.write(json.dumps(meta).encode("utf-8")))
+            self._persisted_changes = changes
+
+            logger.info(
+                "vector_store_persisted path=%s count=%d duration_s=%.3f",
+                path,
+                size,
+                time.perf_counter() - start,
+            )
+
+    @property
+    def unpersisted(self) -> bool:
+        """Whether the store changed since it was last persisted."""
+        return self._changes != self._persisted_changes
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "count": self._size,
+                "dimension": self._dimension,
+                "metric": self.metric.name,
+                "ann": self._graph is not None,
+                "capacity": self._matrix.shape[0],
+                "matrix_bytes": int(self._matrix.nbytes),
+                "memory_mapped": isinstance(self._matrix, np.memmap),
+                "path": self.path,
+            }
+
+    # -----------------------------
+    # Internals
+    # -----------------------------
+
+    def _columns(self):
+        # Per-row lists, replaced (never mutated in place) by deletes
+        return self._ids, self._document_ids, self._chunk_indexes, self._contents, self._metadata
+
+    def _snapshot(self):
+        with self._lock:
+            size = self._size
+            return self._matrix[:size], self._sq_norms[:size], self._columns()
+
+    def _exact_search(
+        self, query: np.ndarray, k: int, metadata_filter: Optional[MetadataFilter] = None
+    ):
+        matrix, sq_norms, columns = self._snapshot()
+        if matrix.shape[0] == 0 or k <= 0:
+            return []
+
+        rows = None
+        if metadata_filter:
+            metadata = columns[4]
+            rows = np.fromiter(
+                (i for i in range(matrix.shape[0]) if matches(metadata[i], metadata_filter)),
+                dtype=np.int64,
+            )
+            if rows.shape[0] == 0:
+                return []
+            matrix, sq_norms = matrix[rows], sq_norms[rows]
+
+        dots = matrix @ query
+        distances = self._distances(dots, sq_norms, query)
+
+        k = min(k, distances.shape[0])
+        if k < distances.shape[0]:
+            top = np.argpartition(distances, k - 1)[:k]
+        else:
+            top = np.arange(distances.shape[0])
+        top = top[np.argsort(distances[top], kind="stable")]
+
+        return [
+            self._result(columns, row if rows is None else rows[row], distances[row])
+            for row in top
+        ]
+
+    def _filter_predicate(self, metadata_filter: Optional[MetadataFilter]):
+        if not metadata_filter:
+            return None
+
+        with self._lock:
+            metadata, id_rows = self._metadata, self._id_rows
+
+        def allowed(chunk_id: str) -> bool:
+            row = id_rows.get(chunk_id)
+            return row is not None and row < len(metadata) and matches(metadata[row], metadata_filter)
+
+        return allowed
+
+    def _distances(self, dots: np.ndarray, sq_norms: np.ndarray, query: np.ndarray) -> np.ndarray:
+        # Same definitions as pgvector's <=>, <-> and <#>
+        if self.metric.name == "cosine":
+            norms = np.sqrt(sq_norms) * np.linalg.norm(query)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return 1.0 - np.where(norms > 0, dots / norms, 0.0)
+        if self.metric.name == "l2":
+            return np.sqrt(np.maximum(sq_norms - 2.0 * dots + np.dot(query, query), 0.0))
+        return -dots
+
+    def _graph_search(self, query: np.ndarray, k: int, ef_search: Optional[int]):
+        with self._lock:
+            # Deleted labels are skipped by hnswlib; it can return at most the live count
+            k = min(k, self._size)
+            if k <= 0:
+                return []
+            label_rows, columns = self._label_rows, self._columns()
+
+            # ef is index-wide state in hnswlib, so set it and query together
+            self._graph.set_ef(max(ef_search or _DEFAULT_EF_SEARCH, k))
+            labels, distances = self._graph.knn_query(query, k=k)
+
+        return [
+            self._result(columns, label_rows[int(label)], self._graph_distance(distance))
+            for label, distance in zip(labels[0], distances[0])
+        ]
+
+    def _graph_distance(self, distance: float) -> float:
+        # hnswlib: cosine is 1 - cos (as pgvector), l2 is squared, ip is 1 - dot
+        if self.metric.name == "l2":
+            return float(np.sqrt(max(distance, 0.0)))
+        if self.metric.name == "inner_product":
+            return float(distance) - 1.0
+        return float(distance)
+
+    def _result(self, columns, row: int, distance: float) -> dict:
+        ids, document_ids, chunk_indexes, contents, metadata = columns
+        return {
+            "id": ids[row],
+            "document_id": document_ids[row],
+            "chunk_index": chunk_indexes[row],
+            "content": contents[row],
+            "metadata": metadata[row],
+            "score": self.metric.to_similarity(float(distance)),
+        }
+
+    def _ensure_dimension(self, dimension: int) -> None:
+        if self._dimension is None:
+            self._dimension = dimension
+            self._matrix = np.empty((0, dimension), dtype=np.float32)
+            if self.ann:
+                self._graph = self._new_graph(_INITIAL_CAPACITY)
+        elif dimension != self._dimension:
+            raise ValueError(
+                f"Embedding dimension {dimension} does not match the store ({self._dimension})."
+            )
+
+    def _reserve(self, size: int) -> None:
+        capacity = self._matrix.shape[0]
+        if size <= capacity:
+            return
+
+        # Amortized doubling; also moves a memory-mapped matrix into RAM on first write
+        capacity = max(size, capacity * 2, _INITIAL_CAPACITY)
+        matrix = np.empty((capacity, self._dimension), dtype=np.float32)
+        matrix[: self._size] = self._matrix[: self._size]
+        sq_norms = np.empty(capacity, dtype=np.float32)
+        sq_norms[: self._size] = self._sq_norms[: self._size]
+        labels = np.empty(capacity, dtype=np.int64)
+        labels[: self._size] = self._labels[: self._size]
+
+        self._matrix, self._sq_norms, self._labels = matrix, sq_norms, labels
+
+    def _new_graph(self, capacity: int):
+        graph = hnswlib.Index(space=_HNSW_SPACES[self.metric.name], dim=self._dimension)
+        graph.init_index(
+            max_elements=capacity,
+            ef_construction=self.hnsw_ef_construction,
+            M=self.hnsw_m,
+        )
+        return graph
+
+    def _graph_add(self, vectors: np.ndarray, labels: np.ndarray) -> None:
+        needed = self._graph.get_current_count() + len(labels)
+        if needed > self._graph.get_max_elements():
+            self._graph.resize_index(max(needed, self._graph.get_max_elements() * 2))
+        self._graph.add_items(vectors, labels)
+
+    def _load(self, path: str) -> None:
+        start = time.perf_counter()
+
+        with open(os.path.join(path, _META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+
+        matrix = np.load(os.path.join(path, _EMBEDDINGS_FILE), mmap_mode="r")
+        labels = np.load(os.path.join(path, _LABELS_FILE))
+        with open(os.path.join(path, _CHUNKS_FILE), encoding="utf-8") as f:
+            chunks = [json.loads(line) for line in f]
+
+        if not (matrix.shape[0] == labels.shape[0] == len(chunks) == meta["count"]):
+            raise ValueError(f"Vector store files in {path} are inconsistent.")
+
+        self._dimension = meta["dimension"]
+        # Read-only memory map; copied into RAM by the first write
+        self._matrix = matrix
+        self._sq_norms = np.einsum("ij,ij->i", matrix, matrix)
+        self._labels = labels.astype(np.int64)
+        self._next_label = meta["next_label"]
+        self._size = len(chunks)
+        for chunk_id, document_id, chunk_index, content, *metadata in chunks:
+            self._ids.append(chunk_id)
+            self._document_ids.append(document_id)
+            self._chunk_indexes.append(chunk_index)
+            self._contents.append(content)
+            # Stores written before metadata support have four columns
+            self._metadata.append(metadata[0] if metadata else {})
+        self._id_rows = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+        # Rebuilt from the stored text; no embedding involved
+        self._lexical.add_many(zip(self._ids, self._contents))
+
+        if self.ann and self._dimension:
+            self._load_graph(path, meta)
+            self._label_rows = self._rows_by_label()
+
+        logger.info(
+            "vector_store_loaded path=%s count=%d ann=%s duration_s=%.3f",
+            path,
+            self._size,
+            self._graph is not None,
+            time.perf_counter() - start,
+        )
+
+    def _load_graph(self, path: str, meta: dict) -> None:
+        graph_path = os.path.join(path, _GRAPH_FILE)
+
+        if meta.get("ann") and meta["metric"] == self.metric.name and os.path.exists(graph_path):
+            self._graph = hnswlib.Index(space=_HNSW_SPACES[self.metric.name], dim=self._dimension)
+            self._graph.load_index(graph_path, max_elements=max(meta["next_label"], _INITIAL_CAPACITY))
+            return
+
+        # No usable graph on disk (first ANN start, or metric changed): build from the matrix
+        self._graph = self._new_graph(max(self._size, _INITIAL_CAPACITY))
+        if self._size:
+            self._graph.add_items(np.asarray(self._matrix[: self._size]), self._labels[: self._size])
+
+    def _rows_by_label(self) -> Dict[int, int]:
+        return {int(label): row for row, label in enumerate(self._labels[: self._size])}
+
+    @staticmethod
+    def _write(path: str, name: str, write) -> None:
+        tmp_path = os.path.join(path, name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            write(f)
+        os.replace(tmp_path, os.path.join(path, name))
@@ -1,65 +1,651 @@
-import psycopg2
-from typing import List
+import json
+import logging
+from typing import List, Optional, Sequence, Tuple
+from app.domain.filters import MetadataFilter, RANGE_OPERATORS, conditions, range_type
 from app.domain.services import VectorRepository
+from app.infrastructure.vector_store.connection_pool import PgConnectionPool
+from app.infrastructure.vector_store.distance import DistanceMetric, get_metric
+from app.infrastructure.vector_store.index_manager import TABLE_NAME
+from app.infrastructure.vector_store.quantization import (
+    Quantization,
+    get_quantization,
+    rescore_ef_search,
+    rescore_limit,
+)
+from app.infrastructure.vector_store.vector_codec import as_float32, binary_copy_payload
+
+logger = logging.getLogger(__name__)
+
+# SQL shared with AsyncPgVectorRepository (psycopg2 and psycopg 3 use the same placeholders).
+# Embeddings are bound as NumPy float32 arrays via pgvector's adapters
+# (registered per connection by the pools). Table names come from the
+# collection registry, which only accepts plain identifiers.
+
+
+def insert_sql(table: str) -> str:
+    return f"""
+        INSERT INTO {table} (id, document_id, chunk_index, content, metadata, embedding)
+        VALUES (%s, %s, %s, %s, %s::jsonb, %s::vector)
+    """
+
+
+def copy_sql(table: str) -> str:
+    return (
+        f"COPY {table} (id, document_id, chunk_index, content, metadata, embedding) "
+        "FROM STDIN WITH (FORMAT binary)"
+    )
+
+
+def delete_document_sql(table: str) -> str:
+    return f"DELETE FROM {table} WHERE document_id = %s"
+
+# Must match the config of the generated content_tsv column in init.sql
+TEXT_SEARCH_CONFIG = "english"
+
+ITERATIVE_SCAN_SQL = """
+    SELECT set_config('hnsw.iterative_scan', %s, true),
+           set_config('ivfflat.iterative_scan', %s, true)
+    FROM pg_extension
+    WHERE extname = 'vector'
+      AND string_to_array(extversion, '.')::int[] >= '{0,8}'
+"""
+
+
+def filter_sql(metadata_filter: Optional[MetadataFilter]) -> Tuple[str, dict]:
+    """
+    Translate a metadata filter (see app.domain.filters) into a WHERE
+    condition. Equality and `in` use JSONB containment, which the GIN index
+    on metadata serves; keys and values are always bound as parameters.
+    """
+    if not metadata_filter:
+        return "", {}
+
+    clauses = []
+    params = {}
+
+    for n, (key, operator, value) in enumerate(conditions(metadata_filter)):
+        name = f"filter_{n}"
+
+        if operator == "eq":
+            clauses.append(f"metadata @> %({name})s::jsonb")
+            params[name] = json.dumps({key: value})
+        elif operator == "ne":
+            clauses.append(f"NOT metadata @> %({name})s::jsonb")
+            params[name] = json.dumps({key: value})
+        elif operator == "in":
+            clauses.append(f"metadata @> ANY(%({name})s::jsonb[])")
+            params[name] = [json.dumps({key: v}) for v in value]
+        else:
+            # CASE guards the cast: values of another JSON type never match
+            sql_operator = RANGE_OPERATORS[operator]
+            params[f"{name}_key"] = key
+            params[name] = value
+            if range_type(value) == "number":
+                clauses.append(
+                    f"CASE WHEN jsonb_typeof(metadata -> %({name}_key)s) = 'number' "
+                    f"THEN (metadata ->> %({name}_key)s)::numeric {sql_operator} %({name})s END"
+                )
+            else:
+                # Byte order, like the in-memory backend (ISO dates sort correctly)
+                clauses.append(
+                    f"CASE WHEN jsonb_typeof(metadata -> %({name}_key)s) = 'string' "
+                    f"THEN (metadata ->> %({name}_key)s) COLLATE \"C\" {sql_operator} %({name})s::text END"
+                )
+
+    return " AND ".join(clauses), params
+
+
+def search_sql(
+    table: str,
+    metric: DistanceMetric,
+    where: str = "",
+    quantization: Optional[Quantization] = None,
+) -> str:
+    if quantization is not None and quantization.enabled:
+        return rescore_search_sql(table, metric, quantization, where)
+
+    if not where:
+        # ORDER BY the output column keeps the index scan and binds the vector only once
+        return f"""
+            SELECT id, document_id, chunk_index, content, metadata,
+                   embedding {metric.operator} %(embedding)s::vector AS distance
+            FROM {table}
+            ORDER BY distance
+            LIMIT %(k)s
+        """
+
+    # Iterative index scans (relaxed_order) may return rows slightly out of
+    # order, so the filtered top-k is materialized and sorted again
+    return f"""
+        WITH nearest AS MATERIALIZED (
+            SELECT id, document_id, chunk_index, content, metadata,
+                   embedding {metric.operator} %(embedding)s::vector AS distance
+            FROM {table}
+            WHERE {where}
+            ORDER BY distance
+            LIMIT %(k)s
+        )
+        SELECT * FROM nearest ORDER BY distance
+    """
+
+
+def rescore_search_sql(
+    table: str, metric: DistanceMetric, quantization: Quantization, where: str = ""
+) -> str:
+    """
+    Quantized first pass through the ANN index for %(rescore)s candidates,
+    then exact distances on their full-precision vectors, in one statement.
+    The heap rows are read once, for the candidates only.
+    """
+    return f"""
+        WITH candidates AS MATERIALIZED (
+            SELECT id, document_id, chunk_index, content, metadata, embedding
+            FROM {table}
+            {"WHERE " + where if where else ""}
+            ORDER BY {quantization.distance(metric)}
+            LIMIT %(rescore)s
+        )
+        SELECT id, document_id, chunk_index, content, metadata,
+               embedding {metric.operator} %(embedding)s::vector AS distance
+        FROM candidates
+        ORDER BY distance
+        LIMIT %(k)s
+    """
+
+
+def exact_search_sql(table: str, metric: DistanceMetric, where: str) -> str:
+    """
+    Second pass for filtered searches that came back short. The matching
+    rows are materialized first (GIN on metadata), so the ANN index cannot
+    drive the scan and the top-k is exact.
+    """
+    return f"""
+        WITH matching AS MATERIALIZED (
+            SELECT id, document_id, chunk_index, content, metadata,
+                   embedding {metric.operator} %(embedding)s::vector AS distance
+            FROM {table}
+            WHERE {where}
+        )
+        SELECT * FROM matching ORDER BY distance LIMIT %(k)s
+    """
+
+
+def search_many_sql(
+    table: str,
+    metric: DistanceMetric,
+    where: str = "",
+    quantization: Optional[Quantization] = None,
+) -> str:
+    """
+    One top-k search per query vector, in one statement. The queries are
+    unnested from the %(embeddings)s vector[] parameter and each drives its
+    own ANN index scan through a LATERAL subquery (same shape as search_sql,
+    including the quantized first pass). Rows lead with the 1-based ordinal
+    of their query.
+    """
+    where = "WHERE " + where if where else ""
+
+    if quantization is not None and quantization.enabled:
+        source = f"""(
+                    SELECT id, document_id, chunk_index, content, metadata, embedding
+                    FROM {table}
+                    {where}
+                    ORDER BY {quantization.distance(metric, "q.query")}
+                    LIMIT %(rescore)s
+                ) candidates"""
+        where = ""
+    else:
+        source = table
+
+    return f"""
+        SELECT q.ordinal, nearest.*
+        FROM unnest(%(embeddings)s::vector[]) WITH ORDINALITY AS q(query, ordinal)
+        CROSS JOIN LATERAL (
+            SELECT id, document_id, chunk_index, content, metadata,
+                   embedding {metric.operator} q.query AS distance
+            FROM {source}
+            {where}
+            ORDER BY distance
+            LIMIT %(k)s
+        ) nearest
+        ORDER BY q.ordinal, nearest.distance
+    """
+
+
+def hybrid_search_sql(
+    table: str,
+    metric: DistanceMetric,
+    where: str = "",
+    quantization: Optional[Quantization] = None,
+) -> str:
+    """
+    Vector and full-text candidates fused with weighted reciprocal rank
+    fusion, in one statement. Each leg keeps its own index: the ANN index
+    for the ORDER BY distance, the GIN index on content_tsv for @@.
+    Ranks are 1-based; a chunk missing from a leg gets no score from it.
+    A metadata filter applies to both legs. With quantization, the vector
+    leg ranks its candidates by full-precision distance.
+    """
+    source, semantic_where = table, where
+    if quantization is not None and quantization.enabled:
+        source = f"""(
+                    SELECT id, embedding
+                    FROM {table}
+                    {"WHERE " + where if where else ""}
+                    ORDER BY {quantization.distance(metric)}
+                    LIMIT %(rescore)s
+                ) approximate"""
+        semantic_where = ""
+
+    return f"""
+        WITH semantic AS (
+            SELECT id, row_number() OVER (ORDER BY distance) AS rank
+            FROM (
+                SELECT id, embedding {metric.operator} %(embedding)s::vector AS distance
+                FROM {source}
+                {"WHERE " + semantic_where if semantic_where else ""}
+                ORDER BY distance
+                LIMIT %(candidates)s
+            ) nearest
+        ),
+        lexical AS (
+            SELECT id, row_number() OVER (ORDER BY text_rank DESC) AS rank
+            FROM (
+                -- Normalization 1 divides by 1 + log(length), as BM25 penalizes long chunks
+                SELECT id, ts_rank_cd(content_tsv, query, 1) AS text_rank
+                FROM {table},
+                     websearch_to_tsquery('{TEXT_SEARCH_CONFIG}', %(query)s) AS query
+                WHERE content_tsv @@ query
+                {"AND " + where if where else ""}
+                ORDER BY text_rank DESC
+                LIMIT %(candidates)s
+            ) matches
+        ),
+        fused AS (
+            SELECT id,
+                   semantic.rank AS semantic_rank,
+                   lexical.rank AS lexical_rank,
+                   COALESCE(%(semantic_weight)s::float8 / (%(rrf_k)s + semantic.rank), 0.0)
+                 + COALESCE(%(lexical_weight)s::float8 / (%(rrf_k)s + lexical.rank), 0.0) AS score
+            FROM semantic
+            FULL OUTER JOIN lexical USING (id)
+        )
+        SELECT c.id, c.document_id, c.chunk_index, c.content, c.metadata,
+               fused.score, fused.semantic_rank, fused.lexical_rank
+        FROM fused
+        JOIN {table} c USING (id)
+        ORDER BY fused.score DESC
+        LIMIT %(k)s
+    """
+
+
+def hybrid_params(
+    embedding,
+    query_text: str,
+    k: int,
+    candidates: int,
+    semantic_weight: float,
+    lexical_weight: float,
+    rrf_k: int,
+    quantization: Optional[Quantization] = None,
+    rescore_factor: int = 4,
+) -> dict:
+    params = {
+        "embedding": as_float32(embedding),
+        "query": query_text,
+        "k": k,
+        "candidates": max(candidates, k),
+        "semantic_weight": semantic_weight,
+        "lexical_weight": lexical_weight,
+        "rrf_k": rrf_k,
+    }
+    if quantization is not None and quantization.enabled:
+        params["rescore"] = rescore_limit(params["candidates"], rescore_factor)
+    return params
+
+
+def search_params(
+    embedding, k: int, quantization: Optional[Quantization] = None, rescore_factor: int = 4
+) -> dict:
+    params = {"embedding": as_float32(embedding), "k": k}
+    if quantization is not None and quantization.enabled:
+        params["rescore"] = rescore_limit(k, rescore_factor)
+    return params
+
+
+def search_many_params(
+    embeddings, k: int, quantization: Optional[Quantization] = None, rescore_factor: int = 4
+) -> dict:
+    params = {"embeddings": [as_float32(embedding) for embedding in embeddings], "k": k}
+    if quantization is not None and quantization.enabled:
+        params["rescore"] = rescore_limit(k, rescore_factor)
+    return params
+
+
+def hybrid_ef_search(ef_search: Optional[int], params: dict) -> int:
+    # An hnsw scan returns at most ef_search rows, which would cap the semantic candidates
+    return rescore_ef_search(ef_search, max(params["candidates"], params.get("rescore", 0)))
+
+
+def search_ef_search(ef_search: Optional[int], params: dict) -> Optional[int]:
+    # Same for the first pass of a quantized search; otherwise left as configured
+    if "rescore" not in params:
+        return ef_search
+    return rescore_ef_search(ef_search, params["rescore"])
+
+
+def hybrid_result(row) -> dict:
+    return {
+        "id": row[0],
+        "document_id": row[1],
+        "chunk_index": row[2],
+        "content": row[3],
+        "metadata": row[4],
+        "score": row[5],
+        "semantic_rank": row[6],
+        "lexical_rank": row[7],
+    }
+
+
+def search_many_results(rows, count: int, metric: DistanceMetric) -> List[List[dict]]:
+    results = [[] for _ in range(count)]
+    for row in rows:
+        results[row[0] - 1].append(search_result(row[1:], metric))
+    return results
+
+
+def search_settings(
+    probes: Optional[int],
+    ef_search: Optional[int],
+    iterative_scan: Optional[str] = None,
+) -> List[Tuple[str, tuple]]:
+    """Transaction-local planner settings for one search."""
+    statements = []
+    if probes:
+        statements.append(("SELECT set_config('ivfflat.probes', %s, true)", (str(probes),)))
+    if ef_search:
+        statements.append(("SELECT set_config('hnsw.ef_search', %s, true)", (str(ef_search),)))
+    if iterative_scan:
+        # pgvector >= 0.8 keeps scanning the index until enough rows pass the
+        # filter; older versions reject the setting, so it is skipped there
+        statements.append((ITERATIVE_SCAN_SQL, (iterative_scan, iterative_scan)))
+    return statements
+
+
+def insert_row(chunk_id, content, embedding, document_id, chunk_index, metadata) -> tuple:
+    return (
+        chunk_id,
+        document_id or chunk_id,
+        chunk_index,
+        content,
+        json.dumps(metadata or {}),
+        as_float32(embedding),
+    )
+
+
+def log_exact_fallback(k: int, ann_rows: int, rows: int) -> None:
+    logger.info(
+        "filtered_search_exact_fallback k=%d ann_rows=%d rows=%d",
+        k,
+        ann_rows,
+        rows,
+    )
+
+
+def search_result(row, metric: DistanceMetric) -> dict:
+    return {
+        "id": row[0],
+        "document_id": row[1],
+        "chunk_index": row[2],
+        "content": row[3],
+        "metadata": row[4],
+        "score": metric.to_similarity(row[5]),
+    }
 
 
 class PgVectorRepository:
 
-    def __init__(self, host, port, db_name, user, password):
-       self.host = host
-       self.port = port
-       self.db_name = db_name
-       self.user = user
-       self.password = password
-
-       self.conn = psycopg2.connect(
-               host=self.host,
-               port=self.port,
-               dbname=self.db_name,
-               user=self.user,
-               password=self.password
+    def __init__(
+        self,
+        pool: PgConnectionPool,
+        metric: str = "cosine",
+        default_probes: Optional[int] = None,
+        default_ef_search: Optional[int] = None,
+        iterative_scan: Optional[str] = None,
+        table: str = TABLE_NAME,
+        quantization: str = "none",
+        dimension: Optional[int] = None,
+        rescore_factor: int = 4,
+    ):
+       # Connections are borrowed per operation and returned to the shared pool
+       self.pool = pool
+       # The query operator must match the index opclass or the planner falls back to a seq scan
+       self.metric = get_metric(metric)
+       self.default_probes = default_probes
+       self.default_ef_search = default_ef_search
+       # Used for filtered searches only: relaxed_order | strict_order
+       self.iterative_scan = iterative_scan
+       # One table per collection
+       self.table = table
+       # What the ANN index stores; quantized candidates are rescored at full precision
+       self.quantization = get_quantization(quantization, dimension)
+       self.rescore_factor = rescore_factor
+
+    def save(
+        self,
+        chunk_id: str,
+        content: str,
+        embedding: List[float],
+        document_id: Optional[str] = None,
+        chunk_index: int = 0,
+        metadata: Optional[dict] = None,
+    ) -> None:
+        # A chunk saved on its own is its own parent document
+        row = insert_row(chunk_id, content, embedding, document_id, chunk_index, metadata)
+
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(insert_sql(self.table), row)
+            conn.commit()
+
+    def save_many(self, items: Sequence[Tuple[str, str, int, str, dict, List[float]]]) -> None:
+        if not items:
+            return
+
+        # Binary COPY streams all rows in one statement, vectors as raw float4
+        payload = binary_copy_payload(items)
+
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.copy_expert(copy_sql(self.table), payload)
+            conn.commit()
+
+    def similarity_search(
+        self,
+        embedding: List[float],
+        k: int,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        metadata_filter: Optional[MetadataFilter] = None,
+    ):
+        """
+        Top-k search ordered by the configured metric's operator so the ANN
+        index is used. `score` is a similarity (higher is better), see
+        app.infrastructure.vector_store.distance for the per-metric mapping.
+
+        probes applies to ivfflat indexes, ef_search to hnsw indexes.
+
+        With a metadata_filter the filter runs inside the index scan
+        (iterative scans when configured). If that still yields fewer than
+        k rows, an exact scan over the matching rows follows, so k results
+        are returned whenever k rows match.
+
+        With quantization the index yields rescore_factor * k candidates,
+        which are ranked by their full-precision distance.
+        """
+        where, params = filter_sql(metadata_filter)
+        params.update(search_params(embedding, k, self.quantization, self.rescore_factor))
+        sql = search_sql(self.table, self.metric, where, self.quantization)
+
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                self._apply_search_settings(
+                    cur,
+                    probes,
+                    search_ef_search(ef_search or self.default_ef_search, params),
+                    self.iterative_scan if where else None,
+                )
+
+                cur.execute(sql, params)
+                rows = cur.fetchall()
+
+                if where and len(rows) < k:
+                    ann_rows = len(rows)
+                    cur.execute(exact_search_sql(self.table, self.metric, where), params)
+                    rows = cur.fetchall()
+                    log_exact_fallback(k, ann_rows, len(rows))
+
+        return [search_result(row, self.metric) for row in rows]
+
+    def similarity_search_many(
+        self,
+        embeddings: Sequence[List[float]],
+        k: int,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        metadata_filter: Optional[MetadataFilter] = None,
+    ) -> List[List[dict]]:
+        """
+        similarity_search() for several query vectors in one round trip,
+        results in query order. Queries with a metadata_filter that came
+        back short get the exact second pass, each on its own.
+        """
+        if not embeddings:
+            return []
+
+        where, params = filter_sql(metadata_filter)
+        params.update(search_many_params(embeddings, k, self.quantization, self.rescore_factor))
+        sql = search_many_sql(self.table, self.metric, where, self.quantization)
+
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                self._apply_search_settings(
+                    cur,
+                    probes,
+                    search_ef_search(ef_search or self.default_ef_search, params),
+                    self.iterative_scan if where else None,
+                )
+
+                cur.execute(sql, params)
+                results = search_many_results(cur.fetchall(), len(embeddings), self.metric)
+
+                for i, embedding in enumerate(params["embeddings"] if where else []):
+                    if len(results[i]) < k:
+                        ann_rows = len(results[i])
+                        cur.execute(
+                            exact_search_sql(self.table, self.metric, where),
+                            {**params, "embedding": embedding},
+                        )
+                        results[i] = [search_result(row, self.metric) for row in cur.fetchall()]
+                        log_exact_fallback(k, ann_rows, len(results[i]))
+
+        return results
+
+    def hybrid_search(
+        self,
+        embedding: List[float],
+        query_text: str,
+        k: int,
+        candidates: int = 50,
+        semantic_weight: float = 1.0,
+        lexical_weight: float = 1.0,
+        rrf_k: int = 60,
+        probes: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        metadata_filter: Optional[MetadataFilter] = None,
+    ):
+        """
+        Vector plus full-text retrieval fused with reciprocal rank fusion in
+        one round trip. `score` is the fused RRF score, not a similarity.
+        """
+        where, filter_params = filter_sql(metadata_filter)
+        params = hybrid_params(
+            embedding, query_text, k, candidates, semantic_weight, lexical_weight, rrf_k,
+            self.quantization, self.rescore_factor,
         )
-               
-    # Infrastructure-specific helper
-    def _to_pgvector(self, embedding: List[float]) -> str:
-        return "[" + ",".join(str(x) for x in embedding) + "]"
-
-    def save(self, chunk_id: str, content: str, embedding: List[float]) -> None:
-        vector_str = self._to_pgvector(embedding)
-
-        with self.conn.cursor() as cur:
-            cur.execute(
-                """
-                INSERT INTO document_chunks (id, content, embedding)
-                VALUES (%s, %s, %s::vector)
-                """,
-                (chunk_id, content, vector_str),
-            )
-            self.conn.commit()
-
-    def similarity_search(self, embedding: List[float], k: int):
-        vector_str = self._to_pgvector(embedding)
-
-        with self.conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT id, content, embedding <-> %s::vector AS score
-                FROM document_chunks
-                ORDER BY embedding <-> %s::vector
-                LIMIT %s
-                """,
-                (vector_str, vector_str, k),
-            )
-            rows = cur.fetchall()
+        params.update(filter_params)
 
-        return[        
-                {
-                    "id": row[0],
-                    "content": row[1],
-                    "score": row[2]
-                }
-                for row in rows
-        ]
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                self._apply_search_settings(
+                    cur,
+                    probes,
+                    hybrid_ef_search(ef_search or self.default_ef_search, params),
+                    self.iterative_scan if where else None,
+                )
+                cur.execute(
+                    hybrid_search_sql(self.table, self.metric, where, self.quantization), params
+                )
+                rows = cur.fetchall()
 
+        return [hybrid_result(row) for row in rows]
 
+    def delete_document(self, document_id: str) -> int:
+        """Remove every chunk of a document; returns the number of chunks deleted."""
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(delete_document_sql(self.table), (document_id,))
+                deleted = cur.rowcount
+            conn.commit()
+        return deleted
+
+    def _apply_search_settings(
+        self,
+        cur,
+        probes: Optional[int],
+        ef_search: Optional[int],
+        iterative_scan: Optional[str] = None,
+    ) -> None:
+        # Transaction-local, reverted when the connection is released
+        for sql, params in search_settings(
+            probes or self.default_probes,
+            ef_search or self.default_ef_search,
+            iterative_scan,
+        ):
+            cur.execute(sql, params)
+
+    def verify_index(self) -> bool:
+        """
+        Check that an ANN index on the table's embedding column uses the
+        operator class of the configured metric and quantization. Logs a
+        warning otherwise.
+        """
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT indexname, indexdef
+                    FROM pg_indexes
+                    WHERE tablename = %s
+                    AND indexdef ~* 'USING (ivfflat|hnsw)'
+                    """,
+                    (self.table,),
+                )
+                indexes = cur.fetchall()
+
+        opclass = self.quantization.opclass(self.metric)
+        matching = [name for name, definition in indexes if opclass in definition]
+
+        if not matching:
+            logger.warning(
+                "vector_index_metric_mismatch table=%s metric=%s quantization=%s "
+                "expected_opclass=%s indexes=%s",
+                self.table,
+                self.metric.name,
+                self.quantization.name,
+                opclass,
+                [name for name, _ in indexes],
+            )
+            return False
 
+        return True
@@ -0,0 +1,88 @@
+import logging
+from typing import Optional
+
+from app.infrastructure.vector_store.distance import DistanceMetric
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATIONS = ("none", "halfvec", "binary")
+
+# pgvector's upper bound for hnsw.ef_search
+_MAX_EF_SEARCH = 1000
+
+
+class Quantization:
+    """
+    What the ANN index stores for the first-pass candidate search.
+
+    Quantized modes index an expression over the full-precision embedding
+    column instead of the column itself: halfvec (2 bytes per dimension
+    instead of 4) or binary_quantize (1 bit per dimension, compared by
+    Hamming distance). The table keeps the float4 vectors, so searches
+    rescore the candidates exactly in the same statement. Needs
+    pgvector >= 0.7.
+
+    Index and query expressions must match verbatim for the planner to use
+    the index, so both are built here.
+    """
+
+    def __init__(self, name: str, dimension: Optional[int] = None):
+        self.name = name
+        self.dimension = dimension
+
+    @property
+    def enabled(self) -> bool:
+        return self.name != "none"
+
+    def index_expression(self) -> str:
+        # CREATE INDEX requires parentheses around expressions
+        if self.name == "halfvec":
+            return f"(embedding::halfvec({int(self.dimension)}))"
+        if self.name == "binary":
+            return f"(binary_quantize(embedding)::bit({int(self.dimension)}))"
+        return "embedding"
+
+    def opclass(self, metric: DistanceMetric) -> str:
+        if self.name == "halfvec":
+            return metric.opclass.replace("vector_", "halfvec_", 1)
+        if self.name == "binary":
+            # Sign bits: Hamming distance approximates the angle for every metric
+            return "bit_hamming_ops"
+        return metric.opclass
+
+    def distance(self, metric: DistanceMetric, query: str = "%(embedding)s") -> str:
+        """First-pass ORDER BY expression against the query vector (the %(embedding)s parameter by default)."""
+        if self.name == "halfvec":
+            return (
+                f"{self.index_expression()} {metric.operator} "
+                f"{query}::halfvec({int(self.dimension)})"
+            )
+        if self.name == "binary":
+            return f"{self.index_expression()} <~> binary_quantize({query}::vector)"
+        return f"embedding {metric.operator} {query}::vector"
+
+
+def get_quantization(name: Optional[str], dimension: Optional[int] = None) -> Quantization:
+    name = (name or "none").lower().strip()
+    if name not in QUANTIZATIONS:
+        raise ValueError(
+            f"Unsupported quantization: {name}. Expected one of {list(QUANTIZATIONS)}."
+        )
+    if name != "none" and not dimension:
+        raise ValueError("Quantized storage needs the embedding dimension.")
+    return Quantization(name, dimension)
+
+
+def rescore_limit(k: int, factor: int) -> int:
+    """First-pass candidates rescored at full precision for a top-k search."""
+    return max(k, k * factor)
+
+
+def rescore_ef_search(ef_search: Optional[int], rescore: int) -> int:
+    # An hnsw scan returns at most ef_search rows, which would cap the candidates
+    wanted = max(ef_search or 0, rescore)
+    if wanted > _MAX_EF_SEARCH:
+        # Fewer candidates than asked for: recall drops below what k and the factor imply
+        logger.warning("ef_search_clamped requested=%s max=%s", wanted, _MAX_EF_SEARCH)
+        return _MAX_EF_SEARCH
+    return wanted
@@ -0,0 +1,63 @@
+import io
+import json
+import struct
+import uuid
+from typing import Iterable, Tuple
+
+import numpy as np
+
+# pgvector's binary wire format: uint16 dimensions, uint16 unused, float4[] (network order)
+_VECTOR_HEADER = struct.Struct(">HH")
+_BIG_ENDIAN_F4 = np.dtype(">f4")
+
+_COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+_COPY_HEADER = _COPY_SIGNATURE + struct.pack(">ii", 0, 0)
+_COPY_TRAILER = struct.pack(">h", -1)
+_FIELD_COUNT = struct.Struct(">h")
+_FIELD_LENGTH = struct.Struct(">i")
+_INT4 = struct.Struct(">i")
+_NULL_FIELD = _FIELD_LENGTH.pack(-1)
+# jsonb binary input: a version byte followed by the JSON text
+_JSONB_VERSION = b"\x01"
+
+
+def as_float32(embedding) -> np.ndarray:
+    """Contiguous float32 view of an embedding; no copy when it already is one."""
+    return np.ascontiguousarray(embedding, dtype=np.float32)
+
+
+def vector_to_binary(embedding) -> bytes:
+    vector = np.asarray(embedding)
+    return _VECTOR_HEADER.pack(vector.shape[0], 0) + vector.astype(_BIG_ENDIAN_F4).tobytes()
+
+
+def binary_copy_payload(rows: Iterable[Tuple[str, str, int, str, dict, object]]) -> io.BytesIO:
+    """
+    Build a COPY ... WITH (FORMAT binary) stream for
+    (id, document_id, chunk_index, content, metadata, embedding) rows, so
+    bulk loads never format vectors as text.
+    """
+    buffer = io.BytesIO()
+    buffer.write(_COPY_HEADER)
+
+    for chunk_id, document_id, chunk_index, content, metadata, embedding in rows:
+        fields = (
+            uuid.UUID(str(chunk_id)).bytes,
+            uuid.UUID(str(document_id)).bytes if document_id is not None else None,
+            _INT4.pack(chunk_index),
+            content.encode("utf-8"),
+            _JSONB_VERSION + json.dumps(metadata or {}).encode("utf-8"),
+            vector_to_binary(embedding),
+        )
+
+        buffer.write(_FIELD_COUNT.pack(len(fields)))
+        for field in fields:
+            if field is None:
+                buffer.write(_NULL_FIELD)
+                continue
+            buffer.write(_FIELD_LENGTH.pack(len(field)))
+            buffer.write(field)
+
+    buffer.write(_COPY_TRAILER)
+    buffer.seek(0)
+    return buffer
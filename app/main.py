@@ -1,15 +1,109 @@
+import asyncio
 import logging
+import time
 import uuid
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 
+from app.api.dependencies import (
+    embedding_service_for,
+    get_async_connection_pool,
+    get_collection_registry,
+    get_connection_pool,
+    get_reranker,
+    get_vector_repository,
+)
+from app.api.admin import router as admin_router
+from app.api.health import router as health_router
+from app.api.metrics import router as metrics_router
 from app.api.routes import router
+from app.config import settings
 from app.core.logging import setup_logging
+from app.core.metrics import REQUEST_SECONDS
+from app.infrastructure.embeddings.model_registry import model_registry
 
 # Initialize logging configuration
 setup_logging()
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="VectorEngine")
+
+async def persist_periodically(collections, interval_s: float):
+    # Bounds what a crash loses; unchanged stores are not rewritten
+    while True:
+        await asyncio.sleep(interval_s)
+        try:
+            await asyncio.to_thread(collections.persist, changed_only=True)
+        except Exception:
+            logger.warning("vector_store_persist_failed", exc_info=True)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load and warm embedding models once per worker, before serving traffic
+    model_registry.preload(
+        settings.embedding_models,
+        warmup=settings.EMBEDDING_WARMUP,
+    )
+
+    # Collections may use any of the preloaded models
+    embedding_services = [embedding_service_for(name) for name in settings.embedding_models]
+
+    # A cold cross-encoder would blow the rerank budget of the first requests
+    reranker = get_reranker()
+    if reranker is not None and settings.EMBEDDING_WARMUP:
+        logger.info(
+            "rerank_model_warmed_up model=%s warmup_s=%.3f",
+            reranker.model_name,
+            reranker.warmup(),
+        )
+
+    if settings.VECTOR_BACKEND == "memory":
+        # Loads the persisted stores of all collections, if any, before serving traffic
+        collections = get_collection_registry()
+
+        snapshots = None
+        if settings.MEMORY_STORE_PATH and settings.MEMORY_STORE_PERSIST_INTERVAL_S:
+            snapshots = asyncio.create_task(
+                persist_periodically(collections, settings.MEMORY_STORE_PERSIST_INTERVAL_S)
+            )
+
+        yield
+
+        if snapshots is not None:
+            snapshots.cancel()
+            await asyncio.gather(snapshots, return_exceptions=True)
+        if settings.MEMORY_STORE_PATH:
+            # Waits for a snapshot still running in its thread
+            collections.persist()
+        for service in embedding_services:
+            service.close()
+        if reranker is not None:
+            reranker.close()
+        return
+
+    pool = get_connection_pool()
+    pool.open()
+
+    async_pool = get_async_connection_pool()
+    # Does not wait for min_size connections; the pool fills in the background
+    await async_pool.open()
+
+    try:
+        get_vector_repository(pool, get_collection_registry().default).verify_index()
+    except Exception:
+        logger.warning("vector_index_check_failed", exc_info=True)
+
+    yield
+
+    await async_pool.close()
+    pool.close()
+    for service in embedding_services:
+        service.close()
+    if reranker is not None:
+        reranker.close()
+
+
+app = FastAPI(title="VectorEngine", lifespan=lifespan)
 
 # -----------------------------
 # Request ID Middleware
@@ -25,7 +119,17 @@ async def add_request_id_middleware(request: Request, call_next):
         request.url.path,
     )
 
-    response = await call_next(request)
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        # Route template, not the raw path, to keep label cardinality bounded
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        REQUEST_SECONDS.labels(request.method, route, str(status_code)).observe(
+            time.perf_counter() - start
+        )
 
     logger.info(
         "request_finished request_id=%s status_code=%d",
@@ -39,5 +143,9 @@ async def add_request_id_middleware(request: Request, call_next):
 
 # Register API routes
 app.include_router(router)
+app.include_router(health_router)
+app.include_router(admin_router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_router)
 
 logger.info("VectorEngine application started")
@@ -3,11 +3,69 @@ CREATE EXTENSION IF NOT EXISTS vector;
 
 CREATE TABLE IF NOT EXISTS document_chunks (
 	id UUID PRIMARY KEY,
+	document_id UUID,
+	chunk_index INT NOT NULL DEFAULT 0,
 	content TEXT NOT NULL,
+	metadata JSONB NOT NULL DEFAULT '{}',
 	embedding VECTOR(384)
 );
 
--- Create IVFFLAT index for cosine similarity
+-- Chunked documents: every row belongs to a parent document, in order.
+-- Rows from before chunking are their own single-chunk document.
+ALTER TABLE document_chunks ADD COLUMN IF NOT EXISTS document_id UUID;
+ALTER TABLE document_chunks ADD COLUMN IF NOT EXISTS chunk_index INT NOT NULL DEFAULT 0;
+UPDATE document_chunks SET document_id = id WHERE document_id IS NULL;
+
+CREATE INDEX IF NOT EXISTS document_chunks_document_idx
+ON document_chunks (document_id, chunk_index);
+
+-- Full-text leg of hybrid search. Maintained by Postgres on every insert;
+-- the config must match TEXT_SEARCH_CONFIG in pgvector_repository.py.
+-- Adding it to an existing table rewrites the table once.
+ALTER TABLE document_chunks ADD COLUMN IF NOT EXISTS content_tsv TSVECTOR
+GENERATED ALWAYS AS (to_tsvector('english', content)) STORED;
+
+CREATE INDEX IF NOT EXISTS document_chunks_content_tsv_idx
+ON document_chunks USING GIN (content_tsv);
+
+-- Metadata filters. Equality and `in` filters are JSONB containment (@>),
+-- served by this index. Range filters bind the key as a parameter and guard
+-- the cast with CASE, so no index serves them: they are checked per row.
+ALTER TABLE document_chunks ADD COLUMN IF NOT EXISTS metadata JSONB NOT NULL DEFAULT '{}';
+
+CREATE INDEX IF NOT EXISTS document_chunks_metadata_idx
+ON document_chunks USING GIN (metadata jsonb_path_ops);
+
+-- Named collections (POST /admin/collections). Each one is a separate table
+-- (chunks_<name>) with the columns of document_chunks, its own vector
+-- dimension, metric and ANN index. document_chunks is the default
+-- collection and is configured through Settings, not registered here.
+CREATE TABLE IF NOT EXISTS vector_collections (
+	name TEXT PRIMARY KEY,
+	table_name TEXT NOT NULL UNIQUE,
+	embedding_model TEXT NOT NULL,
+	dimension INT NOT NULL,
+	metric TEXT NOT NULL,
+	index_type TEXT NOT NULL,
+	index_params JSONB NOT NULL DEFAULT '{}',
+	created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+	quantization TEXT NOT NULL DEFAULT 'none'
+);
+
+ALTER TABLE vector_collections ADD COLUMN IF NOT EXISTS quantization TEXT NOT NULL DEFAULT 'none';
+
+-- Create IVFFLAT index for cosine similarity.
+-- The operator class must match VECTOR_DISTANCE_METRIC (cosine -> vector_cosine_ops,
+-- l2 -> vector_l2_ops, inner_product -> vector_ip_ops) or searches cannot use it.
+-- Once data is loaded, resize or switch to HNSW online via POST /admin/index/build.
+--
+-- Quantized storage (VECTOR_QUANTIZATION, pgvector >= 0.7) indexes an expression
+-- over the same full-precision column, so the index shrinks while searches can
+-- rescore candidates exactly:
+--   halfvec: USING hnsw ((embedding::halfvec(384)) halfvec_cosine_ops)  -- 2 bytes/dim
+--   binary:  USING hnsw ((binary_quantize(embedding)::bit(384)) bit_hamming_ops)  -- 1 bit/dim
+-- Searches must use the same expression, so set VECTOR_QUANTIZATION and build
+-- the index through POST /admin/index/build rather than by hand.
 DO $$
 BEGIN
     IF NOT EXISTS (
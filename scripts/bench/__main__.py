@@ -0,0 +1,221 @@
+"""
+Benchmark suite for the retrieval and RAG paths.
+
+    python -m scripts.bench retrieval --backend memory --size 100000 \\
+        --index exact --index hnsw:m=16,ef_construction=64 --ef-search 40,100,200
+    python -m scripts.bench retrieval --backend pgvector --size 1000000 \\
+        --index exact --index ivfflat --index hnsw --probes 1,10,40
+    python -m scripts.bench retrieval --backend pgvector --size 1000000 \\
+        --index exact --index hnsw --quantization none,halfvec,binary --rescore-factor 2,4,10
+    python -m scripts.bench api --size 5000 --concurrency 16 --requests 500
+    python -m scripts.bench embeddings --variant onnx --variant onnx:avx2 --threads 4
+
+Results are printed as JSON (or written with --output) together with the
+git commit, library versions and all parameters, so runs of different
+versions can be diffed. The pgvector backend uses the DB_* settings of the
+app and a scratch table (bench_chunks by default), never document_chunks.
+The embeddings benchmark exits with status 1 if a backend is outside its
+cosine tolerance to torch.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from scripts.bench import api, embeddings, retrieval
+from scripts.bench.corpus import SyntheticCorpus
+
+
+def _int_list(value: str):
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def _str_list(value: str):
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def _parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--output", help="Write the JSON result to this file instead of stdout.")
+    common.add_argument("--seed", type=int, default=42)
+    common.add_argument("--size", type=int, default=10_000, help="Corpus rows (documents for api).")
+    common.add_argument("--dimension", type=int, default=384)
+    common.add_argument("--clusters", type=int, default=100)
+
+    parser = argparse.ArgumentParser(
+        prog="python -m scripts.bench",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    r = commands.add_parser(
+        "retrieval", parents=[common], help="Ingest throughput, search latency and recall@k."
+    )
+    r.add_argument("--backend", choices=["memory", "pgvector"], default="memory")
+    r.add_argument(
+        "--index",
+        action="append",
+        dest="indexes",
+        help='"exact", "ivfflat[:lists=N]" or "hnsw[:m=N,ef_construction=N]"; repeatable.',
+    )
+    r.add_argument("--metric", choices=["cosine", "l2", "inner_product"], default="cosine")
+    r.add_argument("--queries", type=int, default=200)
+    r.add_argument("--k", type=int, default=10)
+    r.add_argument("--probes", type=_int_list, default=[1, 10, 40])
+    r.add_argument("--ef-search", type=_int_list, default=[40, 100, 200])
+    r.add_argument("--batch-size", type=int, default=5000, help="Rows per save_many call.")
+    r.add_argument("--warmup", type=int, default=20)
+    r.add_argument("--hybrid", action="store_true", help="Also time hybrid search.")
+    r.add_argument(
+        "--quantization",
+        type=_str_list,
+        default=["none"],
+        help="pgvector ANN index storage to compare, e.g. none,halfvec,binary.",
+    )
+    r.add_argument(
+        "--rescore-factor",
+        type=_int_list,
+        default=[4],
+        help="Quantized runs: candidates rescored per result.",
+    )
+    r.add_argument("--table", default="bench_chunks")
+    r.add_argument("--keep", action="store_true", help="Keep the pgvector table afterwards.")
+
+    a = commands.add_parser(
+        "api", parents=[common], help="Concurrent clients against the HTTP endpoints."
+    )
+    a.add_argument("--url", help="Running server; default is the app in-process.")
+    a.add_argument("--scenario", action="append", dest="scenarios", choices=api.SCENARIOS)
+    a.add_argument("--concurrency", type=int, default=16)
+    a.add_argument("--requests", type=int, default=500, help="Per scenario.")
+    a.add_argument("--k", type=int, default=5)
+    a.add_argument("--bulk-batch", type=int, default=500)
+
+    e = commands.add_parser(
+        "embeddings",
+        parents=[common],
+        help="Parity with torch and encode throughput of the embedding backends.",
+    )
+    e.set_defaults(size=1000)
+    e.add_argument("--model", default="all-MiniLM-L6-v2")
+    e.add_argument(
+        "--variant",
+        action="append",
+        dest="variants",
+        help='"onnx" or "onnx:<isa>" for int8 (avx2, avx512, avx512_vnni, arm64); repeatable.',
+    )
+    e.add_argument("--texts", help="File with one text per line; default is --size generated texts.")
+    e.add_argument("--batch-size", type=_int_list, default=[1, 32])
+    e.add_argument("--single-texts", type=int, default=200, help="Texts timed one by one.")
+    e.add_argument("--threads", type=int, help="Intra-op threads; default is the runtime's.")
+    e.add_argument("--onnx-dir", default="./data/onnx")
+    e.add_argument("--k", type=int, default=10, help="Neighbours compared per text.")
+    return parser
+
+
+def _environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    versions = {}
+    for package in (
+        "numpy", "psycopg2", "pgvector", "hnswlib", "torch", "sentence_transformers", "onnxruntime",
+    ):
+        module = sys.modules.get(package)
+        if module is not None:
+            versions[package] = getattr(module, "__version__", None)
+
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "versions": versions,
+    }
+
+
+def main(argv=None) -> None:
+    args = _parser().parse_args(argv)
+    # Benchmarks never call a paid provider; Settings still requires these
+    os.environ.setdefault("LLM_PROVIDER", "local")
+    os.environ.setdefault("OPENAI_API_KEY", "unused")
+
+    started = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+    if args.command == "embeddings":
+        if args.texts:
+            with open(args.texts) as f:
+                texts = [line.strip() for line in f if line.strip()]
+        else:
+            texts = embeddings.sample_texts(args.size, args.seed)
+        results = embeddings.run(
+            args.model,
+            args.variants or ["onnx", "onnx:avx2"],
+            texts,
+            batch_sizes=args.batch_size,
+            single_texts=args.single_texts,
+            threads=args.threads,
+            onnx_dir=args.onnx_dir,
+            k=args.k,
+        )
+    elif args.command == "retrieval":
+        corpus = SyntheticCorpus(args.size, args.dimension, args.clusters, args.seed)
+        indexes = [retrieval.parse_index(spec) for spec in (args.indexes or ["exact", "hnsw"])]
+        results = retrieval.run(
+            args.backend,
+            corpus,
+            indexes,
+            query_count=args.queries,
+            k=args.k,
+            probes=args.probes,
+            ef_search=args.ef_search,
+            metric=args.metric,
+            batch_size=args.batch_size,
+            warmup=args.warmup,
+            hybrid=args.hybrid,
+            table=args.table,
+            keep=args.keep,
+            quantizations=args.quantization,
+            rescore_factors=args.rescore_factor,
+        )
+    else:
+        results = asyncio.run(api.run(
+            SyntheticCorpus(args.size, args.dimension, args.clusters, args.seed),
+            scenarios=args.scenarios or api.SCENARIOS,
+            concurrency=args.concurrency,
+            requests=args.requests,
+            k=args.k,
+            bulk_batch=args.bulk_batch,
+            url=args.url,
+        ))
+
+    report = {
+        "benchmark": args.command,
+        "started_at": started,
+        "environment": _environment(),
+        "parameters": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": results,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.command == "embeddings" and not results["parity_ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
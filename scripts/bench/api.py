@@ -0,0 +1,142 @@
+import asyncio
+import os
+import sys
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import List, Optional, Sequence
+
+import httpx
+
+from scripts.bench.corpus import SyntheticCorpus
+from scripts.bench.stats import latency_summary
+
+SCENARIOS = ("query", "hybrid", "rag")
+
+
+def _request(scenario: str, text: str, k: int):
+    if scenario == "query":
+        return "/query", {"query": text, "top_k": k}
+    if scenario == "hybrid":
+        return "/query", {"query": text, "top_k": k, "mode": "hybrid"}
+    return "/financial/analyze", {"document": text}
+
+
+@asynccontextmanager
+async def _client(url: Optional[str], timeout_s: float):
+    if url:
+        async with httpx.AsyncClient(base_url=url, timeout=timeout_s) as client:
+            yield client
+        return
+
+    # In-process: the real app and pipeline, with the deterministic LocalAdapter
+    # as LLM. The response cache is off unless the environment turns it on, so
+    # RAG requests measure retrieval and generation rather than cache hits.
+    os.environ["LLM_PROVIDER"] = "local"
+    os.environ.setdefault("RESPONSE_CACHE_ENABLED", "false")
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=timeout_s
+        ) as client:
+            yield client
+
+
+async def run(
+    corpus: SyntheticCorpus,
+    scenarios: Sequence[str] = SCENARIOS,
+    concurrency: int = 16,
+    requests: int = 500,
+    k: int = 5,
+    bulk_batch: int = 500,
+    url: Optional[str] = None,
+    timeout_s: float = 60.0,
+) -> dict:
+    async with _client(url, timeout_s) as client:
+        result = {"target": url or "in-process", "concurrency": concurrency}
+        result["ingest"] = await _ingest(client, corpus, bulk_batch)
+
+        _, texts = corpus.queries(requests)
+        # Unique texts: repeated ones would be embedding cache hits
+        texts = [f"{text} {i}" for i, text in enumerate(texts)]
+
+        result["scenarios"] = {}
+        for scenario in scenarios:
+            _progress(f"api {scenario}: {requests} requests, concurrency {concurrency}")
+            result["scenarios"][scenario] = await _drive(client, scenario, texts, concurrency, k)
+
+    return result
+
+
+async def _ingest(client: httpx.AsyncClient, corpus: SyntheticCorpus, bulk_batch: int) -> dict:
+    """Seeds the store through /documents/bulk, embedding with the real model."""
+    documents, errors = 0, 0
+    start = time.perf_counter()
+
+    for first in range(0, corpus.size, bulk_batch):
+        rows = range(first, min(first + bulk_batch, corpus.size))
+        payload = {
+            "documents": [
+                {"content": corpus.text(row, row % corpus.clusters), "metadata": {"bench": True}}
+                for row in rows
+            ]
+        }
+        response = await client.post("/documents/bulk", json=payload)
+        if response.status_code != 200:
+            errors += len(rows)
+            continue
+        body = response.json()
+        documents += body["indexed"]
+        errors += body["failed"]
+        _progress(f"  ingested {documents}/{corpus.size} documents")
+
+    seconds = time.perf_counter() - start
+    return {
+        "documents": documents,
+        "errors": errors,
+        "seconds": round(seconds, 3),
+        "docs_per_s": round(documents / seconds, 1) if seconds else 0.0,
+    }
+
+
+async def _drive(
+    client: httpx.AsyncClient, scenario: str, texts: List[str], concurrency: int, k: int
+) -> dict:
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < len(texts):
+            text = texts[next_index]
+            next_index += 1
+
+            path, payload = _request(scenario, text, k)
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, json=payload)
+                status = str(response.status_code)
+            except httpx.HTTPError as exc:
+                status = type(exc).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[status] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    seconds = time.perf_counter() - start
+
+    return {
+        "requests": len(latencies),
+        "seconds": round(seconds, 3),
+        "throughput_rps": round(len(latencies) / seconds, 1),
+        "errors": sum(count for status, count in statuses.items() if status != "200"),
+        "statuses": dict(statuses),
+        "latency": latency_summary(latencies),
+    }
+
+
+def _progress(message: str, stream=sys.stderr) -> None:
+    print(message, file=stream, flush=True)
@@ -0,0 +1,111 @@
+import uuid
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+# Words per topic cluster; contents mix topic words with shared filler so
+# full-text search has something to match and something to ignore.
+_FILLER = [
+    "report", "quarter", "analysis", "summary", "review", "period", "total",
+    "segment", "outlook", "guidance", "update", "statement", "figures",
+]
+_TOPIC_WORDS = 6
+# Generation unit: row r always comes from block r // _BLOCK_ROWS with the
+# same seed, whatever batch size a caller reads with
+_BLOCK_ROWS = 10_000
+# Norm of the noise around a (unit) centroid: clusters overlap, as real
+# embeddings do, without the corpus degrading into uniform random vectors
+_SPREAD = 0.8
+
+
+class SyntheticCorpus:
+    """
+    Reproducible clustered embeddings with matching text, generated in
+    batches so corpora larger than RAM can be streamed into a backend.
+
+    Vectors are unit length, so cosine, l2 and inner product rank them
+    identically and one exact ground truth serves every metric. Rows only
+    depend on the seed, so ground truth and ingest can make separate passes
+    with different batch sizes.
+    """
+
+    def __init__(self, size: int, dimension: int = 384, clusters: int = 100, seed: int = 42):
+        if size < 1 or dimension < 1 or clusters < 1:
+            raise ValueError("size, dimension and clusters must be >= 1.")
+
+        self.size = size
+        self.dimension = dimension
+        self.clusters = clusters
+        self.seed = seed
+        self._noise_scale = _SPREAD / np.sqrt(dimension)
+
+        rng = np.random.default_rng(seed)
+        self.centroids = _normalize(rng.standard_normal((clusters, dimension), dtype=np.float32))
+        self._vocabulary = [f"t{c}w{w}" for c in range(clusters) for w in range(_TOPIC_WORDS)]
+
+    def chunk_id(self, row: int) -> str:
+        # Deterministic ids: the same row has the same id in every run
+        return str(uuid.UUID(int=(self.seed << 64) | row))
+
+    def blocks(self) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+        """(first row, cluster per row, float32 vectors) per generation block."""
+        for start in range(0, self.size, _BLOCK_ROWS):
+            end = min(start + _BLOCK_ROWS, self.size)
+            rng = np.random.default_rng((self.seed, start // _BLOCK_ROWS))
+            labels = rng.integers(0, self.clusters, end - start)
+            noise = rng.standard_normal((end - start, self.dimension), dtype=np.float32)
+            yield start, labels, _normalize(self.centroids[labels] + self._noise_scale * noise)
+
+    def items(self, batch_size: int) -> Iterator[List[tuple]]:
+        """save_many() rows: (chunk_id, document_id, chunk_index, content, metadata, embedding)."""
+        batch: List[tuple] = []
+        for start, labels, vectors in self.blocks():
+            for offset, (label, vector) in enumerate(zip(labels, vectors)):
+                row = start + offset
+                chunk_id = self.chunk_id(row)
+                content = self.text(row, int(label))
+                batch.append((chunk_id, chunk_id, 0, content, {"cluster": int(label)}, vector))
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    def text(self, row: int, label: int) -> str:
+        topic = self._vocabulary[label * _TOPIC_WORDS:(label + 1) * _TOPIC_WORDS]
+        words = [topic[(row + i) % _TOPIC_WORDS] for i in range(4)]
+        words += [_FILLER[(row + i) % len(_FILLER)] for i in range(4)]
+        return f"Document {row}: " + " ".join(words) + "."
+
+    def queries(self, count: int) -> Tuple[np.ndarray, List[str]]:
+        """Query vectors drawn like the corpus (separate stream) plus query texts."""
+        rng = np.random.default_rng((self.seed, 1 << 32))
+        labels = rng.integers(0, self.clusters, count)
+        noise = rng.standard_normal((count, self.dimension), dtype=np.float32)
+        vectors = _normalize(self.centroids[labels] + self._noise_scale * noise)
+        texts = [
+            " ".join(self._vocabulary[int(label) * _TOPIC_WORDS:int(label) * _TOPIC_WORDS + 2])
+            for label in labels
+        ]
+        return vectors, texts
+
+    def ground_truth(self, queries: np.ndarray, k: int) -> List[List[str]]:
+        """Exact top-k chunk ids per query, merged block by block."""
+        best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        best_rows = np.full((len(queries), k), -1, dtype=np.int64)
+
+        for start, _, vectors in self.blocks():
+            scores = queries @ vectors.T
+            rows = np.broadcast_to(np.arange(start, start + len(vectors)), scores.shape)
+
+            merged_scores = np.concatenate([best_scores, scores], axis=1)
+            merged_rows = np.concatenate([best_rows, rows], axis=1)
+            top = np.argpartition(-merged_scores, min(k, merged_scores.shape[1] - 1), axis=1)[:, :k]
+            best_scores = np.take_along_axis(merged_scores, top, axis=1)
+            best_rows = np.take_along_axis(merged_rows, top, axis=1)
+
+        return [[self.chunk_id(int(row)) for row in rows if row >= 0] for rows in best_rows]
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
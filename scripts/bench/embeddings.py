@@ -0,0 +1,139 @@
+import sys
+import time
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from scripts.bench.stats import latency_summary, recall_at_k
+
+# Sentences of 4 to ~300 words, so texts past max_seq_length exercise truncation
+_WORDS = (
+    "revenue margin liquidity covenant exposure quarter guidance impairment "
+    "leverage dividend forecast variance audit filing hedge counterparty default "
+    "collateral refinancing cash flow operating segment growth decline risk the "
+    "company reported higher lower than expected due to market conditions and "
+    "increased costs in its european business while debt remained stable"
+).split()
+
+
+def sample_texts(count: int, seed: int) -> List[str]:
+    rng = np.random.default_rng(seed)
+    lengths = np.minimum(rng.geometric(1 / 30, count) + 3, 300)
+    return [
+        " ".join(_WORDS[i] for i in rng.integers(0, len(_WORDS), length)).capitalize() + "."
+        for length in lengths
+    ]
+
+
+def run(
+    model_name: str,
+    variants: Sequence[str],
+    texts: Sequence[str],
+    batch_sizes: Sequence[int] = (1, 32),
+    single_texts: int = 200,
+    threads: Optional[int] = None,
+    onnx_dir: str = "./data/onnx",
+    k: int = 10,
+) -> dict:
+    """
+    Parity against the torch backend plus load and encode throughput per
+    backend. Parity is the cosine similarity of the two embeddings of each
+    text and the overlap of each text's top-k neighbours among all texts.
+
+    variants are "onnx" or "onnx:<isa>" for dynamic int8 weights, e.g.
+    "onnx:avx2"; torch always runs first as the reference.
+    """
+    # Importing the registry loads the app settings (.env)
+    from app.infrastructure.embeddings.model_registry import EmbeddingModelRegistry
+    from app.infrastructure.embeddings.runtime import EmbeddingRuntime
+
+    runtimes = [EmbeddingRuntime(intra_op_threads=threads)]
+    for spec in variants:
+        backend, _, quantization = spec.partition(":")
+        if backend != "torch":
+            runtimes.append(EmbeddingRuntime(backend, quantization or "none", threads, onnx_dir))
+
+    reference = None
+    results = []
+
+    for runtime in runtimes:
+        _progress(f"{runtime.label}: load")
+
+        # A fresh registry per backend; rss_delta_mb depends on what is already loaded
+        registry = EmbeddingModelRegistry(loader=runtime.load, backend=runtime.label)
+        model = registry.get(model_name)
+        model.warmup()
+
+        result = {"backend": runtime.label, **registry.stats()[model_name]}
+        result["throughput"] = _throughput(model, texts, batch_sizes, single_texts)
+
+        _progress(f"{runtime.label}: parity over {len(texts)} texts")
+        embeddings = np.asarray(model.encode(list(texts), batch_size=64), dtype=np.float32)
+        if reference is None:
+            reference = embeddings
+        else:
+            result["parity"] = _parity(reference, embeddings, runtime.parity_min_cosine, k)
+
+        results.append(result)
+
+    return {
+        "model": model_name,
+        "texts": len(texts),
+        "threads": threads,
+        "runs": results,
+        "parity_ok": all(run["parity"]["ok"] for run in results[1:]),
+    }
+
+
+def _throughput(model, texts: Sequence[str], batch_sizes: Sequence[int], single_texts: int) -> List[dict]:
+    runs = []
+    for batch_size in batch_sizes:
+        if batch_size == 1:
+            # One encode call per text, as single /query requests do
+            samples = []
+            for text in texts[:single_texts]:
+                start = time.perf_counter()
+                model.encode(text)
+                samples.append(time.perf_counter() - start)
+            runs.append({
+                "batch_size": 1,
+                "texts_per_s": round(len(samples) / sum(samples), 1),
+                "latency": latency_summary(samples),
+            })
+            continue
+
+        start = time.perf_counter()
+        model.encode(list(texts), batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        runs.append({"batch_size": batch_size, "texts_per_s": round(len(texts) / elapsed, 1)})
+    return runs
+
+
+def _parity(reference: np.ndarray, embeddings: np.ndarray, min_cosine: float, k: int) -> dict:
+    reference = _normalize(reference)
+    embeddings = _normalize(embeddings)
+    cosine = np.sum(reference * embeddings, axis=1)
+
+    return {
+        "min_cosine": round(float(cosine.min()), 6),
+        "mean_cosine": round(float(cosine.mean()), 6),
+        "p01_cosine": round(float(np.percentile(cosine, 1)), 6),
+        "tolerance": min_cosine,
+        "neighbour_recall_at_k": recall_at_k(_neighbours(embeddings, k), _neighbours(reference, k)),
+        "ok": bool(cosine.min() >= min_cosine),
+    }
+
+
+def _neighbours(embeddings: np.ndarray, k: int) -> List[List[int]]:
+    scores = embeddings @ embeddings.T
+    np.fill_diagonal(scores, -np.inf)
+    k = min(k, len(embeddings) - 1)
+    return np.argpartition(-scores, k - 1, axis=1)[:, :k].tolist() if k > 0 else []
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def _progress(message: str, stream=sys.stderr) -> None:
+    print(message, file=stream, flush=True)
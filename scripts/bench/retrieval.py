@@ -0,0 +1,300 @@
+import sys
+import time
+from typing import Dict, List, Sequence, Tuple
+
+from scripts.bench.corpus import SyntheticCorpus
+from scripts.bench.stats import latency_summary, recall_at_k
+
+IndexSpec = Tuple[str, Dict[str, int]]
+
+
+def parse_index(spec: str) -> IndexSpec:
+    """"exact", "ivfflat:lists=100" or "hnsw:m=16,ef_construction=64"."""
+    index_type, _, raw = spec.partition(":")
+    index_type = index_type.strip().lower()
+    if index_type not in ("exact", "ivfflat", "hnsw"):
+        raise ValueError(f"Unsupported index: {spec}")
+
+    params = {}
+    for pair in filter(None, raw.split(",")):
+        key, _, value = pair.partition("=")
+        params[key.strip()] = int(value)
+    return index_type, params
+
+
+def index_label(index: IndexSpec) -> str:
+    index_type, params = index
+    if not params:
+        return index_type
+    return index_type + ":" + ",".join(f"{key}={value}" for key, value in params.items())
+
+
+def search_grid(index_type: str, probes: Sequence[int], ef_search: Sequence[int]) -> List[dict]:
+    if index_type == "ivfflat":
+        return [{"probes": p} for p in probes]
+    if index_type == "hnsw":
+        return [{"ef_search": ef} for ef in ef_search]
+    return [{}]
+
+
+def run(
+    backend: str,
+    corpus: SyntheticCorpus,
+    indexes: List[IndexSpec],
+    query_count: int = 200,
+    k: int = 10,
+    probes: Sequence[int] = (1, 10, 40),
+    ef_search: Sequence[int] = (40, 100, 200),
+    metric: str = "cosine",
+    batch_size: int = 5000,
+    warmup: int = 20,
+    hybrid: bool = False,
+    table: str = "bench_chunks",
+    keep: bool = False,
+    quantizations: Sequence[str] = ("none",),
+    rescore_factors: Sequence[int] = (4,),
+) -> dict:
+    queries, texts = corpus.queries(query_count)
+    _progress(f"ground truth: {query_count} queries x {corpus.size} rows")
+    truth = corpus.ground_truth(queries, k)
+
+    common = dict(
+        corpus=corpus, queries=queries, texts=texts, truth=truth, k=k,
+        probes=probes, ef_search=ef_search, metric=metric,
+        batch_size=batch_size, warmup=warmup, hybrid=hybrid,
+    )
+    if backend == "memory":
+        if any(q != "none" for q in quantizations):
+            raise ValueError("Quantization is supported by the pgvector backend only.")
+        runs = _run_memory(indexes, **common)
+        return {"backend": backend, "runs": runs}
+
+    ingest, runs = _run_pgvector(
+        indexes,
+        table=table,
+        keep=keep,
+        quantizations=quantizations,
+        rescore_factors=rescore_factors,
+        **common,
+    )
+    return {"backend": backend, "table": table, "ingest": ingest, "runs": runs}
+
+
+# -----------------------------
+# Backends
+# -----------------------------
+
+def _run_memory(indexes: List[IndexSpec], corpus, metric, batch_size, **search) -> List[dict]:
+    from app.infrastructure.vector_store.memory_vector_store import InMemoryVectorStore
+
+    runs = []
+    for index in indexes:
+        index_type, params = index
+        if index_type == "ivfflat":
+            raise ValueError("The memory backend supports exact and hnsw indexes only.")
+
+        # The graph is built during ingest, so each index gets its own store
+        store = InMemoryVectorStore(
+            metric=metric,
+            ann=index_type == "hnsw",
+            hnsw_m=params.get("m", 16),
+            hnsw_ef_construction=params.get("ef_construction", 64),
+        )
+        _progress(f"memory {index_label(index)}: ingest")
+        ingest = _ingest(store, corpus, batch_size)
+        runs.append({
+            "index": index_label(index),
+            "ingest": ingest,
+            "search": _search_all(store, index_type, **search),
+        })
+    return runs
+
+
+def _run_pgvector(
+    indexes: List[IndexSpec],
+    corpus,
+    metric,
+    batch_size,
+    table,
+    keep,
+    quantizations,
+    rescore_factors,
+    **search,
+):
+    from pgvector.psycopg2 import register_vector
+
+    from app.config import settings
+    from app.infrastructure.vector_store.collections import Collection, collection_table_sql
+    from app.infrastructure.vector_store.connection_pool import PgConnectionPool
+    from app.infrastructure.vector_store.index_manager import VectorIndexManager, index_name
+    from app.infrastructure.vector_store.pgvector_repository import PgVectorRepository
+
+    pool = PgConnectionPool(
+        host=settings.DB_HOST,
+        port=settings.DB_PORT,
+        db_name=settings.DB_NAME,
+        user=settings.DB_USER,
+        password=settings.DB_PASSWORD,
+        min_size=1,
+        max_size=2,
+        configure=register_vector,
+    )
+    pool.open()
+
+    collection = Collection(
+        name=table, table=table, embedding_model="synthetic", dimension=corpus.dimension,
+        metric=metric, index_type="hnsw",
+    )
+    # Same schema as a collection table; the ANN index (last statement) is
+    # left out so ingest is measured on its own and every index is built
+    # over the full table
+    statements = collection_table_sql(collection)[:-1]
+
+    try:
+        with pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"DROP TABLE IF EXISTS {table}")
+                for statement in statements:
+                    cur.execute(statement)
+            conn.commit()
+
+        _progress(f"pgvector {table}: ingest")
+        ingest = _ingest(PgVectorRepository(pool, metric=metric, table=table), corpus, batch_size)
+
+        with pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"ANALYZE {table}")
+            conn.commit()
+        ingest["table_bytes"] = _relation_size(pool, table)
+
+        runs = []
+        # Exact first: every build swaps in the new ANN index
+        for index in sorted(indexes, key=lambda i: i[0] != "exact"):
+            index_type, params = index
+            # Quantization only changes what the ANN index stores
+            for quantization in quantizations if index_type != "exact" else ["none"]:
+                repository = PgVectorRepository(
+                    pool,
+                    metric=metric,
+                    table=table,
+                    quantization=quantization,
+                    dimension=corpus.dimension,
+                )
+                run = {"index": index_label(index), "quantization": quantization}
+
+                if index_type != "exact":
+                    manager = VectorIndexManager(
+                        pool,
+                        metric=metric,
+                        table=table,
+                        quantization=quantization,
+                        dimension=corpus.dimension,
+                    )
+                    _progress(f"pgvector {table}: build {index_label(index)} {quantization}")
+                    manager.begin("build", index_type=index_type, **params)
+                    start = time.perf_counter()
+                    manager.build(index_type=index_type, **params)
+                    run["build_s"] = round(time.perf_counter() - start, 3)
+                    run["index_bytes"] = _relation_size(pool, index_name(table))
+
+                run["search"] = _search_all(
+                    repository,
+                    index_type,
+                    rescore_factors=rescore_factors if quantization != "none" else [None],
+                    **search,
+                )
+                runs.append(run)
+
+        return ingest, runs
+
+    finally:
+        if not keep:
+            with pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(f"DROP TABLE IF EXISTS {table}")
+                conn.commit()
+        pool.close()
+
+
+# -----------------------------
+# Measurements
+# -----------------------------
+
+def _ingest(repository, corpus: SyntheticCorpus, batch_size: int) -> dict:
+    rows, seconds = 0, 0.0
+    for batch in corpus.items(batch_size):
+        # Only the writes are timed, not generating the synthetic rows
+        start = time.perf_counter()
+        repository.save_many(batch)
+        seconds += time.perf_counter() - start
+
+        rows += len(batch)
+        if rows % (batch_size * 20) == 0:
+            _progress(f"  {rows}/{corpus.size} rows")
+
+    return {"rows": rows, "seconds": round(seconds, 3), "rows_per_s": round(rows / seconds, 1)}
+
+
+def _relation_size(pool, relation: str) -> int:
+    # Table size includes TOAST, where pgvector spills large vectors
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_table_size(%s::regclass)", (relation,))
+            return cur.fetchone()[0]
+
+
+def _search_all(
+    repository, index_type: str, probes, ef_search, rescore_factors=(None,), **search
+) -> List[dict]:
+    results = []
+    for params in search_grid(index_type, probes, ef_search):
+        for factor in rescore_factors:
+            grid_point = dict(params)
+            if factor is not None:
+                repository.rescore_factor = factor
+                grid_point["rescore_factor"] = factor
+            _progress(f"  search {grid_point or 'exact'}")
+            results.append({**grid_point, **_search(repository, params, **search)})
+    return results
+
+
+def _search(
+    repository,
+    params: dict,
+    queries,
+    texts: List[str],
+    truth: List[List[str]],
+    k: int,
+    warmup: int,
+    hybrid: bool,
+    **_,
+) -> dict:
+    for query in queries[:warmup]:
+        repository.similarity_search(query, k, **params)
+
+    latencies, found = [], []
+    for query in queries:
+        start = time.perf_counter()
+        rows = repository.similarity_search(query, k, **params)
+        latencies.append(time.perf_counter() - start)
+        found.append([str(row["id"]) for row in rows])
+
+    result = {
+        "latency": latency_summary(latencies),
+        "qps": round(len(latencies) / sum(latencies), 1),
+        f"recall_at_{k}": recall_at_k(found, truth),
+    }
+
+    if hybrid:
+        hybrid_latencies = []
+        for query, text in zip(queries, texts):
+            start = time.perf_counter()
+            repository.hybrid_search(query, text, k, **params)
+            hybrid_latencies.append(time.perf_counter() - start)
+        result["hybrid_latency"] = latency_summary(hybrid_latencies)
+
+    return result
+
+
+def _progress(message: str, stream=sys.stderr) -> None:
+    print(message, file=stream, flush=True)
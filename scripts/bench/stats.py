@@ -0,0 +1,33 @@
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+
+def latency_summary(samples_s: Sequence[float]) -> Dict[str, float]:
+    """Percentiles in milliseconds."""
+    if not samples_s:
+        return {"count": 0}
+
+    ms = np.asarray(samples_s, dtype=np.float64) * 1000.0
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "count": int(len(ms)),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(ms.max()), 3),
+    }
+
+
+def recall_at_k(results: List[List[str]], truth: List[List[str]]) -> float:
+    """Mean fraction of the exact top-k ids found, over all queries."""
+    if not truth:
+        return 0.0
+
+    found = [
+        len(set(got) & set(expected)) / len(expected)
+        for got, expected in zip(results, truth)
+        if expected
+    ]
+    return round(float(np.mean(found)), 4) if found else 0.0
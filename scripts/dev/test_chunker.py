@@ -0,0 +1,30 @@
+import re
+from app.infrastructure.chunking.text_chunker import TextChunker
+
+
+# Subword-like counter: one token per 4 characters of each whitespace-separated
+# word, so a long word without spaces counts as many tokens
+def count_tokens(texts):
+    return [sum(-(-len(word) // 4) for word in re.findall(r"\S+", text)) for text in texts]
+
+
+max_tokens = 10
+chunker = TextChunker(count_tokens, max_tokens=max_tokens, overlap_tokens=2)
+
+texts = [
+    "a" * 200 + ". Next one.",
+    "https://example.com/" + "x" * 300 + " short tail.",
+    "word " * 100,
+    "財務報告" * 80 + "。",
+]
+
+for text in texts:
+    chunks = chunker.split(text)
+    counts = count_tokens(chunks)
+    assert all(count <= max_tokens for count in counts), counts
+    print(f"{len(chunks)} chunks, max {max(counts)} tokens")
+
+streamed = list(chunker.stream(text[i:i + 7] for text in texts for i in range(0, len(text), 7)))
+assert all(count <= max_tokens for count in count_tokens(streamed))
+
+print("\nEvery chunk fits max_tokens.")
@@ -1,10 +1,10 @@
 from app.infrastructure.embeddings.embedding_service import LocalEmbeddingService
-from app.infrastructure.vector_store.pgvector_repository import PgVectorRepository
+from app.infrastructure.vector_store.memory_vector_store import InMemoryVectorStore
 from app.application.use_cases import IngestTextUseCase, QuerySimilarTextUseCase
 
 
 embedder = LocalEmbeddingService()
-repo = PgVectorRepository()
+repo = InMemoryVectorStore()
 
 ingest = IngestTextUseCase(embedder, repo)
 query_uc = QuerySimilarTextUseCase(embedder, repo)
@@ -1,10 +1,10 @@
 import uuid
 from app.infrastructure.embeddings.embedding_service import LocalEmbeddingService
-from app.infrastructure.vector_store.pgvector_repository import PgVectorRepository
+from app.infrastructure.vector_store.memory_vector_store import InMemoryVectorStore
 
 
 embedder = LocalEmbeddingService()
-repo = PgVectorRepository()
+repo = InMemoryVectorStore()
 
 texts = [
     "financial report Q4 profit growth",